@@ -72,13 +72,9 @@ fi
 # Configurar banco de dados
 log "Configurando banco de dados..."
 cd src
-python3 -c "
-import os
-from main import app, db
-with app.app_context():
-    db.create_all()
-    print('✅ Banco de dados configurado com sucesso')
-"
+# Esquema definido pelas migrações em src/migrations (SQLite ou PostgreSQL, conforme DATABASE_URL)
+python3 -m flask --app main db upgrade
+log "✅ Banco de dados configurado com sucesso"
 cd ..
 
 # Verificar se usuário admin existe
@@ -1,14 +1,28 @@
 # Configuração do Gunicorn para produção
 import os
+import subprocess
+import sys
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Métricas Prometheus somadas entre os workers (src/metricas.py); precisa estar
+# definido antes do app ser carregado
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/brccsis_metricas')
+
 # Configurações básicas
 bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5001')}"
-workers = 4
-worker_class = "sync"
+# O pool de conexões do PostgreSQL (src/banco.py) usa os mesmos valores
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+# gthread: conexões longas (SSE de notificações) ocupam uma thread, não o worker inteiro
+worker_class = "gthread"
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+# Capacidade: workers × threads requisições simultâneas. Cada SSE aberto
+# (/api/v133/notificacoes/stream, até 300 s) prende uma thread; por worker
+# aceitam-se SSE_MAXIMO_CONEXOES (padrão: metade das threads) e acima disso a
+# rota responde 503 e o painel volta ao polling (src/models/eventos.py)
+os.environ.setdefault('SSE_MAXIMO_CONEXOES', str(max(1, threads // 2)))
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 100
@@ -27,7 +41,8 @@ tmp_upload_dir = None
 accesslog = "logs/access.log"
 errorlog = "logs/error.log"
 loglevel = os.getenv('LOG_LEVEL', 'info').lower()
-access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s'
+# Server-Timing (src/instrumentacao.py): consultas SQL e tempo de banco da requisição
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s "%({server-timing}o)s"'
 
 # Configurações de segurança
 limit_request_line = 4094
@@ -42,14 +57,34 @@ limit_request_field_size = 8190
 def on_starting(server):
     """Executado quando o servidor está iniciando"""
     server.log.info("Iniciando servidor BRCcSis...")
+    # Valores de uma execução anterior não podem entrar na soma
+    diretorio = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(diretorio, exist_ok=True)
+    for arquivo in os.listdir(diretorio):
+        if arquivo.endswith('.db'):
+            os.remove(os.path.join(diretorio, arquivo))
+
+# Processo da fila de jobs (importações em segundo plano); JOBS_WORKER=0 desativa
+worker_jobs = None
 
 def when_ready(server):
     """Executado quando o servidor está pronto"""
+    global worker_jobs
     server.log.info("Servidor BRCcSis pronto para receber conexões")
+    if os.getenv('JOBS_WORKER', '1') != '0':
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'worker_jobs.py')
+        worker_jobs = subprocess.Popen([sys.executable, script])
+        server.log.info(f"Worker de jobs iniciado (pid {worker_jobs.pid})")
 
 def on_exit(server):
     """Executado quando o servidor está parando"""
     server.log.info("Parando servidor BRCcSis...")
+    if worker_jobs and worker_jobs.poll() is None:
+        worker_jobs.terminate()
+        try:
+            worker_jobs.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            worker_jobs.kill()
 
 # Configurações de worker
 def worker_int(worker):
@@ -63,6 +98,20 @@ def pre_fork(server, worker):
 def post_fork(server, worker):
     """Executado após o fork do worker"""
     server.log.info(f"Worker {worker.pid} criado com sucesso")
+    # Conexões abertas pelo master (preload_app) não podem ser usadas pelo worker
+    from src.models import db
+    with worker.app.wsgi().app_context():
+        db.engine.dispose(close=False)
+
+def worker_exit(server, worker):
+    """Executado quando o worker está saindo: grava a fila de auditoria pendente"""
+    from src.models.auditoria import gravador_auditoria
+    gravador_auditoria.descarregar()
+
+def child_exit(server, worker):
+    """Executado no master quando um worker termina"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
 
 def worker_abort(worker):
     """Executado quando worker é abortado"""
@@ -0,0 +1,92 @@
+"""
+Ajustes do SQLite aplicados a cada conexão
+
+Com vários workers gravando no mesmo arquivo, o journal padrão (DELETE)
+serializa escritores e bloqueia leitores ("database is locked"). Toda conexão
+nova recebe WAL, synchronous=NORMAL, busy_timeout, mmap, cache e temp_store,
+configuráveis por variáveis de ambiente (SQLITE_*). A manutenção periódica
+(PRAGMA optimize e checkpoint do WAL) roda numa thread do processo da fila de
+jobs (ou do servidor de desenvolvimento), não em cada worker.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def _opcao(nome, padrao, permitidos=None):
+    valor = os.getenv(nome, padrao).strip().upper()
+    if permitidos and valor not in permitidos:
+        raise ValueError(f"{nome} inválido: {valor} (use {', '.join(permitidos)})")
+    return valor
+
+
+def _inteiro(nome, padrao):
+    try:
+        return int(os.getenv(nome, padrao))
+    except ValueError:
+        raise ValueError(f"{nome} deve ser um número inteiro")
+
+
+# PRAGMA -> valor aplicado em toda conexão nova
+PRAGMAS = {
+    'journal_mode': _opcao('SQLITE_JOURNAL_MODE', 'WAL', ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY')),
+    'synchronous': _opcao('SQLITE_SYNCHRONOUS', 'NORMAL', ('OFF', 'NORMAL', 'FULL', 'EXTRA')),
+    'busy_timeout': _inteiro('SQLITE_BUSY_TIMEOUT_MS', '5000'),
+    'mmap_size': _inteiro('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)),
+    # Negativo = KiB (64 MiB por conexão)
+    'cache_size': _inteiro('SQLITE_CACHE_SIZE', '-65536'),
+    'temp_store': _opcao('SQLITE_TEMP_STORE', 'MEMORY', ('DEFAULT', 'FILE', 'MEMORY')),
+}
+
+# Intervalo da manutenção (segundos); 0 desativa
+INTERVALO_MANUTENCAO = _inteiro('SQLITE_INTERVALO_MANUTENCAO', '600')
+
+
+def aplicar_pragmas(conexao, pragmas=None):
+    """Aplica os PRAGMAs numa conexão sqlite3 (fora de transação)"""
+    cursor = conexao.cursor()
+    try:
+        for nome, valor in (pragmas or PRAGMAS).items():
+            cursor.execute(f"PRAGMA {nome}={valor}")
+    finally:
+        cursor.close()
+
+
+@event.listens_for(Engine, 'connect')
+def _configurar_conexao(conexao_dbapi, registro_conexao):
+    if isinstance(conexao_dbapi, sqlite3.Connection) and os.getenv('SQLITE_AJUSTES', '1') != '0':
+        aplicar_pragmas(conexao_dbapi)
+
+
+def executar_manutencao(engine):
+    """Atualiza as estatísticas do planejador e devolve o WAL ao banco sem bloquear ninguém"""
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.connect() as conexao:
+        conexao.exec_driver_sql("PRAGMA optimize")
+        if PRAGMAS['journal_mode'] == 'WAL':
+            conexao.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+
+
+def iniciar_manutencao(app, intervalo=INTERVALO_MANUTENCAO):
+    """Thread que executa a manutenção a cada intervalo (uma por servidor: processo da fila de jobs)"""
+    if not intervalo:
+        return None
+
+    def _executar():
+        from src.models import db
+        while True:
+            time.sleep(intervalo)
+            try:
+                with app.app_context():
+                    executar_manutencao(db.engine)
+            except Exception as e:
+                print(f"Erro na manutenção do SQLite: {str(e)}")
+
+    thread = threading.Thread(target=_executar, name='manutencao-sqlite', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,88 @@
+"""
+Conexão com o banco e esquema controlado pelas migrações
+
+DATABASE_URL escolhe o banco: SQLite (padrão, src/database/app.db) ou
+PostgreSQL. No PostgreSQL cada processo do gunicorn tem o seu QueuePool,
+dimensionado pelas threads do worker; DB_MAX_CONEXOES limita o total somado
+de todos os workers e do processo da fila de jobs.
+
+O esquema é definido pelas revisões em src/migrations (Alembic) nos dois
+bancos. Na inicialização o app aplica as revisões pendentes; um banco SQLite
+antigo, criado pelo db.create_all(), é completado pelos models e marcado com
+a revisão atual. Mudanças nos models viram revisões novas com
+`flask db migrate` (FLASK_APP=src/main.py).
+"""
+
+import os
+from sqlalchemy import inspect, text
+
+DIRETORIO_MIGRACOES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# pg_advisory_lock: só uma instância aplica as migrações por vez
+CHAVE_LOCK_MIGRACOES = 4727001
+
+
+def _inteiro(nome, padrao):
+    try:
+        return int(os.getenv(nome) or padrao)
+    except ValueError:
+        raise ValueError(f"{nome} deve ser um número inteiro")
+
+
+def url_banco(padrao):
+    """DATABASE_URL (com o esquema postgres:// aceito por alguns provedores) ou o SQLite padrão"""
+    url = os.getenv('DATABASE_URL') or padrao
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def opcoes_engine(url):
+    """SQLALCHEMY_ENGINE_OPTIONS para a URL (o SQLite fica com os padrões do Flask-SQLAlchemy)"""
+    if url.startswith('sqlite'):
+        return {}
+
+    # Uma conexão por thread do worker; o excedente cobre as threads internas (auditoria, eventos)
+    tamanho = _inteiro('DB_POOL_SIZE', os.getenv('GUNICORN_THREADS', '8'))
+    excedente = _inteiro('DB_MAX_OVERFLOW', '4')
+    limite = _inteiro('DB_MAX_CONEXOES', '0')
+    if limite:
+        # Workers do gunicorn + processo da fila de jobs
+        por_processo = max(2, limite // (_inteiro('GUNICORN_WORKERS', '4') + 1))
+        tamanho = min(tamanho, por_processo)
+        excedente = min(excedente, por_processo - tamanho)
+
+    return {
+        'pool_size': tamanho,
+        'max_overflow': excedente,
+        # Descarta conexões derrubadas pelo servidor (restart, failover) antes de usar
+        'pool_pre_ping': True,
+        # Renova conexões antes do idle timeout de proxies/poolers
+        'pool_recycle': _inteiro('DB_POOL_RECYCLE', '1800'),
+        'pool_timeout': _inteiro('DB_POOL_TIMEOUT', '10'),
+    }
+
+
+def preparar_banco(db):
+    """Aplica as migrações pendentes (bancos anteriores às migrações são marcados antes)"""
+    from flask_migrate import stamp, upgrade
+
+    with db.engine.connect() as conexao:
+        postgresql = conexao.dialect.name == 'postgresql'
+        if postgresql:
+            conexao.execute(text("SELECT pg_advisory_lock(:chave)"), {'chave': CHAVE_LOCK_MIGRACOES})
+            conexao.commit()
+        try:
+            tabelas = inspect(db.engine).get_table_names()
+            if 'usuarios' in tabelas and 'alembic_version' not in tabelas:
+                # Banco anterior às migrações: completa tabelas e índices pelos models (= head)
+                db.create_all()
+                for tabela in db.metadata.tables.values():
+                    for indice in tabela.indexes:
+                        indice.create(db.engine, checkfirst=True)
+                stamp(DIRETORIO_MIGRACOES)
+            upgrade(DIRETORIO_MIGRACOES)
+        finally:
+            if postgresql:
+                conexao.execute(text("SELECT pg_advisory_unlock(:chave)"), {'chave': CHAVE_LOCK_MIGRACOES})
+                conexao.commit()
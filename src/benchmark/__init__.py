@@ -0,0 +1,13 @@
+"""
+Benchmark do BRCcSis
+
+    python -m src.benchmark gerar --banco /tmp/bench.db --empresas 50000 --cotacoes 1000000
+    python -m src.benchmark executar --banco /tmp/bench.db --saida resultados.json
+    python -m src.benchmark comparar base.json resultados.json
+    python -m src.benchmark concorrencia --banco /tmp/bench.db --leitores 8 --escritores 2
+
+gerar popula um banco separado (DATABASE_URL) com dados sintéticos;
+executar roda os cenários contra o app real e grava o JSON;
+comparar aponta cenários cuja mediana piorou além da tolerância;
+concorrencia mede leituras/escritas por segundo com e sem os ajustes do SQLite.
+"""
@@ -0,0 +1,160 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+
+# Mesmo ajuste de caminho do main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.benchmark.dados import ParametrosDados
+
+
+def _carregar_app(banco):
+    """Importa o app do main.py apontando para o banco do benchmark"""
+    os.environ['DATABASE_URL'] = banco if '://' in banco else f"sqlite:///{os.path.abspath(banco)}"
+    from src.main import app
+    # Uma linha de log por requisição atrapalharia a leitura dos resultados
+    logging.getLogger('brccsis.requisicoes').setLevel(logging.WARNING)
+    return app
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def gerar(args):
+    from src.models import db
+    from src.models.usuario import Usuario
+    from src.benchmark.dados import GeradorDados
+
+    app = _carregar_app(args.banco)
+    parametros = ParametrosDados(**{
+        campo: getattr(args, campo) for campo in ParametrosDados.__dataclass_fields__
+    })
+    with app.app_context():
+        if Usuario.query.filter_by(username='bench_admin').first():
+            sys.exit("O banco já tem dados do benchmark; use um arquivo novo")
+        print(f"Gerando dados: {parametros.to_dict()}")
+        resultado = GeradorDados(parametros).gerar()
+        db.session.remove()
+    print(json.dumps(resultado, indent=2))
+
+
+def executar(args):
+    from sqlalchemy import inspect, text
+    from src.models import db
+    from src.benchmark.cenarios import executar_cenarios
+
+    app = _carregar_app(args.banco)
+    with app.app_context():
+        tabelas = inspect(db.engine).get_table_names()
+        linhas = {
+            tabela: db.session.execute(text(f"SELECT count(*) FROM {tabela}")).scalar()
+            for tabela in ('empresas', 'cotacoes', 'notificacoes', 'logs_auditoria', 'usuarios') if tabela in tabelas
+        }
+        db.session.remove()
+
+    print(f"Executando cenários ({args.repeticoes} repetições): {linhas}")
+    cenarios = executar_cenarios(
+        app, repeticoes=args.repeticoes, aquecimento=args.aquecimento,
+        nomes=args.cenarios.split(',') if args.cenarios else None
+    )
+    resultado = {
+        'commit': _commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform()
+        },
+        'linhas': linhas,
+        'repeticoes': args.repeticoes,
+        'cenarios': cenarios
+    }
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em {args.saida}")
+
+
+def concorrencia(args):
+    from src.benchmark.concorrencia import medir_concorrencia
+
+    if '://' in args.banco:
+        sys.exit("concorrencia mede o arquivo SQLite diretamente; informe o caminho do arquivo")
+    print(f"Leitura/escrita concorrente: {args.leitores} leitores, {args.escritores} escritores, {args.segundos}s por rodada")
+    resultado = medir_concorrencia(args.banco, args.leitores, args.escritores, args.segundos)
+    resultado.update(commit=_commit_atual(), data=datetime.now().isoformat(timespec='seconds'))
+    print(f"Ganho: leituras x{resultado['ganho_leituras']}, escritas x{resultado['ganho_escritas']}")
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+
+def comparar(args):
+    from src.benchmark.cenarios import comparar_resultados
+
+    with open(args.base, encoding='utf-8') as arquivo:
+        base = json.load(arquivo)
+    with open(args.atual, encoding='utf-8') as arquivo:
+        atual = json.load(arquivo)
+
+    linhas, regressao = comparar_resultados(base, atual, args.tolerancia)
+    print(f"{'cenário':<28} {'base ms':>10} {'atual ms':>10} {'var %':>8} {'sql':>11}")
+    for nome, antes, depois, variacao, sql_antes, sql_depois, piorou in linhas:
+        print(f"{nome:<28} {antes:>10} {depois:>10} {variacao:>8} {f'{sql_antes}→{sql_depois}':>11}"
+              f"{'  REGRESSÃO' if piorou else ''}")
+    sys.exit(1 if regressao else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m src.benchmark', description='Benchmark do BRCcSis')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    padrao = ParametrosDados()
+    p_gerar = comandos.add_parser('gerar', help='Popular um banco novo com dados sintéticos')
+    p_gerar.add_argument('--banco', required=True, help='Arquivo SQLite ou URL do banco')
+    for campo in ParametrosDados.__dataclass_fields__:
+        p_gerar.add_argument(f'--{campo}', type=int, default=getattr(padrao, campo))
+    p_gerar.set_defaults(funcao=gerar)
+
+    p_executar = comandos.add_parser('executar', help='Rodar os cenários e gravar os resultados em JSON')
+    p_executar.add_argument('--banco', required=True)
+    p_executar.add_argument('--saida', default='benchmark.json')
+    p_executar.add_argument('--repeticoes', type=int, default=5)
+    p_executar.add_argument('--aquecimento', type=int, default=1)
+    p_executar.add_argument('--cenarios', help='Nomes separados por vírgula (padrão: todos)')
+    p_executar.set_defaults(funcao=executar)
+
+    p_concorrencia = comandos.add_parser(
+        'concorrencia', help='Vazão de leitura/escrita concorrente com e sem os ajustes do SQLite'
+    )
+    p_concorrencia.add_argument('--banco', required=True, help='Arquivo SQLite gerado por gerar')
+    p_concorrencia.add_argument('--leitores', type=int, default=8)
+    p_concorrencia.add_argument('--escritores', type=int, default=2)
+    p_concorrencia.add_argument('--segundos', type=int, default=10)
+    p_concorrencia.add_argument('--saida')
+    p_concorrencia.set_defaults(funcao=concorrencia)
+
+    p_comparar = comandos.add_parser('comparar', help='Comparar dois resultados (sai com 1 se houver regressão)')
+    p_comparar.add_argument('base')
+    p_comparar.add_argument('atual')
+    p_comparar.add_argument('--tolerancia', type=float, default=10.0, help='Piora máxima da mediana (%%)')
+    p_comparar.set_defaults(funcao=comparar)
+
+    args = parser.parse_args()
+    args.funcao(args)
+
+
+if __name__ == '__main__':
+    main()
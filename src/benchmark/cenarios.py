@@ -0,0 +1,221 @@
+"""
+Cenários cronometrados do benchmark
+
+Cada cenário faz requisições reais ao app do main.py pelo test client do
+Flask, logado com o perfil que usaria a tela. O tempo é medido de ponta a
+ponta (corpo consumido, inclusive respostas em streaming); consultas SQL e
+tempo de banco vêm do cabeçalho Server-Timing (src/instrumentacao.py); nas
+respostas em streaming o cabeçalho é parcial e vale a medição fechada junto
+com a resposta.
+"""
+
+import re
+import statistics
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Callable, Optional
+from src import instrumentacao
+from src.models import db
+from src.models.planilha import ABA_EMPRESAS, ABAS_EXCEL, COLUNAS_EMPRESAS
+from src.models.jobs import FilaJobs
+from .dados import SENHA_BENCHMARK, linha_empresa, filhas_empresa
+
+PADRAO_SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) consultas( \(parcial\))?"')
+
+# Empresas da planilha usada no cenário de importação
+EMPRESAS_IMPORTACAO = 2000
+
+USUARIOS_PERFIL = {
+    'admin': 'bench_admin',
+    'consultor': 'bench_consultor_1',
+    'operador': 'bench_operador_1'
+}
+
+
+@dataclass
+class Cenario:
+    nome: str
+    perfil: Optional[str]
+    executar: Callable
+    descricao: str = ''
+
+
+def _get(url):
+    return lambda cliente, contexto: cliente.get(url)
+
+
+def _post_json(url, corpo):
+    return lambda cliente, contexto: cliente.post(url, json=corpo)
+
+
+def _importar_excel(cliente, contexto):
+    """Envia a planilha e processa o job na hora (o worker da fila não roda no benchmark)"""
+    resposta = cliente.post(
+        '/api/empresas/import-excel',
+        data={'file': (BytesIO(contexto['planilha']), 'benchmark.xlsx')},
+        content_type='multipart/form-data'
+    )
+    if resposta.status_code == 202:
+        with contexto['app'].app_context():
+            job = FilaJobs.reservar_proximo()
+            while job:
+                FilaJobs.executar(job)
+                job = FilaJobs.reservar_proximo()
+            db.session.remove()
+    return resposta
+
+
+CENARIOS = [
+    Cenario('busca_termo', None, _get('/api/empresas?q=Log&per_page=20'),
+            'Listagem de transportadoras com busca livre'),
+    Cenario('busca_filtros', None,
+            _get('/api/empresas?modalidade=Rodovi%C3%A1rio&tipo_carga=Carga%20Refrigerada&per_page=20'),
+            'Listagem com filtros de modalidade e tipo de carga'),
+    Cenario('busca_facetas', None, _get('/api/empresas/facetas?modalidade=Mar%C3%ADtimo&etiqueta=PARCEIRA'),
+            'Painel de facetas'),
+    Cenario('busca_avancada', None, _post_json('/api/empresas/search', {'q': 'Trans', 'regioes': ['SP']}),
+            'Busca avançada (POST)'),
+    Cenario('cotacoes_consultor', 'consultor', _get('/api/v133/cotacoes'), 'Cotações do consultor'),
+    Cenario('cotacoes_operador', 'operador', _get('/api/v133/cotacoes'), 'Cotações visíveis ao operador'),
+    Cenario('cotacoes_admin', 'admin', _get('/api/v133/cotacoes'), 'Todas as cotações'),
+    Cenario('cotacoes_disponiveis', 'operador', _get('/api/v133/cotacoes/disponiveis'),
+            'Fila de cotações disponíveis'),
+    Cenario('notificacoes_operador', 'operador', _get('/api/v133/notificacoes'), 'Notificações do operador'),
+    Cenario('cotacoes_estatisticas', 'admin', _get('/api/cotacoes/estatisticas'), 'Estatísticas de cotações'),
+    Cenario('dashboard_empresas', 'admin', _get('/api/analytics'), 'Analytics de empresas'),
+    Cenario('dashboard_sistema_geral', 'admin', _get('/api/v133/analytics/sistema/geral'), 'Relatório geral'),
+    Cenario('dashboard_tempo_real', 'admin', _get('/api/v133/analytics/sistema/tempo-real'), 'Painel tempo real'),
+    Cenario('metricas_empresas_lote', 'admin',
+            _get('/api/v133/analytics/empresas/metricas?ids=' + ','.join(str(n) for n in range(1, 51))),
+            'Métricas de 50 transportadoras (tela de comparação)'),
+    Cenario('dashboard_ranking_usuarios', 'admin', _get('/api/v133/analytics/usuarios/ranking'),
+            'Ranking de usuários'),
+    Cenario('relatorio_equipe_csv', 'admin', _get('/api/v133/analytics/usuarios/relatorio?formato=csv'),
+            'Relatório de toda a equipe (CSV em streaming)'),
+    Cenario('logs_auditoria', 'admin', _get('/api/auth/logs'), 'Primeira página do log de auditoria'),
+    Cenario('exportacao_ndjson', 'admin', _get('/api/empresas/export?formato=ndjson'),
+            'Exportação completa (streaming)'),
+    Cenario('importacao_excel', 'admin', _importar_excel,
+            f'Importação Excel de {EMPRESAS_IMPORTACAO} empresas (upload + job)'),
+]
+
+
+def gerar_planilha_importacao(quantidade=EMPRESAS_IMPORTACAO, semente=7):
+    """Planilha no layout do template com empresas sintéticas (CNPJs fora da faixa do gerador)"""
+    import random
+    from openpyxl import Workbook
+
+    aleatorio = random.Random(semente)
+    abas = {ABA_EMPRESAS: [list(COLUNAS_EMPRESAS)]}
+    for nomes, colunas, _ in ABAS_EXCEL.values():
+        abas[nomes[0]] = [['cnpj_empresa'] + list(colunas)]
+
+    for n in range(quantidade):
+        empresa = linha_empresa(aleatorio, 90000000 + n)
+        abas[ABA_EMPRESAS].append([empresa.get(coluna) for coluna in COLUNAS_EMPRESAS])
+        for chave, linhas in filhas_empresa(aleatorio).items():
+            nomes, colunas, _ = ABAS_EXCEL[chave]
+            for linha in linhas:
+                abas[nomes[0]].append([empresa['cnpj']] + [_celula(linha.get(coluna)) for coluna in colunas])
+
+    planilha = Workbook(write_only=True)
+    for nome, linhas in abas.items():
+        aba = planilha.create_sheet(nome)
+        for linha in linhas:
+            aba.append(linha)
+    buffer = BytesIO()
+    planilha.save(buffer)
+    return buffer.getvalue()
+
+
+def _celula(valor):
+    if isinstance(valor, bool):
+        return 'Sim' if valor else 'Não'
+    return valor
+
+
+def _percentil(amostras, percentual):
+    ordenadas = sorted(amostras)
+    posicao = min(len(ordenadas) - 1, round(percentual / 100 * (len(ordenadas) - 1)))
+    return ordenadas[posicao]
+
+
+def _clientes(app):
+    """Um test client logado por perfil (None = sem login)"""
+    clientes = {None: app.test_client()}
+    for perfil, username in USUARIOS_PERFIL.items():
+        cliente = app.test_client()
+        resposta = cliente.post('/api/auth/login', json={'username': username, 'password': SENHA_BENCHMARK})
+        if resposta.status_code != 200:
+            raise RuntimeError(f"Login de {username} falhou ({resposta.status_code}); gere os dados antes")
+        clientes[perfil] = cliente
+    return clientes
+
+
+def executar_cenarios(app, repeticoes=5, aquecimento=1, nomes=None):
+    """Executa os cenários e retorna {nome: resultado}"""
+    selecionados = [c for c in CENARIOS if not nomes or c.nome in nomes]
+    clientes = _clientes(app)
+    contexto = {'app': app}
+    if any(c.nome == 'importacao_excel' for c in selecionados):
+        contexto['planilha'] = gerar_planilha_importacao()
+
+    resultados = {}
+    for cenario in selecionados:
+        cliente = clientes[cenario.perfil]
+        amostras, status, consultas, tempos_db = [], set(), [], []
+        for rodada in range(aquecimento + repeticoes):
+            inicio = time.perf_counter()
+            resposta = cenario.executar(cliente, contexto)
+            resposta.get_data()
+            resposta.close()
+            duracao = (time.perf_counter() - inicio) * 1000
+            if rodada < aquecimento:
+                continue
+            amostras.append(duracao)
+            status.add(resposta.status_code)
+            medicao = PADRAO_SERVER_TIMING.search(resposta.headers.get('Server-Timing', ''))
+            if medicao and medicao.group(3):
+                # Streaming: o corpo rodou depois do cabeçalho
+                completa = instrumentacao.ultima_medicao()
+                tempos_db.append(completa['tempo_db_ms'])
+                consultas.append(completa['consultas'])
+            elif medicao:
+                tempos_db.append(float(medicao.group(1)))
+                consultas.append(int(medicao.group(2)))
+
+        resultados[cenario.nome] = {
+            'descricao': cenario.descricao,
+            'perfil': cenario.perfil,
+            'status': sorted(status),
+            'ms': {
+                'min': round(min(amostras), 2),
+                'mediana': round(statistics.median(amostras), 2),
+                'p95': round(_percentil(amostras, 95), 2),
+                'max': round(max(amostras), 2)
+            },
+            'consultas_sql': max(consultas) if consultas else None,
+            'tempo_db_ms': round(statistics.median(tempos_db), 2) if tempos_db else None,
+            'amostras_ms': [round(a, 2) for a in amostras]
+        }
+        print(f"  {cenario.nome}: mediana {resultados[cenario.nome]['ms']['mediana']} ms, "
+              f"{resultados[cenario.nome]['consultas_sql']} consultas, status {sorted(status)}")
+    return resultados
+
+
+def comparar_resultados(base, atual, tolerancia=10.0):
+    """Linhas (cenário, mediana base, mediana atual, variação %) e se alguma passou da tolerância"""
+    linhas = []
+    regressao = False
+    for nome, resultado in atual['cenarios'].items():
+        anterior = base['cenarios'].get(nome)
+        if not anterior:
+            continue
+        antes, depois = anterior['ms']['mediana'], resultado['ms']['mediana']
+        variacao = (depois - antes) / antes * 100 if antes else 0.0
+        piorou = variacao > tolerancia
+        regressao = regressao or piorou
+        linhas.append((nome, antes, depois, round(variacao, 1), anterior.get('consultas_sql'),
+                       resultado.get('consultas_sql'), piorou))
+    return linhas, regressao
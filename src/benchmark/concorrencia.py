@@ -0,0 +1,114 @@
+"""
+Vazão de leitura/escrita concorrente com e sem os ajustes do SQLite
+
+Processos leitores e escritores (como os workers do gunicorn) usam o mesmo
+arquivo ao mesmo tempo, primeiro com os padrões do SQLite (journal DELETE,
+synchronous FULL) e depois com os PRAGMAs de src/ajustes_sqlite.py. Os
+escritores gravam linhas de auditoria marcadas, removidas no final.
+"""
+
+import multiprocessing
+import random
+import sqlite3
+import time
+from datetime import datetime
+from src.ajustes_sqlite import PRAGMAS, aplicar_pragmas
+
+# Padrões do SQLite (o sqlite3 do Python já espera até 5 s por lock)
+PRAGMAS_PADRAO = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+ACAO_BENCHMARK = 'BENCHMARK_CONCORRENCIA'
+
+
+def _trabalhar(caminho, pragmas, papel, segundos, semente, resultados):
+    aleatorio = random.Random(semente)
+    conexao = sqlite3.connect(caminho, isolation_level=None)
+    aplicar_pragmas(conexao, {nome: valor for nome, valor in pragmas.items() if nome != 'journal_mode'})
+    usuarios = [linha[0] for linha in conexao.execute("SELECT id FROM usuarios")]
+    operacoes = erros = 0
+    fim = time.monotonic() + segundos
+    while time.monotonic() < fim:
+        usuario_id = aleatorio.choice(usuarios)
+        try:
+            if papel == 'leitor':
+                conexao.execute(
+                    "SELECT id, numero_cotacao, status FROM cotacoes WHERE consultor_id = ? "
+                    "ORDER BY data_solicitacao DESC LIMIT 20", (usuario_id,)
+                ).fetchall()
+                conexao.execute(
+                    "SELECT count(*) FROM notificacoes WHERE usuario_id = ? AND lida = 0", (usuario_id,)
+                ).fetchone()
+            else:
+                # Mesmo formato de uma requisição que grava: um commit por operação
+                conexao.execute("BEGIN")
+                conexao.execute(
+                    "INSERT INTO logs_auditoria (usuario_id, acao, recurso, detalhes, timestamp) "
+                    "VALUES (?, ?, 'BENCHMARK', 'escrita concorrente', ?)",
+                    (usuario_id, ACAO_BENCHMARK, datetime.now().isoformat(sep=' '))
+                )
+                conexao.execute("UPDATE usuarios SET ultimo_login = ? WHERE id = ?",
+                                (datetime.now().isoformat(sep=' '), usuario_id))
+                conexao.execute("COMMIT")
+            operacoes += 1
+        except sqlite3.OperationalError:
+            # "database is locked" depois do busy timeout
+            erros += 1
+            if conexao.in_transaction:
+                conexao.execute("ROLLBACK")
+    conexao.close()
+    resultados.put((papel, operacoes, erros))
+
+
+def _rodada(caminho, pragmas, leitores, escritores, segundos):
+    conexao = sqlite3.connect(caminho, isolation_level=None)
+    modo = conexao.execute(f"PRAGMA journal_mode={pragmas['journal_mode']}").fetchone()[0]
+    conexao.close()
+
+    contexto = multiprocessing.get_context('fork')
+    resultados = contexto.Queue()
+    processos = [
+        contexto.Process(target=_trabalhar, args=(caminho, pragmas, papel, segundos, n, resultados))
+        for n, papel in enumerate(['leitor'] * leitores + ['escritor'] * escritores)
+    ]
+    for processo in processos:
+        processo.start()
+    totais = {'leitor': [0, 0], 'escritor': [0, 0]}
+    for _ in processos:
+        papel, operacoes, erros = resultados.get()
+        totais[papel][0] += operacoes
+        totais[papel][1] += erros
+    for processo in processos:
+        processo.join()
+
+    return {
+        'journal_mode': modo,
+        'pragmas': pragmas,
+        'leituras_por_segundo': round(totais['leitor'][0] / segundos, 1),
+        'escritas_por_segundo': round(totais['escritor'][0] / segundos, 1),
+        'erros_lock': totais['leitor'][1] + totais['escritor'][1]
+    }
+
+
+def medir_concorrencia(caminho, leitores=8, escritores=2, segundos=10):
+    """Executa as duas rodadas e retorna os resultados com o ganho de cada vazão"""
+    padrao = _rodada(caminho, PRAGMAS_PADRAO, leitores, escritores, segundos)
+    print(f"  padrão: {padrao}")
+    ajustado = _rodada(caminho, PRAGMAS, leitores, escritores, segundos)
+    print(f"  ajustado: {ajustado}")
+
+    conexao = sqlite3.connect(caminho, isolation_level=None)
+    conexao.execute("DELETE FROM logs_auditoria WHERE acao = ?", (ACAO_BENCHMARK,))
+    conexao.close()
+
+    def ganho(chave):
+        return round(ajustado[chave] / padrao[chave], 2) if padrao[chave] else None
+
+    return {
+        'leitores': leitores,
+        'escritores': escritores,
+        'segundos': segundos,
+        'padrao': padrao,
+        'ajustado': ajustado,
+        'ganho_leituras': ganho('leituras_por_segundo'),
+        'ganho_escritas': ganho('escritas_por_segundo')
+    }
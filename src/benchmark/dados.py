@@ -0,0 +1,357 @@
+"""
+Gerador de dados sintéticos para o benchmark
+
+Os volumes são parametrizáveis e a semente torna o conjunto reproduzível.
+As linhas entram por INSERT em lote (executemany) numa conexão do engine; no
+final o índice de busca e o rollup do analytics são reconstruídos, como faria
+o main.py para um banco importado de fora.
+"""
+
+import random
+import time
+from dataclasses import dataclass, asdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert, literal, select, text
+from werkzeug.security import generate_password_hash
+from src.models import db
+from src.models.usuario import Usuario, TipoUsuario, LogAuditoria
+from src.models.empresa import (
+    Empresa, Regulamentacao, Certificacao, ModalidadeTransporte, TipoCarga, AbrangenciaGeografica,
+    Frota, Armazenagem, PortoTerminal, SeguroCobertura, Tecnologia, DesempenhoQualidade,
+    ClienteSegmento, RecursoHumano, Sustentabilidade
+)
+from src.models.cotacao import Cotacao, HistoricoCotacao, StatusCotacao, EmpresaCotacao
+from src.models.notificacao import Notificacao, TipoNotificacao
+from src.models.busca import IndiceBuscaEmpresa
+from src.models.analytics import RollupAnalytics
+from src.models.relatorio_cotacoes import RollupCotacoes
+from src.models.facetas import IndiceFacetasEmpresa
+
+# Linhas por executemany
+TAMANHO_LOTE_DADOS = 10000
+
+# Senha de todos os usuários do benchmark
+SENHA_BENCHMARK = 'benchmark'
+
+ESTADOS = {
+    'SP': ['São Paulo', 'Campinas', 'Santos', 'Sorocaba'], 'RJ': ['Rio de Janeiro', 'Niterói', 'Duque de Caxias'],
+    'MG': ['Belo Horizonte', 'Uberlândia', 'Contagem'], 'PR': ['Curitiba', 'Londrina', 'Paranaguá'],
+    'RS': ['Porto Alegre', 'Caxias do Sul', 'Rio Grande'], 'SC': ['Florianópolis', 'Joinville', 'Itajaí'],
+    'BA': ['Salvador', 'Feira de Santana'], 'PE': ['Recife', 'Suape'], 'GO': ['Goiânia', 'Anápolis'],
+    'AM': ['Manaus'], 'PA': ['Belém'], 'CE': ['Fortaleza'], 'ES': ['Vitória', 'Vila Velha']
+}
+PREFIXOS = ['Trans', 'Rodo', 'Log', 'Cargo', 'Express', 'Via', 'Rota', 'Frete', 'Mar', 'Aero']
+SUFIXOS = ['Brasil', 'Sul', 'Norte', 'Nacional', 'Master', 'Prime', 'Global', 'Rápido', 'Total', 'Mais']
+NATUREZAS = ['Transportes', 'Logística', 'Cargas', 'Armazéns Gerais', 'Comércio Exterior']
+ETIQUETAS = ['CADASTRADA'] * 6 + ['PARCEIRA'] * 3 + ['ENCERRADO']
+MODALIDADES = ['Rodoviário', 'Marítimo', 'Aéreo', 'Ferroviário', 'Multimodal', 'Cabotagem']
+TIPOS_CARGA = ['Carga Geral', 'Carga Refrigerada', 'Granel Sólido', 'Granel Líquido', 'Produtos Perigosos',
+               'Carga Frágil', 'Veículos', 'Contêineres', 'Carga Viva', 'Mudanças']
+CERTIFICACOES = ['ISO 9001', 'ISO 14001', 'SASSMAQ', 'OEA', 'ISO 45001', 'GMP']
+REGULAMENTACOES = ['RNTRC', 'ANTAQ', 'ANAC', 'IBAMA', 'Polícia Federal', 'ANVISA']
+TIPOS_FROTA = ['Própria', 'Terceirizada', 'Agregada']
+VEICULOS = ['Carreta', 'Truck', 'Toco', 'VUC', 'Bitrem', 'Rodotrem', 'Van']
+CARROCERIAS = ['Baú', 'Sider', 'Graneleiro', 'Frigorífico', 'Tanque', 'Porta-contêiner']
+PORTOS = ['Porto de Santos', 'Porto de Paranaguá', 'Porto de Itajaí', 'Porto do Rio Grande', 'Porto de Suape',
+          'Porto de Vitória', 'Porto de Manaus', 'Aeroporto de Guarulhos', 'Aeroporto de Viracopos']
+SEGUROS = ['RCTR-C', 'RC-DC', 'RCTF-DA', 'RCA-C']
+SEGURADORAS = ['Porto Seguro', 'Tokio Marine', 'Allianz', 'Mapfre', 'Sompo']
+TECNOLOGIAS = ['GPS', 'Telemetria', 'TMS', 'WMS', 'EDI', 'Roteirizador', 'Câmeras embarcadas']
+SEGMENTOS = ['Varejo', 'Indústria', 'Agronegócio', 'Farmacêutico', 'Automotivo', 'E-commerce', 'Químico']
+ACOES_AUDITORIA = [('LOGIN_SUCESSO', 'AUTH'), ('LOGOUT', 'AUTH'), ('CRIAR', 'COTACAO'), ('ACEITAR', 'COTACAO'),
+                   ('RESPONDER', 'COTACAO'), ('EDITAR_EMPRESA', 'EMPRESAS'), ('CRIAR_EMPRESA', 'EMPRESAS')]
+PRODUTOS = ['Autopeças', 'Eletrônicos', 'Alimentos congelados', 'Grãos', 'Móveis', 'Medicamentos',
+            'Produtos químicos', 'Têxteis', 'Máquinas', 'Bebidas']
+
+
+@dataclass
+class ParametrosDados:
+    """Volumes do conjunto sintético"""
+    empresas: int = 50000
+    cotacoes: int = 1000000
+    notificacoes: int = 5000000
+    logs: int = 5000000
+    consultores: int = 50
+    operadores: int = 20
+    dias: int = 730
+    semente: int = 42
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def gerar_cnpj(numero):
+    """CNPJ formatado (com dígitos verificadores válidos) derivado de um número sequencial"""
+    base = [int(d) for d in f'{numero:08d}'[-8:]] + [0, 0, 0, 1]
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = sum(d * p for d, p in zip(base, pesos)) % 11
+        base.append(0 if resto < 2 else 11 - resto)
+    d = ''.join(map(str, base))
+    return f'{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}'
+
+
+def linha_empresa(aleatorio, numero):
+    """Colunas da tabela empresas para a empresa sintética de número informado"""
+    estado = aleatorio.choice(list(ESTADOS))
+    nome = f'{aleatorio.choice(PREFIXOS)}{aleatorio.choice(SUFIXOS).lower()} {aleatorio.choice(NATUREZAS)} {numero}'
+    return {
+        'razao_social': f'{nome} Ltda',
+        'nome_fantasia': nome,
+        'cnpj': gerar_cnpj(numero),
+        'inscricao_estadual': f'{aleatorio.randrange(10 ** 8, 10 ** 9)}',
+        'endereco_completo': f'Rua {aleatorio.choice(SUFIXOS)}, {aleatorio.randint(1, 5000)} - '
+                             f'{aleatorio.choice(ESTADOS[estado])}/{estado}',
+        'telefone_comercial': f'(11) {aleatorio.randint(2000, 5999)}-{aleatorio.randint(1000, 9999)}',
+        'email': f'contato{numero}@exemplo.com.br',
+        'website': f'www.empresa{numero}.com.br',
+        'data_fundacao': date(aleatorio.randint(1970, 2022), aleatorio.randint(1, 12), aleatorio.randint(1, 28)),
+        'etiqueta': aleatorio.choice(ETIQUETAS)
+    }
+
+
+def filhas_empresa(aleatorio):
+    """Linhas das tabelas filhas de uma empresa (chave do registro de importação -> lista)"""
+    def alguns(opcoes, minimo, maximo):
+        return aleatorio.sample(opcoes, aleatorio.randint(minimo, min(maximo, len(opcoes))))
+
+    hoje = date.today()
+    validade = lambda: hoje + timedelta(days=aleatorio.randint(-180, 1500))
+    return {
+        'regulamentacoes': [
+            {'tipo_regulamentacao': r, 'numero_registro': str(aleatorio.randrange(10 ** 8, 10 ** 9)),
+             'data_emissao': hoje - timedelta(days=aleatorio.randint(200, 3000)), 'data_validade': validade(),
+             'orgao_emissor': r.split()[0]}
+            for r in alguns(REGULAMENTACOES, 1, 3)
+        ],
+        'certificacoes': [
+            {'nome_certificacao': c, 'numero_certificacao': f'{c}-{aleatorio.randint(1000, 9999)}',
+             'data_validade': validade(), 'orgao_certificador': 'Bureau Veritas'}
+            for c in alguns(CERTIFICACOES, 0, 3)
+        ],
+        'modalidades_transporte': [{'modalidade': m} for m in alguns(MODALIDADES, 1, 3)],
+        'tipos_carga': [{'tipo_carga': t} for t in alguns(TIPOS_CARGA, 1, 5)],
+        'abrangencia_geografica': [
+            {'tipo_abrangencia': aleatorio.choice(['Nacional', 'Regional', 'Internacional']),
+             'detalhes': ', '.join(alguns(list(ESTADOS), 1, 5))}
+        ],
+        'frota': [
+            {'tipo_frota': f, 'quantidade': aleatorio.randint(1, 300), 'tipo_veiculo': aleatorio.choice(VEICULOS),
+             'tipo_carroceria': aleatorio.choice(CARROCERIAS), 'capacidade': round(aleatorio.uniform(1, 60), 1),
+             'ano_medio': aleatorio.randint(2005, 2024)}
+            for f in alguns(TIPOS_FROTA, 1, 2)
+        ],
+        'armazenagem': [
+            {'possui_armazem': aleatorio.random() < 0.4, 'localizacao': aleatorio.choice(ESTADOS['SP']),
+             'capacidade_m2': float(aleatorio.randint(500, 50000)), 'tipos_armazenagem': 'Seca'}
+        ],
+        'portos_terminais': [{'nome_porto_terminal': p, 'tipo_terminal': 'Marítimo'} for p in alguns(PORTOS, 0, 3)],
+        'seguros_coberturas': [
+            {'tipo_seguro': s, 'numero_apolice': str(aleatorio.randrange(10 ** 6, 10 ** 7)),
+             'data_validade': validade(), 'seguradora': aleatorio.choice(SEGURADORAS),
+             'valor_cobertura': f'R$ {aleatorio.randint(100, 5000)}.000,00'}
+            for s in alguns(SEGUROS, 0, 3)
+        ],
+        'tecnologias': [{'nome_tecnologia': t, 'detalhes': ''} for t in alguns(TECNOLOGIAS, 0, 4)],
+        'desempenho_qualidade': [
+            {'prazo_medio_atendimento': str(aleatorio.randint(1, 15)), 'unidade_prazo': 'dias',
+             'indice_avarias_extravios': round(aleatorio.uniform(0, 3), 2),
+             'indice_entregas_prazo': round(aleatorio.uniform(80, 100), 1)}
+        ],
+        'clientes_segmentos': [{'segmento': s, 'principais_clientes': ''} for s in alguns(SEGMENTOS, 1, 3)],
+        'recursos_humanos': [{'numero_funcionarios': aleatorio.randint(5, 3000), 'programas_treinamento': ''}],
+        'sustentabilidade': [
+            {'certificacao_ambiental': 'ISO 14001', 'programas_reducao_emissoes': 'Frota Euro 6'}
+        ] if aleatorio.random() < 0.3 else []
+    }
+
+
+MODELOS_FILHAS = {
+    'regulamentacoes': Regulamentacao, 'certificacoes': Certificacao, 'modalidades_transporte': ModalidadeTransporte,
+    'tipos_carga': TipoCarga, 'abrangencia_geografica': AbrangenciaGeografica, 'frota': Frota,
+    'armazenagem': Armazenagem, 'portos_terminais': PortoTerminal, 'seguros_coberturas': SeguroCobertura,
+    'tecnologias': Tecnologia, 'desempenho_qualidade': DesempenhoQualidade, 'clientes_segmentos': ClienteSegmento,
+    'recursos_humanos': RecursoHumano, 'sustentabilidade': Sustentabilidade
+}
+
+
+class GeradorDados:
+    """Popula um banco vazio (tabelas já criadas) com o conjunto sintético"""
+
+    def __init__(self, parametros):
+        self.parametros = parametros
+        self.aleatorio = random.Random(parametros.semente)
+        self.contagens = {}
+
+    def gerar(self):
+        """Gera todas as tabelas e retorna as contagens e os tempos de cada etapa"""
+        tempos = {}
+        with db.engine.begin() as conexao:
+            for etapa in (self._usuarios, self._empresas, self._cotacoes, self._notificacoes, self._logs):
+                inicio = time.perf_counter()
+                etapa(conexao)
+                tempos[etapa.__name__.strip('_')] = round(time.perf_counter() - inicio, 2)
+                print(f"  {etapa.__name__.strip('_')}: {tempos[etapa.__name__.strip('_')]}s")
+
+            inicio = time.perf_counter()
+            if IndiceBuscaEmpresa.disponivel(conexao):
+                IndiceBuscaEmpresa.reconstruir(conexao)
+            RollupAnalytics.reconstruir(conexao)
+            RollupCotacoes.reconstruir(conexao)
+            tempos['indices'] = round(time.perf_counter() - inicio, 2)
+        IndiceFacetasEmpresa.invalidar()
+        return {'linhas': self.contagens, 'segundos': tempos}
+
+    def _inserir(self, conexao, modelo, linhas):
+        """executemany em lotes; aceita um gerador de linhas"""
+        lote = []
+        for linha in linhas:
+            lote.append(linha)
+            if len(lote) >= TAMANHO_LOTE_DADOS:
+                conexao.execute(insert(modelo), lote)
+                lote = []
+        if lote:
+            conexao.execute(insert(modelo), lote)
+
+    def _contar(self, tabela, quantidade):
+        self.contagens[tabela] = self.contagens.get(tabela, 0) + quantidade
+
+    def _usuarios(self, conexao):
+        p = self.parametros
+        senha = generate_password_hash(SENHA_BENCHMARK)
+        agora = datetime.now()
+        perfis = [('bench_admin', TipoUsuario.ADMINISTRADOR)]
+        perfis += [(f'bench_consultor_{n}', TipoUsuario.CONSULTOR) for n in range(1, p.consultores + 1)]
+        perfis += [(f'bench_operador_{n}', TipoUsuario.OPERADOR) for n in range(1, p.operadores + 1)]
+        self._inserir(conexao, Usuario, (
+            {'username': username, 'email': f'{username}@benchmark.local', 'password_hash': senha,
+             'nome_completo': username.replace('_', ' ').title(), 'tipo_usuario': tipo, 'ativo': True,
+             'data_criacao': agora, 'tentativas_login': 0}
+            for username, tipo in perfis
+        ))
+        linhas = conexao.execute(
+            text("SELECT id, username FROM usuarios WHERE username LIKE 'bench\\_%' ESCAPE '\\'")
+        ).all()
+        ids = {username: usuario_id for usuario_id, username in linhas}
+        self.consultores = [ids[u] for u, t in perfis if t == TipoUsuario.CONSULTOR]
+        self.operadores = [ids[u] for u, t in perfis if t == TipoUsuario.OPERADOR]
+        self.todos_usuarios = list(ids.values())
+        self._contar('usuarios', len(perfis))
+
+    def _empresas(self, conexao):
+        aleatorio = self.aleatorio
+        inicio_id = (conexao.execute(text("SELECT max(id) FROM empresas")).scalar() or 0) + 1
+        inicio_numero = inicio_id
+        agora = datetime.utcnow()
+        for bloco in range(0, self.parametros.empresas, TAMANHO_LOTE_DADOS):
+            quantidade = min(TAMANHO_LOTE_DADOS, self.parametros.empresas - bloco)
+            empresas = []
+            filhas = {chave: [] for chave in MODELOS_FILHAS}
+            for n in range(quantidade):
+                empresa_id = inicio_id + bloco + n
+                empresas.append(dict(linha_empresa(aleatorio, inicio_numero + bloco + n),
+                                     id=empresa_id, created_at=agora, updated_at=agora))
+                for chave, linhas in filhas_empresa(aleatorio).items():
+                    filhas[chave].extend(dict(linha, empresa_id=empresa_id) for linha in linhas)
+            self._inserir(conexao, Empresa, empresas)
+            for chave, linhas in filhas.items():
+                self._inserir(conexao, MODELOS_FILHAS[chave], linhas)
+                self._contar(MODELOS_FILHAS[chave].__tablename__, len(linhas))
+            self._contar('empresas', quantidade)
+        if conexao.dialect.name == 'postgresql':
+            # Ids explícitos não avançam a sequência do PostgreSQL
+            conexao.execute(text("SELECT setval(pg_get_serial_sequence('empresas', 'id'), max(id)) FROM empresas"))
+        self.empresas = (inicio_id, inicio_id + self.parametros.empresas - 1)
+
+    def _cotacoes(self, conexao):
+        aleatorio = self.aleatorio
+        p = self.parametros
+        # Termina ontem: não disputa numeração com cotações criadas hoje
+        ultimo_dia = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        por_dia = {}
+        status = list(StatusCotacao)
+        pesos = [25, 10, 15, 20, 10, 20]
+        modais = list(EmpresaCotacao)
+
+        def linhas():
+            for _ in range(p.cotacoes):
+                solicitada = ultimo_dia - timedelta(days=aleatorio.randrange(p.dias)) + timedelta(seconds=aleatorio.randrange(86400))
+                dia = solicitada.strftime('%Y%m%d')
+                por_dia[dia] = por_dia.get(dia, 0) + 1
+                situacao = aleatorio.choices(status, pesos)[0]
+                com_operador = situacao != StatusCotacao.SOLICITADA
+                respondida = situacao not in (StatusCotacao.SOLICITADA, StatusCotacao.ACEITA_OPERADOR)
+                origem, destino = aleatorio.choice(list(ESTADOS)), aleatorio.choice(list(ESTADOS))
+                yield {
+                    'numero_cotacao': f'COT-{dia}-{por_dia[dia]:04d}',
+                    'consultor_id': aleatorio.choice(self.consultores),
+                    'operador_id': aleatorio.choice(self.operadores) if com_operador else None,
+                    'empresa_prestadora_id': aleatorio.randint(*self.empresas) if respondida and p.empresas else None,
+                    'empresa_transporte': aleatorio.choices(modais, [70, 20, 10])[0],
+                    'status': situacao,
+                    'data_solicitacao': solicitada,
+                    'data_aceite_operador': solicitada + timedelta(hours=aleatorio.randint(1, 48)) if com_operador else None,
+                    'data_cotacao_enviada': solicitada + timedelta(hours=aleatorio.randint(49, 120)) if respondida else None,
+                    'cliente_nome': f'Cliente {aleatorio.randint(1, 5000)} {aleatorio.choice(SEGMENTOS)}',
+                    'cliente_cnpj': gerar_cnpj(10 ** 7 + aleatorio.randint(1, 5000)),
+                    'origem_cep': f'{aleatorio.randint(10000, 99999)}-000',
+                    'origem_endereco': f'Rua {aleatorio.choice(SUFIXOS)}, {aleatorio.randint(1, 999)}',
+                    'origem_cidade': aleatorio.choice(ESTADOS[origem]),
+                    'origem_estado': origem,
+                    'destino_cep': f'{aleatorio.randint(10000, 99999)}-000',
+                    'destino_endereco': f'Av. {aleatorio.choice(SUFIXOS)}, {aleatorio.randint(1, 999)}',
+                    'destino_cidade': aleatorio.choice(ESTADOS[destino]),
+                    'destino_estado': destino,
+                    'carga_descricao': aleatorio.choice(PRODUTOS),
+                    'carga_peso_kg': round(aleatorio.uniform(10, 30000), 2),
+                    'carga_valor_mercadoria': round(aleatorio.uniform(1000, 500000), 2),
+                    'cotacao_valor_frete': round(aleatorio.uniform(300, 40000), 2) if respondida else None,
+                    'cotacao_prazo_entrega': aleatorio.randint(1, 30) if respondida else None,
+                    'created_at': solicitada,
+                    'updated_at': solicitada
+                }
+
+        primeiro_id = (conexao.execute(text("SELECT max(id) FROM cotacoes")).scalar() or 0) + 1
+        self._inserir(conexao, Cotacao, linhas())
+        self._contar('cotacoes', p.cotacoes)
+        self.cotacoes = (primeiro_id, primeiro_id + p.cotacoes - 1)
+
+        # Uma entrada de histórico (criação) por cotação, copiada no próprio banco
+        conexao.execute(insert(HistoricoCotacao).from_select(
+            ['cotacao_id', 'usuario_id', 'status_novo', 'timestamp'],
+            select(
+                Cotacao.id, Cotacao.consultor_id,
+                literal(StatusCotacao.SOLICITADA, HistoricoCotacao.status_novo.type), Cotacao.data_solicitacao
+            ).where(Cotacao.id >= primeiro_id)
+        ))
+        self._contar('historico_cotacoes', p.cotacoes)
+
+    def _notificacoes(self, conexao):
+        aleatorio = self.aleatorio
+        p = self.parametros
+        if not p.cotacoes or not p.notificacoes:
+            return
+        tipos = list(TipoNotificacao)
+        agora = datetime.now()
+        self._inserir(conexao, Notificacao, (
+            {'usuario_id': aleatorio.choice(self.operadores if aleatorio.random() < 0.7 else self.consultores),
+             'cotacao_id': aleatorio.randint(*self.cotacoes), 'tipo': aleatorio.choice(tipos),
+             'titulo': 'Atualização de cotação', 'mensagem': 'Notificação gerada pelo benchmark',
+             'lida': aleatorio.random() < 0.8, 'created_at': agora - timedelta(minutes=aleatorio.randrange(p.dias * 1440))}
+            for _ in range(p.notificacoes)
+        ))
+        self._contar('notificacoes', p.notificacoes)
+
+    def _logs(self, conexao):
+        aleatorio = self.aleatorio
+        p = self.parametros
+        agora = datetime.now()
+
+        def linhas():
+            for _ in range(p.logs):
+                acao, recurso = aleatorio.choice(ACOES_AUDITORIA)
+                yield {'usuario_id': aleatorio.choice(self.todos_usuarios), 'acao': acao, 'recurso': recurso,
+                       'detalhes': f'{acao} via benchmark', 'ip_address': f'10.0.{aleatorio.randint(0, 255)}.{aleatorio.randint(1, 254)}',
+                       'timestamp': agora - timedelta(minutes=aleatorio.randrange(p.dias * 1440))}
+
+        self._inserir(conexao, LogAuditoria, linhas())
+        self._contar('logs_auditoria', p.logs)
@@ -0,0 +1,153 @@
+"""
+Instrumentação de SQL por requisição
+
+Eventos do engine contam as consultas de cada requisição e somam o tempo gasto
+no banco. A resposta leva um cabeçalho Server-Timing (db e app), que o
+gunicorn grava no access log ao lado do %(D)s, e cada requisição gera uma
+linha JSON no logger brccsis.requisicoes com as consultas mais lentas e a mais
+repetida (sinal de N+1). Requisições acima de SQL_LIMITE_LENTO_MS registram a
+lista completa de consultas.
+
+Respostas em streaming geram o corpo depois dos cabeçalhos: o Server-Timing
+delas leva só o que rodou antes ("parcial") e a medição completa é fechada
+quando o servidor fecha a resposta (log, /metrics e ultima_medicao()).
+
+INSTRUMENTACAO_SQL=0 desativa.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Requisições mais lentas que isso registram todas as consultas (ms)
+LIMITE_LENTO_MS = float(os.getenv('SQL_LIMITE_LENTO_MS', '500'))
+
+# Consultas mais lentas incluídas em toda linha de log
+CONSULTAS_MAIS_LENTAS = 3
+
+# Consultas guardadas por requisição (a contagem e o tempo continuam além disso)
+LIMITE_CONSULTAS_GUARDADAS = 1000
+
+logger = logging.getLogger('brccsis.requisicoes')
+
+# Última medição concluída na thread (usada pelo benchmark nas respostas em streaming)
+_medicoes = threading.local()
+
+
+def _configurar_logger():
+    if logger.handlers:
+        return
+    # Sob o gunicorn usa os mesmos destinos do error log
+    handlers = logging.getLogger('gunicorn.error').handlers or [logging.StreamHandler()]
+    for handler in handlers:
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql' in g:
+        conn.info.setdefault('inicio_consultas', []).append(time.perf_counter())
+
+
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('inicio_consultas')
+    if not inicios or not has_request_context() or 'sql' not in g:
+        return
+    duracao = (time.perf_counter() - inicios.pop()) * 1000
+    sql = g.sql
+    sql['total'] += 1
+    sql['tempo_ms'] += duracao
+    if len(sql['consultas']) < LIMITE_CONSULTAS_GUARDADAS:
+        sql['consultas'].append((statement, duracao))
+
+
+def _descartar_inicio(contexto):
+    conexao = contexto.connection
+    if conexao is not None and conexao.info.get('inicio_consultas'):
+        conexao.info['inicio_consultas'].pop()
+
+
+def _iniciar_requisicao():
+    g.sql = {'inicio': time.perf_counter(), 'total': 0, 'tempo_ms': 0.0, 'consultas': []}
+
+
+def ultima_medicao():
+    """{'consultas', 'tempo_db_ms', 'duracao_ms'} da última requisição concluída nesta thread"""
+    return getattr(_medicoes, 'ultima', None)
+
+
+def ao_fechar(resposta, funcao):
+    """
+    Executa funcao() ao fim da requisição: na hora, ou no fechamento da
+    resposta quando o corpo é gerado em streaming
+    """
+    if resposta.is_streamed:
+        resposta.call_on_close(funcao)
+    else:
+        funcao()
+
+
+def _finalizar_requisicao(resposta):
+    sql = g.get('sql')
+    if sql is None:
+        return resposta
+
+    duracao = (time.perf_counter() - sql['inicio']) * 1000
+    parcial = ' (parcial)' if resposta.is_streamed else ''
+    resposta.headers['Server-Timing'] = (
+        f'db;dur={sql["tempo_ms"]:.1f};desc="{sql["total"]} consultas{parcial}", app;dur={duracao:.1f}'
+    )
+
+    linha = {
+        'metodo': request.method,
+        'caminho': request.path,
+        'status': resposta.status_code,
+    }
+    if resposta.is_streamed:
+        linha['streaming'] = True
+    ao_fechar(resposta, lambda: _registrar(linha, sql))
+    return resposta
+
+
+def _registrar(linha, sql):
+    """Fecha a medição da requisição: linha de log e ultima_medicao()"""
+    duracao = (time.perf_counter() - sql['inicio']) * 1000
+    consultas = sql['consultas']
+    repeticoes = Counter(statement for statement, _ in consultas).most_common(1)
+    linha.update({
+        'duracao_ms': round(duracao, 1),
+        'consultas': sql['total'],
+        'tempo_db_ms': round(sql['tempo_ms'], 1),
+        'mais_lentas': [
+            {'sql': statement, 'ms': round(ms, 2)}
+            for statement, ms in sorted(consultas, key=lambda c: c[1], reverse=True)[:CONSULTAS_MAIS_LENTAS]
+        ],
+        'mais_repetida': {'sql': repeticoes[0][0], 'vezes': repeticoes[0][1]} if repeticoes else None
+    })
+    if duracao >= LIMITE_LENTO_MS:
+        linha['todas_consultas'] = [{'sql': statement, 'ms': round(ms, 2)} for statement, ms in consultas]
+    _medicoes.ultima = {
+        'consultas': sql['total'], 'tempo_db_ms': round(sql['tempo_ms'], 1), 'duracao_ms': round(duracao, 1)
+    }
+    logger.info(json.dumps(linha, ensure_ascii=False))
+
+
+def init_app(app):
+    """Liga a instrumentação ao app (desativada com INSTRUMENTACAO_SQL=0)"""
+    if os.getenv('INSTRUMENTACAO_SQL', '1') == '0':
+        return
+    _configurar_logger()
+    if not event.contains(Engine, 'before_cursor_execute', _antes_da_consulta):
+        event.listen(Engine, 'before_cursor_execute', _antes_da_consulta)
+        event.listen(Engine, 'after_cursor_execute', _depois_da_consulta)
+        # Consulta que falhou não passa pelo after_cursor_execute
+        event.listen(Engine, 'handle_error', _descartar_inicio)
+    app.before_request(_iniciar_requisicao)
+    app.after_request(_finalizar_requisicao)
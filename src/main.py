@@ -8,6 +8,8 @@ from flask import Flask, send_from_directory, redirect, url_for
 from flask_cors import CORS
 from flask_login import LoginManager, login_required, current_user
 from src.models import db
+from src import ajustes_sqlite  # WAL, busy_timeout etc. em toda conexão SQLite
+from src import banco
 from src.routes.empresa import empresa_bp
 from src.routes.user import user_bp
 from src.routes.seed import seed_bp
@@ -15,6 +17,8 @@ from src.routes.auth import auth_bp
 from src.routes.cotacao import cotacao_bp
 from src.routes.cotacao_v133 import cotacao_v133_bp
 from src.routes.dashboard_v133 import dashboard_v133_bp
+from src.routes.jobs import jobs_bp
+from src.routes.metricas import metricas_bp
 
 from flask_migrate import Migrate
 
@@ -22,16 +26,28 @@ app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'sta
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
 # Configurar banco de dados ANTES de inicializar Migrate
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# DATABASE_URL aponta outro banco (PostgreSQL, benchmark); padrão é src/database/app.db
+app.config['SQLALCHEMY_DATABASE_URI'] = banco.url_banco(
+    f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = banco.opcoes_engine(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
-# Agora inicializar Migrate
-migrate = Migrate(app, db)
+# Agora inicializar Migrate (as revisões em src/migrations definem o esquema)
+migrate = Migrate(app, db, directory=banco.DIRETORIO_MIGRACOES)
 
 # Habilitar CORS para todas as rotas
 CORS(app)
 
+# Consultas SQL e tempo de banco por requisição (Server-Timing + log)
+from src import instrumentacao
+instrumentacao.init_app(app)
+
+# Latência por endpoint para o /metrics (Prometheus)
+from src import metricas
+metricas.init_app(app)
+
 # Configurar Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -59,13 +75,33 @@ app.register_blueprint(seed_bp, url_prefix='/api')
 app.register_blueprint(cotacao_bp, url_prefix='/api')
 app.register_blueprint(cotacao_v133_bp, url_prefix='/api/v133')
 app.register_blueprint(dashboard_v133_bp, url_prefix='/api/v133')
+app.register_blueprint(jobs_bp, url_prefix='/api')
+app.register_blueprint(metricas_bp)
 
 # Criar diretório do banco se não existir
 os.makedirs(os.path.join(os.path.dirname(__file__), 'database'), exist_ok=True)
 
 with app.app_context():
-    db.create_all()
-    
+    # Aplicar as migrações pendentes
+    banco.preparar_banco(db)
+
+    # Criar/atualizar o índice de busca textual das empresas
+    from src.models.busca import IndiceBuscaEmpresa
+    IndiceBuscaEmpresa.garantir_indice()
+
+    # Criar/atualizar o rollup do analytics de empresas
+    from src.models.analytics import RollupAnalytics
+    RollupAnalytics.garantir_rollup()
+
+    # Criar/atualizar o rollup diário das cotações (relatório geral)
+    from src.models.relatorio_cotacoes import RollupCotacoes
+    RollupCotacoes.garantir_rollup()
+
+    # Template Excel gerado já na inicialização (herdado pelos workers com preload_app)
+    if os.getenv('TEMPLATE_EXCEL_PRELOAD') == '1':
+        from src.models.planilha import obter_template_excel
+        obter_template_excel()
+
     # Criar usuário administrador padrão se não existir
     from src.models.usuario import Usuario, TipoUsuario
     admin_user = Usuario.query.filter_by(username='admin').first()
@@ -104,5 +140,11 @@ def serve(path):
 
 
 if __name__ == '__main__':
+    # Em desenvolvimento a fila de jobs roda numa thread do próprio servidor
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        import threading
+        from src.models.jobs import FilaJobs
+        threading.Thread(target=FilaJobs.processar_continuamente, args=(app,), name='worker-jobs', daemon=True).start()
+        ajustes_sqlite.iniciar_manutencao(app)
     app.run(host='0.0.0.0', port=5001, debug=True)
 
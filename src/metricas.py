@@ -0,0 +1,95 @@
+"""
+Métricas no formato Prometheus (servidas em /metrics)
+
+Com o gunicorn cada worker é um processo: gunicorn.conf.py define
+PROMETHEUS_MULTIPROC_DIR antes de carregar o app, os valores de cada processo
+(workers e worker_jobs.py) ficam em arquivos mmap nesse diretório e o /metrics
+de qualquer worker soma todos. Sem a variável (servidor de desenvolvimento) as
+métricas ficam na memória do próprio processo.
+"""
+
+import os
+import time
+from flask import g, request
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from src.instrumentacao import ao_fechar
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BUCKETS_CONTAGEM = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+REQUISICAO_SEGUNDOS = Histogram(
+    'brccsis_requisicao_segundos', 'Latência das requisições por endpoint',
+    ['blueprint', 'endpoint', 'metodo'], buckets=BUCKETS_LATENCIA
+)
+REQUISICOES = Counter(
+    'brccsis_requisicoes', 'Requisições por endpoint e status',
+    ['blueprint', 'endpoint', 'metodo', 'status']
+)
+REQUISICAO_DB_SEGUNDOS = Histogram(
+    'brccsis_requisicao_db_segundos', 'Tempo gasto no banco por requisição',
+    ['blueprint', 'endpoint'], buckets=BUCKETS_LATENCIA
+)
+REQUISICAO_CONSULTAS = Histogram(
+    'brccsis_requisicao_consultas_sql', 'Consultas SQL por requisição',
+    ['blueprint', 'endpoint'], buckets=BUCKETS_CONTAGEM
+)
+NOTIFICACOES_FANOUT = Histogram(
+    'brccsis_notificacoes_destinatarios', 'Destinatários por notificação em lote',
+    ['tipo'], buckets=BUCKETS_CONTAGEM
+)
+JOBS_LINHAS = Counter(
+    'brccsis_jobs_linhas', 'Linhas de arquivo processadas pelos jobs', ['tipo']
+)
+JOBS_EMPRESAS = Counter(
+    'brccsis_jobs_empresas', 'Empresas gravadas pelos jobs', ['tipo']
+)
+JOBS_FINALIZADOS = Counter(
+    'brccsis_jobs_finalizados', 'Jobs finalizados por status', ['tipo', 'status']
+)
+JOBS_DURACAO_SEGUNDOS = Histogram(
+    'brccsis_jobs_duracao_segundos', 'Duração dos jobs (execução atual)',
+    ['tipo'], buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+
+
+def gerar_metricas():
+    """Texto no formato de exposição do Prometheus (somando os processos, se houver)"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return generate_latest(registro)
+    return generate_latest(REGISTRY)
+
+
+def _iniciar_requisicao():
+    g.inicio_metricas = time.perf_counter()
+
+
+def _finalizar_requisicao(resposta):
+    inicio = g.pop('inicio_metricas', None)
+    # Sem regra (404) o endpoint não entra como rótulo: evita uma série por URL
+    if inicio is None or request.endpoint is None or request.endpoint == 'metricas.metricas':
+        return resposta
+
+    blueprint, endpoint, metodo = request.blueprint or '', request.endpoint, request.method
+    status = str(resposta.status_code)
+    # Preenchido por src/instrumentacao.py (e atualizado enquanto um corpo em streaming é gerado)
+    sql = g.get('sql')
+
+    def _observar():
+        REQUISICAO_SEGUNDOS.labels(blueprint, endpoint, metodo).observe(time.perf_counter() - inicio)
+        REQUISICOES.labels(blueprint, endpoint, metodo, status).inc()
+        if sql is not None:
+            REQUISICAO_DB_SEGUNDOS.labels(blueprint, endpoint).observe(sql['tempo_ms'] / 1000)
+            REQUISICAO_CONSULTAS.labels(blueprint, endpoint).observe(sql['total'])
+
+    ao_fechar(resposta, _observar)
+    return resposta
+
+
+def init_app(app):
+    """Latência, status e SQL por endpoint de todas as requisições"""
+    app.before_request(_iniciar_requisicao)
+    app.after_request(_finalizar_requisicao)
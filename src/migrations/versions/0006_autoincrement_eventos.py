@@ -0,0 +1,35 @@
+"""ids dos eventos em tempo real sem reaproveitamento no SQLite
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 10:12:41.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sem AUTOINCREMENT o SQLite volta a numerar do 1 quando a limpeza esvazia a
+    # tabela, e a thread de leitura (que guarda o último id) ignora os eventos novos.
+    # No PostgreSQL a sequência já não reaproveita ids.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('eventos_tempo_real', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}):
+        pass
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('eventos_tempo_real', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}):
+        pass
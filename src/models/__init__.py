@@ -5,6 +5,13 @@ db = SQLAlchemy()
 # Importar todos os modelos para garantir que sejam registrados
 from .usuario import Usuario
 from .empresa import Empresa
-from .cotacao import Cotacao, StatusCotacao, EmpresaCotacao, HistoricoCotacao
+from .cotacao import Cotacao, StatusCotacao, EmpresaCotacao, HistoricoCotacao, SequenciaCotacao
 from .notificacao import Notificacao, TipoNotificacao
+from .eventos import EventoTempoReal, BarramentoEventos
+from .jobs import Job, StatusJob, FilaJobs
 
+from .analytics import RollupAnalytics, ContribuicaoAnalytics
+from .busca import IndiceBuscaEmpresa, VersaoIndice
+from .facetas import IndiceFacetasEmpresa
+from .cache import CacheCompartilhado
+from .relatorio_cotacoes import RollupCotacoes, RelatorioCotacoes, PainelTempoReal
@@ -0,0 +1,213 @@
+"""
+Rollup do analytics de empresas (/api/analytics)
+
+Cada empresa tem a sua contribuição guardada em analytics_contribuicoes
+(ex.: {"regiao:Sul": 1, "tipo_carga:Granel": 2}) e os totais ficam em
+analytics_rollup. Nas escritas, só as empresas alteradas são recalculadas e a
+diferença é aplicada aos totais, então o endpoint lê uma tabela pequena.
+Os hooks da sessão no fim do módulo fazem isso no commit de cada escrita.
+"""
+
+import json
+from collections import Counter
+from sqlalchemy import event, text
+from . import db
+
+# Dimensões guardadas no rollup (prefixo da chave)
+DIMENSAO_REGIAO = 'regiao'
+DIMENSAO_MES = 'mes'
+DIMENSAO_TIPO_CARGA = 'tipo_carga'
+DIMENSAO_CERTIFICACAO = 'certificacao'
+DIMENSAO_METRICA = 'metrica'
+
+TAMANHO_LOTE = 500
+
+# Tabelas relacionadas lidas no cálculo da contribuição de uma empresa
+TABELAS_CONTRIBUICAO = {'tipos_carga', 'certificacoes', 'armazenagem', 'abrangencia_geografica'}
+
+REGIOES_KEYWORDS = {
+    'Sudeste': ['SP', 'SÃO PAULO', 'RJ', 'RIO DE JANEIRO', 'MG', 'MINAS GERAIS', 'BELO HORIZONTE', 'ES', 'ESPÍRITO SANTO', 'VITÓRIA'],
+    'Sul': ['RS', 'RIO GRANDE DO SUL', 'PORTO ALEGRE', 'SC', 'SANTA CATARINA', 'FLORIANÓPOLIS', 'PR', 'PARANÁ', 'CURITIBA'],
+    'Nordeste': ['BA', 'BAHIA', 'SALVADOR', 'PE', 'PERNAMBUCO', 'RECIFE', 'CE', 'CEARÁ', 'FORTALEZA', 'PB', 'PARAÍBA', 'JOÃO PESSOA', 'RN', 'RIO GRANDE DO NORTE', 'NATAL', 'AL', 'ALAGOAS', 'MACEIÓ', 'SE', 'SERGIPE', 'ARACAJU', 'MA', 'MARANHÃO', 'SÃO LUÍS', 'PI', 'PIAUÍ', 'TERESINA'],
+    'Centro-Oeste': ['MT', 'MATO GROSSO', 'CUIABÁ', 'MS', 'MATO GROSSO DO SUL', 'CAMPO GRANDE', 'GO', 'GOIÁS', 'GOIÂNIA', 'DF', 'DISTRITO FEDERAL', 'BRASÍLIA'],
+    'Norte': ['AM', 'AMAZONAS', 'MANAUS', 'PA', 'PARÁ', 'BELÉM', 'AC', 'ACRE', 'RIO BRANCO', 'RR', 'RORAIMA', 'BOA VISTA', 'RO', 'RONDÔNIA', 'PORTO VELHO', 'AP', 'AMAPÁ', 'MACAPÁ', 'TO', 'TOCANTINS', 'PALMAS']
+}
+
+
+def extrair_regiao_do_endereco(endereco):
+    """Extrai a região do endereço completo baseado em palavras-chave"""
+    if not endereco or endereco == 'Não informado' or endereco.strip() == '':
+        return 'Não Informado'
+
+    endereco_upper = endereco.upper()
+
+    for regiao, keywords in REGIOES_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in endereco_upper:
+                return regiao
+
+    return 'Não Informado'
+
+
+class ContribuicaoAnalytics(db.Model):
+    """Contribuição de uma empresa para os totais do rollup"""
+    __tablename__ = 'analytics_contribuicoes'
+
+    empresa_id = db.Column(db.Integer, primary_key=True)
+    contribuicao = db.Column(db.Text, nullable=False)
+
+
+class RollupAnalytics(db.Model):
+    """Totais pré-agregados por dimensão (chave 'dimensao:valor')"""
+    __tablename__ = 'analytics_rollup'
+
+    chave = db.Column(db.String(300), primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def garantir_rollup():
+        """Reconstrói o rollup quando ele não cobre todas as empresas (ex.: primeira execução)"""
+        with db.engine.begin() as conexao:
+            total_contribuicoes = conexao.execute(text("SELECT count(*) FROM analytics_contribuicoes")).scalar()
+            total_empresas = conexao.execute(text("SELECT count(*) FROM empresas")).scalar()
+            if total_contribuicoes != total_empresas:
+                RollupAnalytics.reconstruir(conexao)
+
+    @staticmethod
+    def reconstruir(conexao):
+        """Recalcula o rollup inteiro"""
+        conexao.execute(text("DELETE FROM analytics_contribuicoes"))
+        conexao.execute(text("DELETE FROM analytics_rollup"))
+        ids = conexao.execute(text("SELECT id FROM empresas")).scalars().all()
+        RollupAnalytics.atualizar(conexao, ids)
+
+    @staticmethod
+    def atualizar(conexao, empresa_ids):
+        """Recalcula a contribuição das empresas informadas e aplica a diferença nos totais"""
+        ids = sorted({int(i) for i in empresa_ids if i is not None})
+        for inicio in range(0, len(ids), TAMANHO_LOTE):
+            RollupAnalytics._atualizar_lote(conexao, ids[inicio:inicio + TAMANHO_LOTE])
+
+    @staticmethod
+    def _atualizar_lote(conexao, ids):
+        parametros = {f"id{n}": empresa_id for n, empresa_id in enumerate(ids)}
+        marcadores = ', '.join(f":{nome}" for nome in parametros)
+
+        antigas = {
+            empresa_id: Counter(json.loads(contribuicao))
+            for empresa_id, contribuicao in conexao.execute(text(
+                f"SELECT empresa_id, contribuicao FROM analytics_contribuicoes WHERE empresa_id IN ({marcadores})"
+            ), parametros)
+        }
+        novas = RollupAnalytics._calcular_contribuicoes(conexao, marcadores, parametros)
+
+        diferenca = Counter()
+        for empresa_id in ids:
+            diferenca.update(novas.get(empresa_id, Counter()))
+            diferenca.subtract(antigas.get(empresa_id, Counter()))
+
+        conexao.execute(text(
+            f"DELETE FROM analytics_contribuicoes WHERE empresa_id IN ({marcadores})"
+        ), parametros)
+        if novas:
+            conexao.execute(text(
+                "INSERT INTO analytics_contribuicoes (empresa_id, contribuicao) VALUES (:empresa_id, :contribuicao)"
+            ), [
+                {'empresa_id': empresa_id, 'contribuicao': json.dumps(contribuicao, ensure_ascii=False)}
+                for empresa_id, contribuicao in novas.items()
+            ])
+
+        alteracoes = [{'chave': chave, 'delta': delta} for chave, delta in diferenca.items() if delta]
+        if alteracoes:
+            # Upsert: chave nova ou somada, sem ler a tabela e sem corrida entre transações
+            conexao.execute(text(
+                "INSERT INTO analytics_rollup (chave, quantidade) VALUES (:chave, :delta) "
+                "ON CONFLICT (chave) DO UPDATE SET quantidade = analytics_rollup.quantidade + excluded.quantidade"
+            ), alteracoes)
+            conexao.execute(text("DELETE FROM analytics_rollup WHERE quantidade <= 0"))
+
+    @staticmethod
+    def _calcular_contribuicoes(conexao, marcadores, parametros):
+        """Contribuições atuais (uma consulta por tabela para o lote inteiro)"""
+        contribuicoes = {}
+        for empresa_id, endereco, created_at in conexao.execute(text(
+            f"SELECT id, endereco_completo, created_at FROM empresas WHERE id IN ({marcadores})"
+        ), parametros):
+            contribuicao = Counter()
+            contribuicao[f"{DIMENSAO_REGIAO}:{extrair_regiao_do_endereco(endereco or 'Não informado')}"] += 1
+            contribuicao[f"{DIMENSAO_METRICA}:total"] += 1
+            if created_at:
+                contribuicao[f"{DIMENSAO_MES}:{str(created_at)[:7]}"] += 1
+            contribuicoes[empresa_id] = contribuicao
+
+        consultas = [
+            (DIMENSAO_TIPO_CARGA,
+             f"SELECT empresa_id, coalesce(tipo_carga, 'Não informado'), count(*) FROM tipos_carga "
+             f"WHERE empresa_id IN ({marcadores}) GROUP BY empresa_id, tipo_carga"),
+            (DIMENSAO_CERTIFICACAO,
+             f"SELECT empresa_id, coalesce(nome_certificacao, 'Não informado'), count(*) FROM certificacoes "
+             f"WHERE empresa_id IN ({marcadores}) GROUP BY empresa_id, nome_certificacao"),
+        ]
+        for dimensao, sql in consultas:
+            for empresa_id, valor, quantidade in conexao.execute(text(sql), parametros):
+                if empresa_id in contribuicoes:
+                    contribuicoes[empresa_id][f"{dimensao}:{valor}"] += quantidade
+                    if dimensao == DIMENSAO_CERTIFICACAO:
+                        contribuicoes[empresa_id][f"{DIMENSAO_METRICA}:certificadas"] = 1
+
+        metricas = [
+            ('com_armazem',
+             f"SELECT DISTINCT empresa_id FROM armazenagem WHERE possui_armazem AND empresa_id IN ({marcadores})"),
+            ('abrangencia_nacional',
+             f"SELECT DISTINCT empresa_id FROM abrangencia_geografica "
+             f"WHERE lower(tipo_abrangencia) LIKE '%nacional%' AND empresa_id IN ({marcadores})"),
+        ]
+        for metrica, sql in metricas:
+            for empresa_id in conexao.execute(text(sql), parametros).scalars():
+                if empresa_id in contribuicoes:
+                    contribuicoes[empresa_id][f"{DIMENSAO_METRICA}:{metrica}"] = 1
+
+        return contribuicoes
+
+    @staticmethod
+    def marcar_para_atualizar(session, empresa_ids):
+        """Agenda o recálculo de empresas alteradas fora do ORM (ex.: inserções em lote)"""
+        session.info.setdefault('analytics_empresas_pendentes', set()).update(empresa_ids)
+
+    @staticmethod
+    def obter():
+        """Retorna os totais agrupados por dimensão: {'regiao': {'Sul': 3}, ...}"""
+        dimensoes = {}
+        for chave, quantidade in db.session.execute(text("SELECT chave, quantidade FROM analytics_rollup")):
+            dimensao, _, valor = chave.partition(':')
+            dimensoes.setdefault(dimensao, {})[valor] = quantidade
+        return dimensoes
+
+
+# ==================== MANUTENÇÃO AUTOMÁTICA ====================
+
+@event.listens_for(db.session, 'after_flush')
+def _coletar_empresas_alteradas(session, flush_context):
+    """Registra as empresas tocadas no flush para recálculo no commit"""
+    pendentes = session.info.setdefault('analytics_empresas_pendentes', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tabela = getattr(obj, '__tablename__', None)
+        if tabela == 'empresas':
+            pendentes.add(obj.id)
+        elif tabela in TABELAS_CONTRIBUICAO:
+            pendentes.add(obj.empresa_id)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _aplicar_rollup(session):
+    """Aplica as empresas pendentes no rollup dentro da mesma transação do commit"""
+    # O before_commit roda antes do flush do próprio commit
+    session.flush()
+    pendentes = session.info.pop('analytics_empresas_pendentes', set())
+    if pendentes:
+        RollupAnalytics.atualizar(session.connection(), pendentes)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_pendentes(session):
+    session.info.pop('analytics_empresas_pendentes', None)
@@ -0,0 +1,151 @@
+"""
+Gravação assíncrona do log de auditoria
+
+LogAuditoria.registrar_acao coloca o registro numa fila em memória e uma
+thread de cada processo grava a fila em lotes (um INSERT por lote, numa
+conexão própria), tirando o commit extra do caminho da requisição.
+A fila é limitada: cheia, o registro é gravado na hora. No encerramento
+(worker_exit do gunicorn / atexit) o que restar na fila é gravado.
+Um lote que falha é repetido com espera crescente (banco reiniciando,
+"database is locked"); se continuar falhando, é gravado registro a registro
+e só os registros recusados são perdidos, com aviso no logger
+brccsis.auditoria.
+AUDITORIA_SINCRONA=1 grava cada registro na hora (testes e scripts).
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from flask import current_app
+from sqlalchemy import insert
+from . import db
+
+# Registros aguardando gravação por processo
+TAMANHO_FILA_AUDITORIA = int(os.getenv('AUDITORIA_FILA', '10000'))
+
+# Registros por INSERT
+TAMANHO_LOTE_AUDITORIA = 500
+
+# Espera máxima da thread antes de gravar um lote incompleto (segundos)
+INTERVALO_AUDITORIA = float(os.getenv('AUDITORIA_INTERVALO', '1.0'))
+
+# Tentativas do INSERT em lote e espera antes da primeira repetição (dobra a cada uma)
+TENTATIVAS_AUDITORIA = 3
+ESPERA_AUDITORIA = 0.2
+
+logger = logging.getLogger('brccsis.auditoria')
+
+
+class GravadorAuditoria:
+    """Fila limitada de registros de auditoria gravados em lote por uma thread"""
+
+    def __init__(self, tamanho_fila=TAMANHO_FILA_AUDITORIA, intervalo=INTERVALO_AUDITORIA):
+        self.tamanho_fila = tamanho_fila
+        self.intervalo = intervalo
+        self.app = None
+        self._fila = None
+        self._thread = None
+        self._pid = None
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        atexit.register(self.descarregar)
+
+    def sincrono(self):
+        if os.getenv('AUDITORIA_SINCRONA') == '1':
+            return True
+        return bool(current_app.config.get('AUDITORIA_SINCRONA') or current_app.testing)
+
+    def registrar(self, registro):
+        """Enfileira um registro (dict de colunas de logs_auditoria)"""
+        if self.sincrono():
+            self._gravar([registro])
+            return
+        self._iniciar()
+        try:
+            self._fila.put_nowait(registro)
+        except queue.Full:
+            # Sem descartar auditoria: com a fila cheia quem registra paga a gravação
+            self._gravar([registro])
+
+    def _iniciar(self):
+        """Cria a fila e a thread deste processo (os workers do gunicorn nascem por fork)"""
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._fila = queue.Queue(maxsize=self.tamanho_fila)
+            self.app = current_app._get_current_object()
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='gravador-auditoria', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _proximo_lote(self, espera):
+        try:
+            lote = [self._fila.get(timeout=espera)] if espera else [self._fila.get_nowait()]
+        except queue.Empty:
+            return []
+        while len(lote) < TAMANHO_LOTE_AUDITORIA:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _executar(self):
+        while not self._parar.is_set():
+            lote = self._proximo_lote(self.intervalo)
+            if lote:
+                with self.app.app_context():
+                    self._gravar(lote)
+
+    def _gravar(self, registros):
+        """Grava o lote com repetição; esgotadas as tentativas, registro a registro"""
+        for tentativa in range(TENTATIVAS_AUDITORIA):
+            try:
+                self._inserir(registros)
+                return
+            except Exception as e:
+                logger.warning(
+                    "Falha ao gravar %d registro(s) de auditoria (tentativa %d de %d): %s",
+                    len(registros), tentativa + 1, TENTATIVAS_AUDITORIA, e
+                )
+                if tentativa + 1 < TENTATIVAS_AUDITORIA:
+                    time.sleep(ESPERA_AUDITORIA * 2 ** tentativa)
+
+        if len(registros) == 1:
+            logger.error("Registro de auditoria descartado: %r", registros[0])
+            return
+        # Um registro inválido não leva o lote inteiro junto
+        for registro in registros:
+            try:
+                self._inserir([registro])
+            except Exception as e:
+                logger.error("Registro de auditoria descartado (%s): %r", e, registro)
+
+    def _inserir(self, registros):
+        from .usuario import LogAuditoria
+        with db.engine.begin() as conexao:
+            conexao.execute(insert(LogAuditoria), registros)
+
+    def descarregar(self, timeout=10):
+        """Para a thread e grava imediatamente o que ainda estiver na fila"""
+        if self._pid != os.getpid() or self.app is None:
+            return
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self.app.app_context():
+            while True:
+                lote = self._proximo_lote(None)
+                if not lote:
+                    break
+                self._gravar(lote)
+
+
+gravador_auditoria = GravadorAuditoria()
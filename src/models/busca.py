@@ -0,0 +1,261 @@
+"""
+Índice de busca textual das empresas (SQLite FTS5)
+Mantém uma linha por empresa com os textos da empresa e de todas as tabelas relacionadas
+"""
+
+from sqlalchemy import event, select, text, literal_column
+from . import db
+
+TABELA_BUSCA = 'empresas_busca'
+
+# Separador entre valores de uma mesma coluna (evita casar termos "entre" dois registros)
+SEPARADOR = 'char(31)'
+
+
+def _concat(tabela, *colunas):
+    """Subconsulta que concatena os valores de uma tabela relacionada da empresa"""
+    if len(colunas) == 1:
+        valor = colunas[0]
+    else:
+        valor = f" || {SEPARADOR} || ".join(f"coalesce({c}, '')" for c in colunas)
+    return f"(SELECT group_concat({valor}, {SEPARADOR}) FROM {tabela} WHERE empresa_id = e.id)"
+
+
+# Coluna do índice -> expressão SQL que a alimenta
+COLUNAS_INDICE = {
+    'razao_social': 'e.razao_social',
+    'nome_fantasia': 'e.nome_fantasia',
+    'cnpj': f"e.cnpj || {SEPARADOR} || replace(replace(replace(e.cnpj, '.', ''), '/', ''), '-', '')",
+    'tipos_carga': _concat('tipos_carga', 'tipo_carga'),
+    'modalidades': _concat('modalidades_transporte', 'modalidade'),
+    'certificacoes': _concat('certificacoes', 'nome_certificacao'),
+    'abrangencia': _concat('abrangencia_geografica', 'tipo_abrangencia', 'detalhes'),
+    'portos': _concat('portos_terminais', 'nome_porto_terminal'),
+    'regulamentacoes': _concat('regulamentacoes', 'tipo_regulamentacao'),
+    'tipos_frota': _concat('frota', 'tipo_frota'),
+    'tipos_veiculo': _concat('frota', 'tipo_veiculo'),
+    'tecnologias': _concat('tecnologias', 'nome_tecnologia'),
+    'segmentos': _concat('clientes_segmentos', 'segmento'),
+    'sustentabilidade': _concat('sustentabilidade', 'certificacao_ambiental'),
+    'complemento': " || {sep} || ".format(sep=SEPARADOR).join([
+        "coalesce(e.endereco_completo, '')",
+        "coalesce(e.observacoes, '')",
+        "coalesce(" + _concat('regulamentacoes', 'numero_registro', 'orgao_emissor') + ", '')",
+        "coalesce(" + _concat('certificacoes', 'numero_certificacao', 'orgao_certificador') + ", '')",
+        "coalesce(" + _concat('frota', 'tipo_carroceria') + ", '')",
+        "coalesce(" + _concat('armazenagem', 'localizacao', 'tipos_armazenagem', 'servicos_oferecidos') + ", '')",
+        "coalesce(" + _concat('portos_terminais', 'tipo_terminal') + ", '')",
+        "coalesce(" + _concat('seguros_coberturas', 'tipo_seguro', 'numero_apolice', 'seguradora') + ", '')",
+        "coalesce(" + _concat('tecnologias', 'detalhes') + ", '')",
+        "coalesce(" + _concat('clientes_segmentos', 'principais_clientes') + ", '')",
+        "coalesce(" + _concat('recursos_humanos', 'programas_treinamento') + ", '')",
+        "coalesce(" + _concat('sustentabilidade', 'programas_reducao_emissoes') + ", '')",
+    ]),
+}
+
+# Tabelas cujas alterações exigem reindexar a empresa
+TABELAS_RELACIONADAS = {
+    'regulamentacoes', 'certificacoes', 'modalidades_transporte', 'tipos_carga',
+    'abrangencia_geografica', 'frota', 'armazenagem', 'portos_terminais',
+    'seguros_coberturas', 'tecnologias', 'desempenho_qualidade', 'clientes_segmentos',
+    'recursos_humanos', 'sustentabilidade'
+}
+
+# Tamanho mínimo de termo atendido pelo tokenizer trigram
+TAMANHO_MINIMO_TERMO = 3
+
+
+def _coluna_like(coluna, valor):
+    """
+    Valores menores que um trigram não podem ir para o índice: o FTS5 do
+    SQLite 3.40 derruba o processo ao combinar esse LIKE com outra condição.
+    O + faz o próprio SQLite filtrar a coluna linha a linha.
+    """
+    return f"+{coluna}" if len(str(valor)) < TAMANHO_MINIMO_TERMO else coluna
+
+
+class VersaoIndice(db.Model):
+    """Contador de versão dos dados de empresas, usado para invalidar caches entre processos"""
+    __tablename__ = 'versoes_indice'
+
+    nome = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def incrementar(conexao, nome='empresas'):
+        """Incrementa a versão dentro da transação corrente (a linha é criada na primeira vez)"""
+        conexao.execute(text(
+            "INSERT INTO versoes_indice (nome, versao) VALUES (:nome, 1) "
+            "ON CONFLICT (nome) DO UPDATE SET versao = versoes_indice.versao + 1"
+        ), {'nome': nome})
+
+    @staticmethod
+    def obter(nome='empresas'):
+        """Retorna a versão atual (0 se nunca houve alteração)"""
+        return db.session.execute(
+            text("SELECT versao FROM versoes_indice WHERE nome = :nome"), {'nome': nome}
+        ).scalar() or 0
+
+
+class IndiceBuscaEmpresa:
+    """Operações sobre a tabela virtual FTS5 de busca de empresas"""
+
+    # URLs dos engines em que o índice foi criado e está sendo mantido
+    _ativos = set()
+
+    @staticmethod
+    def _chave(bind):
+        return str(bind.engine.url)
+
+    @staticmethod
+    def disponivel(bind=None):
+        """Indica se o índice está ativo para o banco atual"""
+        bind = bind or db.session.get_bind()
+        return IndiceBuscaEmpresa._chave(bind) in IndiceBuscaEmpresa._ativos
+
+    @staticmethod
+    def garantir_indice():
+        """Cria o índice (se suportado) e o reconstrói quando estiver desatualizado"""
+        engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            return False
+
+        colunas = ', '.join(COLUNAS_INDICE.keys())
+        try:
+            with engine.begin() as conexao:
+                conexao.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_BUSCA} "
+                    f"USING fts5({colunas}, tokenize='trigram')"
+                ))
+                total_indice = conexao.execute(text(f"SELECT count(*) FROM {TABELA_BUSCA}")).scalar()
+                total_empresas = conexao.execute(text("SELECT count(*) FROM empresas")).scalar()
+                if total_indice != total_empresas:
+                    IndiceBuscaEmpresa.reconstruir(conexao)
+        except Exception as e:
+            # SQLite sem FTS5/trigram: as rotas continuam usando os filtros ILIKE
+            print(f"Índice de busca indisponível: {str(e)}")
+            return False
+
+        IndiceBuscaEmpresa._ativos.add(IndiceBuscaEmpresa._chave(engine))
+        return True
+
+    @staticmethod
+    def reconstruir(conexao):
+        """Reconstrói o índice inteiro a partir das tabelas de empresas"""
+        conexao.execute(text(f"DELETE FROM {TABELA_BUSCA}"))
+        conexao.execute(text(IndiceBuscaEmpresa._sql_insercao("")))
+
+    @staticmethod
+    def reindexar(conexao, empresa_ids):
+        """Atualiza as linhas do índice das empresas informadas"""
+        ids = sorted({int(i) for i in empresa_ids if i is not None})
+        if not ids:
+            return
+        # Lotes para respeitar o limite de parâmetros do SQLite
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            parametros = {f"id{n}": empresa_id for n, empresa_id in enumerate(lote)}
+            marcadores = ', '.join(f":{nome}" for nome in parametros)
+            conexao.execute(text(f"DELETE FROM {TABELA_BUSCA} WHERE rowid IN ({marcadores})"), parametros)
+            conexao.execute(text(IndiceBuscaEmpresa._sql_insercao(f"WHERE e.id IN ({marcadores})")), parametros)
+
+    @staticmethod
+    def _sql_insercao(where):
+        colunas = ', '.join(COLUNAS_INDICE.keys())
+        expressoes = ', '.join(COLUNAS_INDICE.values())
+        return f"INSERT INTO {TABELA_BUSCA}(rowid, {colunas}) SELECT e.id, {expressoes} FROM empresas e {where}"
+
+    @staticmethod
+    def marcar_para_reindexar(session, empresa_ids):
+        """Agenda a reindexação de empresas alteradas fora do ORM (ex.: inserções em lote)"""
+        session.info.setdefault('busca_empresas_pendentes', set()).update(empresa_ids)
+
+    @staticmethod
+    def filtrar(query, modelo, filtros=None, termo=None):
+        """
+        Restringe a query às empresas que casam com os filtros por coluna
+        (substring, sem diferenciar maiúsculas) e com o termo livre em qualquer coluna
+        """
+        subconsulta = IndiceBuscaEmpresa.subconsulta(filtros, termo)
+        if subconsulta is None:
+            return query
+        return query.filter(modelo.id.in_(subconsulta))
+
+    @staticmethod
+    def buscar_ids(filtros=None, termo=None):
+        """Retorna o conjunto de ids que casam com a busca, ou None se não houver filtros"""
+        subconsulta = IndiceBuscaEmpresa.subconsulta(filtros, termo)
+        if subconsulta is None:
+            return None
+        return set(db.session.execute(subconsulta).scalars())
+
+    @staticmethod
+    def subconsulta(filtros=None, termo=None):
+        """Monta o SELECT de rowids do índice para os filtros informados"""
+        condicoes = []
+        parametros = {}
+        for n, (coluna, valor) in enumerate((filtros or {}).items()):
+            if not valor:
+                continue
+            if coluna not in COLUNAS_INDICE:
+                raise ValueError(f"Coluna de busca inválida: {coluna}")
+            valores = valor if isinstance(valor, (list, tuple)) else [valor]
+            alternativas = []
+            for m, v in enumerate(valores):
+                nome = f"busca_{n}_{m}"
+                parametros[nome] = f"%{v}%"
+                alternativas.append(f"{_coluna_like(coluna, v)} LIKE :{nome}")
+            condicoes.append('(' + ' OR '.join(alternativas) + ')')
+
+        if termo:
+            termo = termo.strip()
+            if len(termo) >= TAMANHO_MINIMO_TERMO:
+                parametros['busca_termo'] = '"' + termo.replace('"', '""') + '"'
+                condicoes.append(f"{TABELA_BUSCA} MATCH :busca_termo")
+            else:
+                # Termos curtos não usam o trigram; restringe às colunas principais
+                parametros['busca_termo'] = f"%{termo}%"
+                condicoes.append(
+                    "(+razao_social LIKE :busca_termo OR +nome_fantasia LIKE :busca_termo OR +cnpj LIKE :busca_termo)"
+                )
+
+        if not condicoes:
+            return None
+
+        return select(literal_column('rowid')).select_from(
+            text(TABELA_BUSCA)
+        ).where(text(' AND '.join(condicoes)).bindparams(**parametros))
+
+
+# ==================== MANUTENÇÃO AUTOMÁTICA ====================
+
+@event.listens_for(db.session, 'after_flush')
+def _coletar_empresas_alteradas(session, flush_context):
+    """Registra as empresas tocadas no flush para reindexação no commit"""
+    pendentes = session.info.setdefault('busca_empresas_pendentes', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tabela = getattr(obj, '__tablename__', None)
+        if tabela == 'empresas':
+            pendentes.add(obj.id)
+        elif tabela in TABELAS_RELACIONADAS:
+            pendentes.add(obj.empresa_id)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _aplicar_reindexacao(session):
+    """Reindexa as empresas pendentes dentro da mesma transação do commit"""
+    # O before_commit roda antes do flush do próprio commit: sem isso as
+    # alterações ainda não enviadas ao banco ficariam fora do índice
+    session.flush()
+    pendentes = session.info.pop('busca_empresas_pendentes', set())
+    if not pendentes:
+        return
+    conexao = session.connection()
+    if IndiceBuscaEmpresa.disponivel(conexao):
+        IndiceBuscaEmpresa.reindexar(conexao, pendentes)
+    VersaoIndice.incrementar(conexao)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_pendentes(session):
+    session.info.pop('busca_empresas_pendentes', None)
@@ -0,0 +1,99 @@
+"""
+Cache de resultados compartilhado entre os processos (workers do gunicorn)
+
+Cada valor fica em memória no processo e na tabela cache_compartilhado, com a
+versão dos dados (VersaoIndice) e o instante de expiração. Um processo que não
+tem o valor válido em memória usa o da tabela, se ainda valer, e só então
+recalcula; assim N painéis abertos custam um cálculo por intervalo, e uma
+mudança de versão invalida o valor em todos os processos na hora.
+"""
+
+import json
+import threading
+import time
+from sqlalchemy import select
+from . import db
+from .busca import VersaoIndice
+
+
+class CacheCompartilhado(db.Model):
+    """Valor (JSON) calculado para a chave, válido para a versão até expira_em (epoch)"""
+    __tablename__ = 'cache_compartilhado'
+
+    chave = db.Column(db.String(100), primary_key=True)
+    valor = db.Column(db.Text, nullable=False)
+    versao = db.Column(db.Integer, nullable=False)
+    expira_em = db.Column(db.Float, nullable=False)
+
+    _lock = threading.Lock()
+    _locks_chave = {}
+    _locais = {}  # chave -> (versao, expira_em, valor)
+
+    @staticmethod
+    def obter(chave, calcular, ttl, versao_de=None):
+        """
+        Retorna o valor da chave, chamando calcular() quando não há um válido.
+
+        ttl: segundos de validade
+        versao_de: nome em VersaoIndice cuja mudança invalida o valor (None = só o ttl)
+        """
+        versao = VersaoIndice.obter(versao_de) if versao_de else 0
+        valor = CacheCompartilhado._valido(CacheCompartilhado._locais.get(chave), versao)
+        if valor is not None:
+            return valor
+
+        with CacheCompartilhado._lock:
+            lock_chave = CacheCompartilhado._locks_chave.setdefault(chave, threading.Lock())
+        # Requisições simultâneas no processo esperam o mesmo cálculo
+        with lock_chave:
+            valor = CacheCompartilhado._valido(CacheCompartilhado._locais.get(chave), versao)
+            if valor is not None:
+                return valor
+
+            tabela = CacheCompartilhado.__table__
+            with db.engine.connect() as conexao:
+                linha = conexao.execute(
+                    select(tabela.c.versao, tabela.c.expira_em, tabela.c.valor).where(tabela.c.chave == chave)
+                ).first()
+            if linha is not None:
+                entrada = (linha.versao, linha.expira_em, json.loads(linha.valor))
+                valor = CacheCompartilhado._valido(entrada, versao)
+                if valor is not None:
+                    CacheCompartilhado._locais[chave] = entrada
+                    return valor
+
+            valor = calcular()
+            expira_em = time.time() + ttl
+            CacheCompartilhado._gravar(chave, valor, versao, expira_em)
+            CacheCompartilhado._locais[chave] = (versao, expira_em, valor)
+            return valor
+
+    @staticmethod
+    def _valido(entrada, versao):
+        if entrada is None:
+            return None
+        versao_entrada, expira_em, valor = entrada
+        if versao_entrada != versao or expira_em <= time.time():
+            return None
+        return valor
+
+    @staticmethod
+    def _gravar(chave, valor, versao, expira_em):
+        """Grava o valor na tabela em uma transação própria (a requisição pode ser só leitura)"""
+        tabela = CacheCompartilhado.__table__
+        with db.engine.begin() as conexao:
+            if conexao.dialect.name == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as inserir
+            else:
+                from sqlalchemy.dialects.sqlite import insert as inserir
+            comando = inserir(tabela).values(
+                chave=chave, valor=json.dumps(valor, default=str), versao=versao, expira_em=expira_em
+            )
+            conexao.execute(comando.on_conflict_do_update(
+                index_elements=[tabela.c.chave],
+                set_={
+                    'valor': comando.excluded.valor,
+                    'versao': comando.excluded.versao,
+                    'expira_em': comando.excluded.expira_em
+                }
+            ))
@@ -1,9 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
+import os
+import threading
 import pytz
 from enum import Enum
+from sqlalchemy import update, select
+from sqlalchemy.orm import joinedload
 from . import db
-from .usuario import get_brasilia_time, Usuario
+from .usuario import get_brasilia_time, Usuario, TipoUsuario
 
 class StatusCotacao(Enum):
     SOLICITADA = "solicitada"  # Consultor solicitou
@@ -20,6 +24,10 @@ class EmpresaCotacao(Enum):
 
 class Cotacao(db.Model):
     __tablename__ = 'cotacoes'
+    __table_args__ = (
+        # Chave da paginação por cursor
+        db.Index('ix_cotacoes_data_solicitacao_id', 'data_solicitacao', 'id'),
+    )
     
     # Identificação
     id = db.Column(db.Integer, primary_key=True)
@@ -28,7 +36,7 @@ class Cotacao(db.Model):
     # Relacionamentos
     consultor_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
     operador_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
-    empresa_prestadora_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=True)  # Empresa que forneceu o serviço
+    empresa_prestadora_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=True, index=True)  # Empresa que forneceu o serviço
     
     # Empresa de transporte
     empresa_transporte = db.Column(db.Enum(EmpresaCotacao), nullable=False, default=EmpresaCotacao.BRCARGO_RODOVIARIO)
@@ -110,24 +118,19 @@ class Cotacao(db.Model):
         if not self.numero_cotacao:
             self.numero_cotacao = self.gerar_numero_cotacao()
     
+    @staticmethod
+    def query_listagem():
+        """Query de cotações com consultor e operador carregados no mesmo SELECT (evita N+1 no to_dict)"""
+        return Cotacao.query.options(
+            joinedload(Cotacao.consultor),
+            joinedload(Cotacao.operador)
+        )
+    
     @staticmethod
     def gerar_numero_cotacao():
         """Gera um número único para a cotação no formato COT-YYYYMMDD-NNNN"""
         hoje = datetime.now().strftime('%Y%m%d')
-        
-        # Buscar o último número do dia
-        ultimo_numero = db.session.query(Cotacao.numero_cotacao)\
-            .filter(Cotacao.numero_cotacao.like(f'COT-{hoje}-%'))\
-            .order_by(Cotacao.numero_cotacao.desc())\
-            .first()
-        
-        if ultimo_numero:
-            # Extrair o número sequencial e incrementar
-            seq = int(ultimo_numero[0].split('-')[-1]) + 1
-        else:
-            seq = 1
-        
-        return f'COT-{hoje}-{seq:04d}'
+        return f'COT-{hoje}-{SequenciaCotacao.proximo(hoje):04d}'
     
     def pode_ser_aceita_por(self, usuario):
         """Verifica se a cotação pode ser aceita pelo usuário"""
@@ -461,13 +464,15 @@ class Cotacao(db.Model):
             usuario_id=consultor_id,
             status_anterior=None,
             status_novo=cotacao.status,
-            observacoes="Cotação criada"
+            observacoes="Cotação criada",
+            commit=False
         )
         
         # Notificar operadores
         from .notificacao import Notificacao
         Notificacao.notificar_nova_cotacao(cotacao)
         
+        # Cotação, histórico e notificações em um único commit
         db.session.commit()
         return cotacao
     
@@ -475,6 +480,75 @@ class Cotacao(db.Model):
         return f'<Cotacao {self.numero_cotacao}>'
 
 
+class SequenciaCotacao(db.Model):
+    """
+    Contador diário do numero_cotacao. Cada reserva é um UPDATE atômico da
+    linha do dia em transação própria (sem varrer cotacoes), então criações
+    concorrentes em workers diferentes nunca recebem o mesmo número.
+    """
+    __tablename__ = 'sequencias_cotacao'
+    
+    dia = db.Column(db.String(8), primary_key=True)  # YYYYMMDD
+    ultimo = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Números reservados por ida ao banco; 1 mantém a sequência sem buracos
+    TAMANHO_BLOCO = max(1, int(os.getenv('COTACAO_BLOCO_NUMEROS', '1')))
+    
+    _lock = threading.Lock()
+    _faixa = {}  # dia -> [próximo número, último reservado] deste processo
+    
+    @staticmethod
+    def proximo(dia):
+        """Próximo número do dia (da faixa já reservada pelo processo, ou de uma nova)"""
+        with SequenciaCotacao._lock:
+            faixa = SequenciaCotacao._faixa.get(dia)
+            if faixa is None or faixa[0] > faixa[1]:
+                ultimo = SequenciaCotacao._reservar(dia, SequenciaCotacao.TAMANHO_BLOCO)
+                faixa = [ultimo - SequenciaCotacao.TAMANHO_BLOCO + 1, ultimo]
+                SequenciaCotacao._faixa = {dia: faixa}
+            numero = faixa[0]
+            faixa[0] += 1
+            return numero
+    
+    @staticmethod
+    def _reservar(dia, quantidade):
+        """Soma quantidade ao contador do dia e retorna o novo valor"""
+        tabela = SequenciaCotacao.__table__
+        with db.engine.begin() as conexao:
+            ultimo = conexao.execute(
+                update(tabela)
+                .where(tabela.c.dia == dia)
+                .values(ultimo=tabela.c.ultimo + quantidade)
+                .returning(tabela.c.ultimo)
+            ).scalar()
+            if ultimo is not None:
+                return ultimo
+            
+            # Primeira reserva do dia: continua do maior número já emitido
+            # (busca por faixa no índice único, sem LIKE)
+            prefixo = f'COT-{dia}-'
+            maior = conexao.execute(
+                select(Cotacao.numero_cotacao)
+                .where(Cotacao.numero_cotacao >= prefixo, Cotacao.numero_cotacao < f'COT-{dia}.')
+                .order_by(Cotacao.numero_cotacao.desc())
+                .limit(1)
+            ).scalar()
+            base = int(maior.split('-')[-1]) if maior else 0
+            
+            if conexao.dialect.name == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            # Outro processo pode ter criado a linha nesse meio tempo: aí só soma
+            inserir = insert(tabela).values(dia=dia, ultimo=base + quantidade)
+            return conexao.execute(
+                inserir.on_conflict_do_update(
+                    index_elements=[tabela.c.dia],
+                    set_={'ultimo': tabela.c.ultimo + quantidade}
+                ).returning(tabela.c.ultimo)
+            ).scalar_one()
+
+
 class HistoricoCotacao(db.Model):
     __tablename__ = 'historico_cotacoes'
     
@@ -490,7 +564,7 @@ class HistoricoCotacao(db.Model):
     usuario = db.relationship('Usuario')
     
     @staticmethod
-    def registrar_mudanca(cotacao_id, usuario_id, status_anterior, status_novo, observacoes=None):
+    def registrar_mudanca(cotacao_id, usuario_id, status_anterior, status_novo, observacoes=None, commit=True):
         """Registra uma mudança no histórico da cotação"""
         historico = HistoricoCotacao(
             cotacao_id=cotacao_id,
@@ -500,14 +574,39 @@ class HistoricoCotacao(db.Model):
             observacoes=observacoes
         )
         db.session.add(historico)
-        db.session.commit()
+        
+        # Avisar (SSE) os envolvidos na cotação e quem acompanha o painel do sistema
+        from .eventos import BarramentoEventos
+        BarramentoEventos.publicar('cotacao_status', {
+            'cotacao_id': cotacao_id,
+            'status_anterior': status_anterior.value if hasattr(status_anterior, 'value') else status_anterior,
+            'status_novo': status_novo.value if hasattr(status_novo, 'value') else status_novo
+        }, usuario_ids=HistoricoCotacao._destinatarios_status(cotacao_id))
+        
+        if commit:
+            db.session.commit()
         return historico
     
+    @staticmethod
+    def _destinatarios_status(cotacao_id):
+        """Consultor e operador da cotação, mais gerentes e administradores ativos (painel tempo real)"""
+        destinos = {
+            usuario_id for (usuario_id,) in db.session.query(Usuario.id).filter(
+                Usuario.tipo_usuario.in_((TipoUsuario.ADMINISTRADOR, TipoUsuario.GERENTE))
+            ).filter_by(ativo=True)
+        }
+        cotacao = db.session.get(Cotacao, cotacao_id)
+        if cotacao is not None:
+            destinos.update((cotacao.consultor_id, cotacao.operador_id))
+        destinos.discard(None)
+        return sorted(destinos)
+    
     @staticmethod
     def obter_historico_cotacao(cotacao_id):
         """Obtém o histórico completo de uma cotação"""
         try:
-            historico_items = HistoricoCotacao.query.filter_by(cotacao_id=cotacao_id)\
+            historico_items = HistoricoCotacao.query.options(joinedload(HistoricoCotacao.usuario))\
+                .filter_by(cotacao_id=cotacao_id)\
                 .order_by(HistoricoCotacao.timestamp.asc()).all()
             return [item.to_dict() for item in historico_items]
         except Exception as e:
@@ -6,6 +6,10 @@ from . import db
 
 class Empresa(db.Model):
     __tablename__ = 'empresas'
+    __table_args__ = (
+        # Chave da paginação por cursor
+        db.Index('ix_empresas_razao_social_id', 'razao_social', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     razao_social = db.Column(db.String(255), nullable=False)
     nome_fantasia = db.Column(db.String(255))
@@ -93,7 +97,7 @@ class Empresa(db.Model):
 class Regulamentacao(db.Model):
     __tablename__ = 'regulamentacoes'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     tipo_regulamentacao = db.Column(db.String(100), nullable=False)
     numero_registro = db.Column(db.String(100))
     data_emissao = db.Column(db.Date)
@@ -113,7 +117,7 @@ class Regulamentacao(db.Model):
 class Certificacao(db.Model):
     __tablename__ = 'certificacoes'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     nome_certificacao = db.Column(db.String(100), nullable=False)
     numero_certificacao = db.Column(db.String(100))
     data_emissao = db.Column(db.Date)
@@ -133,7 +137,7 @@ class Certificacao(db.Model):
 class ModalidadeTransporte(db.Model):
     __tablename__ = 'modalidades_transporte'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     modalidade = db.Column(db.String(100), nullable=False)
 
     def to_dict(self):
@@ -145,7 +149,7 @@ class ModalidadeTransporte(db.Model):
 class TipoCarga(db.Model):
     __tablename__ = 'tipos_carga'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     tipo_carga = db.Column(db.String(100), nullable=False)
 
     def to_dict(self):
@@ -157,7 +161,7 @@ class TipoCarga(db.Model):
 class AbrangenciaGeografica(db.Model):
     __tablename__ = 'abrangencia_geografica'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     tipo_abrangencia = db.Column(db.String(100), nullable=False) # Ex: Nacional, Regional, Internacional
     detalhes = db.Column(db.String(500)) # Ex: Estados atendidos, rotas específicas
 
@@ -171,7 +175,7 @@ class AbrangenciaGeografica(db.Model):
 class Frota(db.Model):
     __tablename__ = 'frota'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     tipo_frota = db.Column(db.String(100), nullable=False) # Ex: Própria, Terceirizada
     quantidade = db.Column(db.Integer)
     tipo_veiculo = db.Column(db.String(100)) # Ex: Carreta, Caminhão, Van
@@ -193,7 +197,7 @@ class Frota(db.Model):
 class Armazenagem(db.Model):
     __tablename__ = 'armazenagem'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     possui_armazem = db.Column(db.Boolean, nullable=False)
     localizacao = db.Column(db.String(255))
     capacidade_m2 = db.Column(db.Float)
@@ -215,7 +219,7 @@ class Armazenagem(db.Model):
 class PortoTerminal(db.Model):
     __tablename__ = 'portos_terminais'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     nome_porto_terminal = db.Column(db.String(255), nullable=False)
     tipo_terminal = db.Column(db.String(100)) # Ex: Marítimo, Ferroviário, Rodoviário
 
@@ -229,7 +233,7 @@ class PortoTerminal(db.Model):
 class SeguroCobertura(db.Model):
     __tablename__ = 'seguros_coberturas'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     tipo_seguro = db.Column(db.String(100), nullable=False) # Ex: RCTR-C, RC-DC, RCTF-DA
     numero_apolice = db.Column(db.String(100))
     data_validade = db.Column(db.Date)
@@ -249,7 +253,7 @@ class SeguroCobertura(db.Model):
 class Tecnologia(db.Model):
     __tablename__ = 'tecnologias'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     nome_tecnologia = db.Column(db.String(100), nullable=False) # Ex: Rastreamento GPS, Telemetria, TMS, WMS
     detalhes = db.Column(db.String(500))
 
@@ -263,7 +267,7 @@ class Tecnologia(db.Model):
 class DesempenhoQualidade(db.Model):
     __tablename__ = 'desempenho_qualidade'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     prazo_medio_atendimento = db.Column(db.String(100)) # Em dias ou horas
     unidade_prazo = db.Column(db.String(10), default='dias') # 'horas' ou 'dias'
     indice_avarias_extravios = db.Column(db.Float) # Percentual
@@ -281,7 +285,7 @@ class DesempenhoQualidade(db.Model):
 class ClienteSegmento(db.Model):
     __tablename__ = 'clientes_segmentos'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     segmento = db.Column(db.String(100), nullable=False) # Ex: Varejo, Indústria, Agronegócio
     principais_clientes = db.Column(db.String(500)) # Lista dos principais clientes
 
@@ -295,7 +299,7 @@ class ClienteSegmento(db.Model):
 class RecursoHumano(db.Model):
     __tablename__ = 'recursos_humanos'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     numero_funcionarios = db.Column(db.Integer)
     programas_treinamento = db.Column(db.String(500)) # Ex: Direção defensiva, Produtos perigosos
 
@@ -309,7 +313,7 @@ class RecursoHumano(db.Model):
 class Sustentabilidade(db.Model):
     __tablename__ = 'sustentabilidade'
     id = db.Column(db.Integer, primary_key=True)
-    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False)
+    empresa_id = db.Column(db.Integer, db.ForeignKey('empresas.id'), nullable=False, index=True)
     certificacao_ambiental = db.Column(db.String(100)) # Ex: ISO 14001
     programas_reducao_emissoes = db.Column(db.String(500)) # Ex: Frota Euro 5/6, Biodiesel
 
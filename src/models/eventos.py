@@ -0,0 +1,213 @@
+"""
+Barramento de eventos em tempo real (notificações e mudanças de status)
+
+Os eventos são gravados na tabela eventos_tempo_real dentro da mesma transação
+que os gerou, então só são entregues se o commit acontecer. Em cada processo
+(worker do gunicorn) uma única thread lê os eventos novos e os distribui para as
+conexões SSE abertas naquele processo: uma consulta por worker, e não por cliente.
+
+No PostgreSQL o id vem de uma sequência e o commit pode sair fora de ordem: um
+evento de id menor aparece depois de um maior. Os ids pulados ficam pendentes
+por JANELA_EVENTOS_ATRASADOS segundos e são procurados de novo a cada leitura;
+a reconexão (Last-Event-ID) também relê essa janela, sem repetir ids já enviados.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import timedelta
+from sqlalchemy import delete, event, insert, text
+from . import db
+from .usuario import get_brasilia_time
+
+# Intervalo entre leituras do barramento (segundos)
+INTERVALO_LEITURA = 1.0
+
+# Eventos mais antigos que isso são removidos (segundos)
+RETENCAO_EVENTOS = 3600
+
+# Limite de eventos acumulados por conexão lenta antes de descartá-los
+TAMANHO_FILA_ASSINANTE = 200
+
+# Tempo em que um id pulado ainda pode aparecer (commit atrasado) (segundos)
+JANELA_EVENTOS_ATRASADOS = 10
+
+# Ids pulados acompanhados por leitura (um salto maior não é de transação em andamento)
+MAXIMO_PENDENTES = 1000
+
+# Conexões SSE simultâneas por processo: cada uma ocupa uma thread do worker
+# gthread enquanto dura, então o limite deixa threads livres para a API
+MAXIMO_ASSINATURAS = int(
+    os.getenv('SSE_MAXIMO_CONEXOES') or max(1, int(os.getenv('GUNICORN_THREADS', '8')) // 2)
+)
+
+
+class EventoTempoReal(db.Model):
+    """Evento publicado para um usuário (ou para todos, quando usuario_id é nulo)"""
+    __tablename__ = 'eventos_tempo_real'
+    # Ids nunca reaproveitados, mesmo com a tabela esvaziada pela limpeza (SQLite)
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, index=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    dados = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=get_brasilia_time, index=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'dados': json.loads(self.dados)
+        }
+
+
+class BarramentoEventos:
+    """Publicação (na transação corrente) e assinatura (por processo) de eventos"""
+
+    _lock = threading.Lock()
+    _assinantes = {}  # usuario_id -> set de filas
+    _thread = None
+    _acordar = threading.Event()
+
+    # ==================== PUBLICAÇÃO ====================
+
+    @staticmethod
+    def publicar(tipo, dados, usuario_ids=None):
+        """
+        Grava o evento na sessão atual (sem commit).
+        usuario_ids=None publica para todos os usuários conectados.
+        """
+        conteudo = json.dumps(dados, default=str)
+        agora = get_brasilia_time()
+        destinos = [None] if usuario_ids is None else list(usuario_ids)
+        if not destinos:
+            return
+        db.session.execute(insert(EventoTempoReal), [
+            {'usuario_id': usuario_id, 'tipo': tipo, 'dados': conteudo, 'created_at': agora}
+            for usuario_id in destinos
+        ])
+        db.session.info['eventos_publicados'] = True
+
+    # ==================== ASSINATURA ====================
+
+    @staticmethod
+    def assinar(app, usuario_id):
+        """
+        Registra uma fila para o usuário e garante a thread de leitura do processo.
+        Retorna None quando o processo já tem MAXIMO_ASSINATURAS conexões.
+        """
+        fila = queue.Queue(maxsize=TAMANHO_FILA_ASSINANTE)
+        with BarramentoEventos._lock:
+            if sum(len(filas) for filas in BarramentoEventos._assinantes.values()) >= MAXIMO_ASSINATURAS:
+                return None
+            BarramentoEventos._assinantes.setdefault(usuario_id, set()).add(fila)
+            if BarramentoEventos._thread is None or not BarramentoEventos._thread.is_alive():
+                BarramentoEventos._thread = threading.Thread(
+                    target=BarramentoEventos._ler_eventos, args=(app,),
+                    name='barramento-eventos', daemon=True
+                )
+                BarramentoEventos._thread.start()
+        return fila
+
+    @staticmethod
+    def cancelar(usuario_id, fila):
+        with BarramentoEventos._lock:
+            filas = BarramentoEventos._assinantes.get(usuario_id)
+            if filas:
+                filas.discard(fila)
+                if not filas:
+                    BarramentoEventos._assinantes.pop(usuario_id, None)
+
+    @staticmethod
+    def eventos_desde(usuario_id, ultimo_id):
+        """
+        Eventos perdidos desde ultimo_id (reconexão com Last-Event-ID), mais os
+        da janela de commits atrasados: o cliente pode já ter recebido alguns
+        """
+        limite = get_brasilia_time() - timedelta(seconds=JANELA_EVENTOS_ATRASADOS)
+        eventos = EventoTempoReal.query.filter(
+            db.or_(EventoTempoReal.id > ultimo_id, EventoTempoReal.created_at >= limite),
+            db.or_(EventoTempoReal.usuario_id == usuario_id, EventoTempoReal.usuario_id.is_(None))
+        ).order_by(EventoTempoReal.id).limit(TAMANHO_FILA_ASSINANTE).all()
+        return [evento.to_dict() for evento in eventos]
+
+    @staticmethod
+    def _entregar(evento, usuario_id):
+        with BarramentoEventos._lock:
+            if usuario_id is None:
+                filas = [f for conjunto in BarramentoEventos._assinantes.values() for f in conjunto]
+            else:
+                filas = list(BarramentoEventos._assinantes.get(usuario_id, ()))
+        for fila in filas:
+            try:
+                fila.put_nowait(evento)
+            except queue.Full:
+                # Conexão que não consome: descarta, o cliente recupera pelo Last-Event-ID
+                pass
+
+    @staticmethod
+    def _ler_eventos(app):
+        """Loop da thread de leitura: busca eventos novos e distribui para as filas locais"""
+        with app.app_context():
+            engine = db.engine
+        with engine.connect() as conexao:
+            ultimo_id = conexao.execute(text("SELECT max(id) FROM eventos_tempo_real")).scalar() or 0
+        pendentes = {}  # id pulado (abaixo de ultimo_id) -> instante em que foi notado
+        ultima_limpeza = time.monotonic()
+
+        while True:
+            with BarramentoEventos._lock:
+                if not BarramentoEventos._assinantes:
+                    BarramentoEventos._thread = None
+                    return
+            try:
+                agora = time.monotonic()
+                for id_pulado in [i for i, notado in pendentes.items() if agora - notado > JANELA_EVENTOS_ATRASADOS]:
+                    del pendentes[id_pulado]
+                # Relê a partir do menor id pendente; os já entregues são ignorados abaixo
+                desde = min(pendentes) - 1 if pendentes else ultimo_id
+                with engine.connect() as conexao:
+                    linhas = conexao.execute(text(
+                        "SELECT id, usuario_id, tipo, dados FROM eventos_tempo_real "
+                        "WHERE id > :desde ORDER BY id"
+                    ), {'desde': desde}).all()
+                    if time.monotonic() - ultima_limpeza > 300:
+                        limite = get_brasilia_time() - timedelta(seconds=RETENCAO_EVENTOS)
+                        conexao.execute(
+                            delete(EventoTempoReal.__table__).where(EventoTempoReal.created_at < limite)
+                        )
+                        conexao.commit()
+                        ultima_limpeza = time.monotonic()
+                for linha in linhas:
+                    if linha.id <= ultimo_id:
+                        if pendentes.pop(linha.id, None) is None:
+                            continue
+                    else:
+                        pendentes.update(dict.fromkeys(
+                            range(max(ultimo_id + 1, linha.id - MAXIMO_PENDENTES), linha.id), agora
+                        ))
+                        ultimo_id = linha.id
+                    BarramentoEventos._entregar(
+                        {'id': linha.id, 'tipo': linha.tipo, 'dados': json.loads(linha.dados)},
+                        linha.usuario_id
+                    )
+            except Exception as e:
+                print(f"Erro ao ler barramento de eventos: {str(e)}")
+
+            BarramentoEventos._acordar.wait(INTERVALO_LEITURA)
+            BarramentoEventos._acordar.clear()
+
+
+@event.listens_for(db.session, 'after_commit')
+def _acordar_leitura(session):
+    """Eventos publicados neste processo são entregues sem esperar o intervalo de leitura"""
+    if session.info.pop('eventos_publicados', False):
+        BarramentoEventos._acordar.set()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_publicacao(session):
+    session.info.pop('eventos_publicados', None)
@@ -0,0 +1,148 @@
+"""
+Índice invertido de facetas das empresas (empresa -> valores de cada faceta)
+Cada valor de faceta guarda um bitmap (int) com os ids das empresas que o possuem
+"""
+
+import threading
+from sqlalchemy import text
+from . import db
+from .busca import VersaoIndice
+
+# Faceta -> consulta que retorna (empresa_id, valor)
+FACETAS = {
+    'modalidade': "SELECT DISTINCT empresa_id, modalidade FROM modalidades_transporte",
+    'tipo_carga': "SELECT DISTINCT empresa_id, tipo_carga FROM tipos_carga",
+    'certificacao': "SELECT DISTINCT empresa_id, nome_certificacao FROM certificacoes",
+    'etiqueta': "SELECT id, etiqueta FROM empresas",
+    'possui_armazem': "SELECT DISTINCT empresa_id, possui_armazem FROM armazenagem",
+    'tipo_frota': "SELECT DISTINCT empresa_id, tipo_frota FROM frota",
+}
+
+
+def _contar_bits(bitmap):
+    return bin(bitmap).count('1')
+
+
+def _ids_do_bitmap(bitmap):
+    """Itera os ids (bits ligados) em ordem crescente"""
+    bits = bin(bitmap)[:1:-1]
+    posicao = bits.find('1')
+    while posicao != -1:
+        yield posicao
+        posicao = bits.find('1', posicao + 1)
+
+
+def _bitmap_de_ids(ids):
+    ids = [i for i in ids if i is not None]
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for empresa_id in ids:
+        buffer[empresa_id >> 3] |= 1 << (empresa_id & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def _normalizar_valor(faceta, valor):
+    if faceta == 'possui_armazem':
+        return 'true' if str(valor).lower() in ('true', '1', 'sim') else 'false'
+    return str(valor).strip()
+
+
+class IndiceFacetasEmpresa:
+    """Cache por processo do índice de facetas, invalidado pela versão dos dados de empresas"""
+
+    _lock = threading.Lock()
+    _versao = None
+    _universo = 0
+    _bitmaps = {}
+
+    @staticmethod
+    def obter():
+        """Retorna (universo, bitmaps), reconstruindo o índice se a versão mudou"""
+        versao = VersaoIndice.obter('empresas')
+        with IndiceFacetasEmpresa._lock:
+            if IndiceFacetasEmpresa._versao != versao:
+                IndiceFacetasEmpresa._reconstruir()
+                IndiceFacetasEmpresa._versao = versao
+            return IndiceFacetasEmpresa._universo, IndiceFacetasEmpresa._bitmaps
+
+    @staticmethod
+    def invalidar():
+        with IndiceFacetasEmpresa._lock:
+            IndiceFacetasEmpresa._versao = None
+
+    @staticmethod
+    def _reconstruir():
+        universo = _bitmap_de_ids(db.session.execute(text("SELECT id FROM empresas")).scalars())
+        bitmaps = {}
+        for faceta, sql in FACETAS.items():
+            membros = {}
+            for empresa_id, valor in db.session.execute(text(sql)):
+                if valor is None or empresa_id is None:
+                    continue
+                chave = _normalizar_valor(faceta, valor)
+                if chave:
+                    membros.setdefault(chave, []).append(empresa_id)
+            bitmaps[faceta] = {valor: _bitmap_de_ids(ids) for valor, ids in membros.items()}
+        IndiceFacetasEmpresa._universo = universo
+        IndiceFacetasEmpresa._bitmaps = bitmaps
+
+    @staticmethod
+    def calcular(selecionados, ids_restritos=None):
+        """
+        Aplica os filtros de faceta e calcula as contagens em uma passada sobre os bitmaps.
+
+        selecionados: dict faceta -> lista de valores (OR dentro da faceta, AND entre facetas)
+        ids_restritos: conjunto opcional de ids já filtrados (ex.: busca textual)
+
+        Retorna (bitmap_resultado, contagens). As contagens de cada faceta ignoram
+        a seleção da própria faceta, para que o painel mostre as alternativas.
+        """
+        universo, bitmaps = IndiceFacetasEmpresa.obter()
+        base = universo
+        if ids_restritos is not None:
+            base &= _bitmap_de_ids(ids_restritos)
+
+        # Máscara de cada faceta selecionada (união dos valores escolhidos)
+        mascaras = {}
+        for faceta, valores in selecionados.items():
+            if not valores or faceta not in bitmaps:
+                continue
+            mascara = 0
+            for valor in valores:
+                mascara |= bitmaps[faceta].get(_normalizar_valor(faceta, valor), 0)
+            mascaras[faceta] = mascara
+
+        resultado = base
+        for mascara in mascaras.values():
+            resultado &= mascara
+
+        contagens = {}
+        for faceta, valores in bitmaps.items():
+            # Filtro atual sem a seleção da própria faceta
+            contexto = base
+            for outra, mascara in mascaras.items():
+                if outra != faceta:
+                    contexto &= mascara
+            itens = []
+            for valor, bitmap in valores.items():
+                quantidade = _contar_bits(bitmap & contexto)
+                if quantidade:
+                    itens.append({'valor': valor, 'quantidade': quantidade})
+            itens.sort(key=lambda item: (-item['quantidade'], item['valor']))
+            contagens[faceta] = itens
+
+        return resultado, contagens
+
+    @staticmethod
+    def paginar(bitmap, page, per_page):
+        """Retorna (ids da página, total) a partir do bitmap de resultado"""
+        total = _contar_bits(bitmap)
+        inicio = (page - 1) * per_page
+        ids = []
+        for posicao, empresa_id in enumerate(_ids_do_bitmap(bitmap)):
+            if posicao >= inicio + per_page:
+                break
+            if posicao >= inicio:
+                ids.append(empresa_id)
+        return ids, total
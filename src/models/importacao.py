@@ -0,0 +1,652 @@
+"""
+Motor de importação em lote de empresas (upsert por CNPJ)
+
+Recebe registros no mesmo formato do /empresas/export e aplica, por bloco de
+empresas, apenas as diferenças: INSERT/UPDATE das empresas e INSERT/DELETE das
+linhas filhas que mudaram, sempre com executemany em vez de um comando por objeto.
+Também converte os arquivos enviados (JSON/NDJSON e planilha Excel) nesses registros.
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime, date
+from decimal import Decimal
+from sqlalchemy import insert, update, select, delete
+from . import db
+from .empresa import (
+    Empresa, Regulamentacao, Certificacao, ModalidadeTransporte,
+    TipoCarga, AbrangenciaGeografica, Frota, Armazenagem, PortoTerminal,
+    SeguroCobertura, Tecnologia, DesempenhoQualidade, ClienteSegmento,
+    RecursoHumano, Sustentabilidade
+)
+from .analytics import RollupAnalytics
+from .busca import IndiceBuscaEmpresa
+from .planilha import (
+    ABA_EMPRESAS, COLUNAS_OBRIGATORIAS, ABAS_EXCEL, PADROES_EXCEL, converter_data
+)
+
+# Campos da empresa atualizados pela importação (ausentes no registro mantêm o valor atual)
+CAMPOS_EMPRESA = [
+    'razao_social', 'nome_fantasia', 'inscricao_estadual', 'endereco_completo',
+    'telefone_comercial', 'telefone_emergencial', 'email', 'website',
+    'observacoes', 'link_cotacao', 'etiqueta'
+]
+
+TAMANHO_LOTE_PADRAO = 500
+
+# CNPJs por consulta das empresas existentes (limite de parâmetros do SQLite)
+TAMANHO_CONSULTA_CNPJ = 500
+
+
+def _data(valor, tolerante=False):
+    """Converte 'YYYY-MM-DD' (ou date/datetime) em date"""
+    if not valor:
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    try:
+        return datetime.strptime(str(valor)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        if tolerante:
+            return None
+        raise ValueError(f"Data inválida: {valor}")
+
+
+def _valor_ou_item(item, campo):
+    """Listas simples aceitam tanto 'valor' quanto {'campo': 'valor'}"""
+    return item.get(campo) if isinstance(item, dict) else item
+
+
+def _portos(itens):
+    """Portos/terminais sem duplicatas (nome|tipo), como no cadastro manual"""
+    unicos = {}
+    for item in itens:
+        nome, tipo = item.get("nome_porto_terminal"), item.get("tipo_terminal")
+        if nome and tipo:
+            unicos.setdefault(f"{nome}|{tipo}", {'nome_porto_terminal': nome, 'tipo_terminal': tipo})
+    return list(unicos.values())
+
+
+# Chave do registro -> (modelo, conversão de cada item em colunas)
+TABELAS_FILHAS = {
+    'regulamentacoes': (Regulamentacao, lambda item: {
+        'tipo_regulamentacao': item.get("tipo_regulamentacao"),
+        'numero_registro': item.get("numero_registro"),
+        'data_emissao': _data(item.get("data_emissao")),
+        'data_validade': _data(item.get("data_validade")),
+        'orgao_emissor': item.get("orgao_emissor"),
+    }),
+    'certificacoes': (Certificacao, lambda item: {
+        'nome_certificacao': item.get("nome_certificacao"),
+        'numero_certificacao': item.get("numero_certificacao"),
+        'data_emissao': _data(item.get("data_emissao")),
+        'data_validade': _data(item.get("data_validade")),
+        'orgao_certificador': item.get("orgao_certificador"),
+    }),
+    'modalidades_transporte': (ModalidadeTransporte, lambda item: {
+        'modalidade': _valor_ou_item(item, "modalidade"),
+    }),
+    'tipos_carga': (TipoCarga, lambda item: {
+        'tipo_carga': _valor_ou_item(item, "tipo_carga"),
+    }),
+    'abrangencia_geografica': (AbrangenciaGeografica, lambda item: {
+        'tipo_abrangencia': item.get("tipo_abrangencia"),
+        'detalhes': item.get("detalhes"),
+    }),
+    'frota': (Frota, lambda item: {
+        'tipo_frota': item.get("tipo_frota"),
+        'quantidade': item.get("quantidade"),
+        'tipo_veiculo': item.get("tipo_veiculo"),
+        'tipo_carroceria': item.get("tipo_carroceria"),
+        'capacidade': item.get("capacidade"),
+        'ano_medio': item.get("ano_medio"),
+    }),
+    'armazenagem': (Armazenagem, lambda item: {
+        'possui_armazem': item.get("possui_armazem"),
+        'localizacao': item.get("localizacao"),
+        'capacidade_m2': item.get("capacidade_m2"),
+        'capacidade_m3': item.get("capacidade_m3"),
+        'tipos_armazenagem': item.get("tipos_armazenagem"),
+        'servicos_oferecidos': item.get("servicos_oferecidos"),
+    }),
+    'portos_terminais': (PortoTerminal, lambda item: item),
+    'seguros_coberturas': (SeguroCobertura, lambda item: {
+        'tipo_seguro': item.get("tipo_seguro"),
+        'numero_apolice': item.get("numero_apolice"),
+        'valor_cobertura': item.get("valor_cobertura"),
+        'seguradora': item.get("seguradora"),
+        'data_validade': _data(item.get("data_validade"), tolerante=True),
+    }),
+    'tecnologias': (Tecnologia, lambda item: {
+        'nome_tecnologia': item.get("nome_tecnologia"),
+        'detalhes': item.get("detalhes"),
+    }),
+    'desempenho_qualidade': (DesempenhoQualidade, lambda item: {
+        'prazo_medio_atendimento': item.get("prazo_medio_atendimento"),
+        'unidade_prazo': item.get("unidade_prazo"),
+        'indice_avarias_extravios': item.get("indice_avarias_extravios"),
+        'indice_entregas_prazo': item.get("indice_entregas_prazo"),
+    }),
+    'clientes_segmentos': (ClienteSegmento, lambda item: {
+        'segmento': item.get("segmento"),
+        'principais_clientes': item.get("principais_clientes"),
+    }),
+    'recursos_humanos': (RecursoHumano, lambda item: {
+        'numero_funcionarios': item.get("numero_funcionarios", item.get("total_funcionarios")),
+        'programas_treinamento': item.get("programas_treinamento"),
+    }),
+    'sustentabilidade': (Sustentabilidade, lambda item: {
+        'certificacao_ambiental': item.get("certificacao_ambiental"),
+        'programas_reducao_emissoes': item.get("programas_reducao_emissoes"),
+    }),
+}
+
+
+def _obrigatorias(modelo):
+    """Colunas NOT NULL sem padrão que a importação precisa preencher"""
+    return [
+        coluna.name for coluna in modelo.__table__.columns
+        if not coluna.nullable and not coluna.primary_key and coluna.default is None
+        and coluna.server_default is None and coluna.name not in ('cnpj', 'empresa_id')
+    ]
+
+
+OBRIGATORIAS_EMPRESA = _obrigatorias(Empresa)
+OBRIGATORIAS_FILHAS = {chave: _obrigatorias(modelo) for chave, (modelo, _converter) in TABELAS_FILHAS.items()}
+
+
+def _vazio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def _normalizar(valor):
+    """Forma comparável de um valor vindo do arquivo ou do banco"""
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, (int, float, Decimal)):
+        return float(valor)
+    return str(valor).strip()
+
+
+def _assinatura(colunas, linha):
+    return tuple(_normalizar(linha.get(coluna)) for coluna in colunas)
+
+
+class ImportadorEmpresas:
+    """Upsert em lote de empresas e dados relacionados"""
+
+    def __init__(self, tamanho_lote=TAMANHO_LOTE_PADRAO):
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.stats = {
+            "total_processadas": 0,
+            "criadas": 0,
+            "atualizadas": 0,
+            "inalteradas": 0,
+            "erros": 0,
+            "detalhes_erros": [],
+            "linhas_inseridas": 0,
+            "linhas_removidas": 0,
+        }
+
+    def importar(self, registros):
+        """
+        Processa os registros (dicts no formato do export) e retorna as estatísticas.
+        Não faz commit: tudo entra na transação de quem chamou.
+        """
+        inicio = time.perf_counter()
+
+        preparados = {}
+        for registro in registros:
+            self.stats["total_processadas"] += 1
+            try:
+                cnpj, preparado = self._preparar(registro)
+            except (ValueError, TypeError, AttributeError) as e:
+                self._erro(registro, str(e))
+                continue
+            # CNPJ repetido no arquivo: vale o último registro
+            preparados[cnpj] = preparado
+
+        cnpjs = list(preparados)
+        for posicao in range(0, len(cnpjs), self.tamanho_lote):
+            lote = {cnpj: preparados[cnpj] for cnpj in cnpjs[posicao:posicao + self.tamanho_lote]}
+            self._aplicar_lote(lote, self._existentes(list(lote)))
+
+        duracao = time.perf_counter() - inicio
+        linhas = self.stats["linhas_inseridas"] + self.stats["linhas_removidas"] + \
+            self.stats["criadas"] + self.stats["atualizadas"]
+        self.stats["duracao_segundos"] = round(duracao, 3)
+        self.stats["empresas_por_segundo"] = round(self.stats["total_processadas"] / duracao, 1) if duracao else None
+        self.stats["linhas_por_segundo"] = round(linhas / duracao, 1) if duracao else None
+        return self.stats
+
+    @staticmethod
+    def _existentes(cnpjs):
+        """Empresas já cadastradas com esses CNPJs (busca pelo índice único, não a tabela inteira)"""
+        colunas = [Empresa.id, Empresa.cnpj, Empresa.data_fundacao] + [getattr(Empresa, c) for c in CAMPOS_EMPRESA]
+        existentes = {}
+        for posicao in range(0, len(cnpjs), TAMANHO_CONSULTA_CNPJ):
+            consulta = select(*colunas).where(Empresa.cnpj.in_(cnpjs[posicao:posicao + TAMANHO_CONSULTA_CNPJ]))
+            existentes.update((linha.cnpj, linha._asdict()) for linha in db.session.execute(consulta))
+        return existentes
+
+    def _erro(self, registro, mensagem):
+        self.stats["erros"] += 1
+        cnpj = f" (CNPJ {registro['cnpj']})" if registro.get('cnpj') else ''
+        self.stats["detalhes_erros"].append(
+            f"Erro ao processar empresa {registro.get('razao_social') or 'N/A'}{cnpj}: {mensagem}"
+        )
+
+    def _preparar(self, registro):
+        """Valida o registro e converte os dados relacionados em linhas de cada tabela"""
+        cnpj = registro.get('cnpj')
+        if not cnpj:
+            raise ValueError("Empresa sem CNPJ")
+
+        campos = {campo: registro[campo] for campo in CAMPOS_EMPRESA if campo in registro}
+        if registro.get("data_fundacao"):
+            campos['data_fundacao'] = _data(registro["data_fundacao"])
+        # Campo obrigatório enviado vazio; ausente só é erro em empresa nova (ver _aplicar_lote)
+        for campo in OBRIGATORIAS_EMPRESA:
+            if campo in campos and _vazio(campos[campo]):
+                raise ValueError(f"Campo obrigatório '{campo}' vazio")
+
+        filhos = {}
+        for chave, (modelo, converter) in TABELAS_FILHAS.items():
+            itens = registro.get(chave) or []
+            if chave == 'portos_terminais':
+                itens = _portos(itens)
+            filhos[chave] = [converter(item) for item in itens]
+            for posicao, linha in enumerate(filhos[chave], start=1):
+                faltando = [coluna for coluna in OBRIGATORIAS_FILHAS[chave] if _vazio(linha.get(coluna))]
+                if faltando:
+                    raise ValueError(f"{chave} #{posicao}: campo obrigatório '{faltando[0]}' vazio")
+
+        ausentes = [campo for campo in OBRIGATORIAS_EMPRESA if campo not in campos]
+        return cnpj, {'registro': registro, 'campos': campos, 'filhos': filhos, 'ausentes': ausentes}
+
+    def _aplicar_lote(self, lote, existentes):
+        novas = []
+        alteracoes = []
+        ids_existentes = {}
+        agora = datetime.utcnow()
+
+        for cnpj, preparado in list(lote.items()):
+            atual = existentes.get(cnpj)
+            if atual is None and preparado['ausentes']:
+                self._erro(preparado['registro'], f"Campo obrigatório '{preparado['ausentes'][0]}' ausente")
+                del lote[cnpj]
+            elif atual is None:
+                linha = {campo: None for campo in CAMPOS_EMPRESA + ['data_fundacao']}
+                linha.update(preparado['campos'])
+                linha['cnpj'] = cnpj
+                linha['etiqueta'] = linha.get('etiqueta') or 'CADASTRADA'
+                linha['created_at'] = agora
+                linha['updated_at'] = agora
+                novas.append(linha)
+            else:
+                ids_existentes[cnpj] = atual['id']
+                mudancas = {
+                    campo: valor for campo, valor in preparado['campos'].items()
+                    if _normalizar(valor) != _normalizar(atual.get(campo))
+                }
+                preparado['mudancas'] = mudancas
+
+        # INSERT das empresas novas já devolvendo os ids
+        if novas:
+            resultado = db.session.execute(
+                insert(Empresa).returning(Empresa.id, Empresa.cnpj),
+                novas
+            )
+            for empresa_id, cnpj in resultado:
+                ids_existentes[cnpj] = empresa_id
+                existentes[cnpj] = {'id': empresa_id, 'cnpj': cnpj}
+            self.stats["criadas"] += len(novas)
+
+        # Linhas filhas atuais das empresas do lote (uma consulta por tabela)
+        ids_antigos = [ids_existentes[cnpj] for cnpj, preparado in lote.items() if 'mudancas' in preparado]
+        empresas_alteradas = set()
+
+        for chave, (modelo, _converter) in TABELAS_FILHAS.items():
+            tabela = modelo.__table__
+            colunas = [c.name for c in tabela.columns if c.name not in ('id', 'empresa_id')]
+
+            atuais = {}
+            if ids_antigos:
+                for linha in db.session.execute(select(tabela).where(tabela.c.empresa_id.in_(ids_antigos))):
+                    dados = linha._asdict()
+                    atuais.setdefault(dados['empresa_id'], []).append(dados)
+
+            inserir, remover = [], []
+            for cnpj, preparado in lote.items():
+                empresa_id = ids_existentes[cnpj]
+                desejadas = Counter()
+                por_assinatura = {}
+                for linha in preparado['filhos'][chave]:
+                    assinatura = _assinatura(colunas, linha)
+                    desejadas[assinatura] += 1
+                    por_assinatura.setdefault(assinatura, []).append(linha)
+
+                # Linhas que já existem iguais são mantidas; o resto é removido
+                for linha in atuais.get(empresa_id, []):
+                    assinatura = _assinatura(colunas, linha)
+                    if desejadas[assinatura] > 0:
+                        desejadas[assinatura] -= 1
+                    else:
+                        remover.append(linha['id'])
+                        empresas_alteradas.add(empresa_id)
+
+                for assinatura, quantidade in desejadas.items():
+                    for linha in por_assinatura[assinatura][:quantidade]:
+                        inserir.append(dict(linha, empresa_id=empresa_id))
+                        empresas_alteradas.add(empresa_id)
+
+            for posicao in range(0, len(remover), self.tamanho_lote):
+                db.session.execute(delete(tabela).where(tabela.c.id.in_(remover[posicao:posicao + self.tamanho_lote])))
+            for posicao in range(0, len(inserir), self.tamanho_lote):
+                db.session.execute(insert(tabela), inserir[posicao:posicao + self.tamanho_lote])
+            self.stats["linhas_removidas"] += len(remover)
+            self.stats["linhas_inseridas"] += len(inserir)
+
+        # UPDATE em lote das empresas existentes que mudaram
+        for cnpj, preparado in lote.items():
+            if 'mudancas' not in preparado:
+                continue
+            empresa_id = ids_existentes[cnpj]
+            if preparado['mudancas'] or empresa_id in empresas_alteradas:
+                alteracoes.append(dict(preparado['mudancas'], id=empresa_id, updated_at=agora))
+            else:
+                self.stats["inalteradas"] += 1
+        if alteracoes:
+            db.session.execute(update(Empresa), alteracoes)
+            self.stats["atualizadas"] += len(alteracoes)
+
+        # Índice de busca e rollup do analytics não enxergam comandos em lote
+        tocadas = [ids_existentes[novo['cnpj']] for novo in novas] + [linha['id'] for linha in alteracoes]
+        IndiceBuscaEmpresa.marcar_para_reindexar(db.session, tocadas)
+        RollupAnalytics.marcar_para_atualizar(db.session, tocadas)
+
+
+# ==================== LEITURA DOS ARQUIVOS ====================
+
+def ler_registros_json(conteudo, ndjson=False):
+    """Registros de um arquivo JSON do export (ou NDJSON: metadados e depois uma empresa por linha)"""
+    try:
+        if ndjson:
+            linhas = [json.loads(linha) for linha in conteudo.splitlines() if linha.strip()]
+            dados = {"empresas": [linha for linha in linhas if 'metadata' not in linha]}
+        else:
+            dados = json.loads(conteudo)
+    except json.JSONDecodeError:
+        raise ValueError("Arquivo JSON inválido")
+
+    if 'empresas' not in dados:
+        raise ValueError("Estrutura do arquivo inválida. Campo 'empresas' não encontrado")
+    if not isinstance(dados['empresas'], list):
+        raise ValueError("Campo 'empresas' deve ser uma lista")
+    return dados['empresas']
+
+
+def ler_registros_excel(arquivo):
+    """
+    Registros da planilha (aba Empresas + abas relacionadas) no formato do export.
+    Retorna (registros, erros) — erros são as linhas rejeitadas antes do upsert.
+    """
+    import pandas as pd
+
+    try:
+        excel_data = pd.read_excel(arquivo, sheet_name=None)  # Lê todas as abas
+    except Exception as e:
+        raise ValueError(f"Erro ao ler arquivo Excel: {str(e)}")
+
+    if ABA_EMPRESAS not in excel_data:
+        raise ValueError(f"Aba '{ABA_EMPRESAS}' não encontrada no arquivo Excel")
+
+    empresas_df = excel_data[ABA_EMPRESAS]
+    for coluna in COLUNAS_OBRIGATORIAS:
+        if coluna not in empresas_df.columns:
+            raise ValueError(f"Coluna obrigatória '{coluna}' não encontrada na aba Empresas")
+
+    # Abas relacionadas agrupadas por CNPJ (uma passada por aba)
+    relacionados = _indexar_abas_excel(excel_data)
+    return _registros_da_planilha(empresas_df, relacionados)
+
+
+def _cnpjs_normalizados(serie):
+    """CNPJ só com dígitos para a coluna inteira ('' quando a célula está vazia)"""
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(serie):
+        # Coluna numérica: o Excel descarta os zeros à esquerda
+        return serie.astype('Int64').astype('string').str.zfill(14).fillna('')
+    return serie.astype('string').fillna('').str.replace(r'\D', '', regex=True)
+
+
+def _linhas_excel(df):
+    """Linhas da aba como dicts, com None nas células vazias"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def _indexar_abas_excel(excel_data):
+    """Agrupa cada aba relacionada por CNPJ: {chave: {cnpj: [linhas]}}"""
+    indice = {}
+    for chave, (nomes, _colunas, _exemplos) in ABAS_EXCEL.items():
+        nome_aba = next((nome for nome in nomes if nome in excel_data), None)
+        if nome_aba is None:
+            continue
+        df = excel_data[nome_aba]
+        if 'cnpj_empresa' not in df.columns:
+            continue
+        linhas = _linhas_excel(df)
+        grupos = df.groupby(_cnpjs_normalizados(df['cnpj_empresa']), sort=False).indices
+        indice[chave] = {
+            cnpj: [linhas[posicao] for posicao in posicoes]
+            for cnpj, posicoes in grupos.items() if cnpj
+        }
+    return indice
+
+
+def _itens_excel(chave, linhas):
+    """Converte as linhas de uma aba nos itens do registro (formato do export)"""
+    colunas = ABAS_EXCEL[chave][1]
+    return [
+        {
+            coluna: conversao(linha.get(coluna)) if linha.get(coluna) is not None else PADROES_EXCEL.get(coluna)
+            for coluna, conversao in colunas.items()
+        }
+        for linha in linhas
+    ]
+
+
+def _registro_da_linha(linha, campos, cnpj, filhas):
+    """Registro (formato do export) de uma linha da aba Empresas; filhas: {chave: [linhas]}"""
+    registro = {
+        campo: str(linha[campo]).strip() if linha.get(campo) is not None else None
+        for campo in campos
+    }
+    registro['cnpj'] = cnpj
+    registro['etiqueta'] = registro.get('etiqueta') or 'CADASTRADA'
+    if linha.get('data_fundacao') is not None:
+        registro['data_fundacao'] = converter_data(linha['data_fundacao'])
+    for chave, linhas in filhas.items():
+        registro[chave] = _itens_excel(chave, linhas)
+    return registro
+
+
+def _validar_cnpj(cnpj, numero_linha):
+    """Mensagem de erro da linha, ou None se o CNPJ normalizado é válido"""
+    if not cnpj:
+        return f"Linha {numero_linha}: CNPJ vazio ou inválido"
+    if len(cnpj) != 14:
+        return f"Linha {numero_linha}: CNPJ deve ter 14 dígitos"
+    return None
+
+
+def _registros_da_planilha(empresas_df, relacionados):
+    """Monta os registros da aba Empresas com os dados relacionados já agrupados por CNPJ"""
+    registros = []
+    erros = []
+    campos = [campo for campo in CAMPOS_EMPRESA if campo in empresas_df.columns]
+    cnpjs = _cnpjs_normalizados(empresas_df['cnpj'])
+
+    for index, linha, cnpj in zip(empresas_df.index, _linhas_excel(empresas_df), cnpjs):
+        erro = _validar_cnpj(cnpj, index + 2)
+        if erro:
+            erros.append(erro)
+            continue
+        try:
+            filhas = {chave: por_cnpj.get(cnpj, []) for chave, por_cnpj in relacionados.items()}
+            registros.append(_registro_da_linha(linha, campos, cnpj, filhas))
+        except Exception as e:
+            erros.append(f"Linha {index + 2}: {str(e)}")
+
+    return registros, erros
+
+
+# ==================== LEITURA EM STREAMING (openpyxl) ====================
+
+# Planilhas .xlsx maiores que isso são lidas em streaming por padrão (bytes)
+LIMITE_STREAMING_EXCEL = 5 * 1024 * 1024
+
+# Linhas da aba Empresas por bloco entregue ao importador
+TAMANHO_BLOCO_STREAMING = 2000
+
+
+def _cnpj_da_celula(valor):
+    """CNPJ só com dígitos de uma célula (numérica ou texto)"""
+    if valor is None or isinstance(valor, bool):
+        return ''
+    if isinstance(valor, (int, float)):
+        return str(int(valor)).zfill(14)
+    return ''.join(filter(str.isdigit, str(valor)))
+
+
+def _cabecalho(linhas):
+    """Nomes das colunas a partir da primeira linha da aba"""
+    primeira = next(linhas, None) or ()
+    return [str(coluna).strip() if coluna is not None else None for coluna in primeira]
+
+
+def _linha_como_dict(colunas, valores):
+    return {coluna: valor for coluna, valor in zip(colunas, valores) if coluna is not None}
+
+
+class LeitorExcelStreaming:
+    """
+    Lê a planilha com openpyxl em modo somente leitura, linha a linha.
+    As abas relacionadas são copiadas para uma tabela temporária (SQLite em
+    disco) indexada por CNPJ; a aba Empresas é lida em blocos e cada bloco
+    busca ali os seus dados relacionados. A memória usada depende do tamanho
+    do bloco, não do tamanho da planilha.
+    """
+
+    def __init__(self, caminho, tamanho_bloco=TAMANHO_BLOCO_STREAMING):
+        from openpyxl import load_workbook
+
+        self.tamanho_bloco = max(1, tamanho_bloco)
+        try:
+            self.planilha = load_workbook(caminho, read_only=True, data_only=True)
+        except Exception as e:
+            raise ValueError(f"Erro ao ler arquivo Excel: {str(e)}")
+
+        if ABA_EMPRESAS not in self.planilha.sheetnames:
+            self.planilha.close()
+            raise ValueError(f"Aba '{ABA_EMPRESAS}' não encontrada no arquivo Excel")
+
+        aba = self.planilha[ABA_EMPRESAS]
+        self.colunas = _cabecalho(aba.iter_rows(values_only=True))
+        for coluna in COLUNAS_OBRIGATORIAS:
+            if coluna not in self.colunas:
+                self.planilha.close()
+                raise ValueError(f"Coluna obrigatória '{coluna}' não encontrada na aba Empresas")
+
+        # Estimativa (dimensão gravada na planilha), usada só para o progresso
+        self.total_estimado = max(0, (aba.max_row or 1) - 1)
+
+    def blocos(self):
+        """Gera (registros, erros, linhas lidas) por bloco da aba Empresas"""
+        import sqlite3
+        import tempfile
+
+        descritor, caminho_temporario = tempfile.mkstemp(suffix='.db')
+        os.close(descritor)
+        conexao = sqlite3.connect(caminho_temporario)
+        try:
+            self._copiar_abas_relacionadas(conexao)
+
+            campos = [campo for campo in CAMPOS_EMPRESA if campo in self.colunas]
+            linhas = self.planilha[ABA_EMPRESAS].iter_rows(min_row=2, values_only=True)
+            pendentes, erros, lidas = [], [], 0
+            for numero_linha, valores in enumerate(linhas, start=2):
+                if all(valor is None for valor in valores):
+                    continue
+                lidas += 1
+                linha = _linha_como_dict(self.colunas, valores)
+                cnpj = _cnpj_da_celula(linha.get('cnpj'))
+                erro = _validar_cnpj(cnpj, numero_linha)
+                if erro:
+                    erros.append(erro)
+                else:
+                    pendentes.append((numero_linha, linha, cnpj))
+
+                if lidas == self.tamanho_bloco:
+                    yield self._montar_bloco(conexao, campos, pendentes, erros) + (lidas,)
+                    pendentes, erros, lidas = [], [], 0
+
+            if lidas:
+                yield self._montar_bloco(conexao, campos, pendentes, erros) + (lidas,)
+        finally:
+            conexao.close()
+            self.planilha.close()
+            os.remove(caminho_temporario)
+
+    def _copiar_abas_relacionadas(self, conexao):
+        conexao.execute("CREATE TABLE filhas (cnpj TEXT, chave TEXT, dados TEXT)")
+        for chave, (nomes, _colunas, _exemplos) in ABAS_EXCEL.items():
+            nome_aba = next((nome for nome in nomes if nome in self.planilha.sheetnames), None)
+            if nome_aba is None:
+                continue
+            linhas = self.planilha[nome_aba].iter_rows(values_only=True)
+            colunas = _cabecalho(linhas)
+            if 'cnpj_empresa' not in colunas:
+                continue
+
+            posicao_cnpj = colunas.index('cnpj_empresa')
+            lote = []
+            for valores in linhas:
+                cnpj = _cnpj_da_celula(valores[posicao_cnpj] if posicao_cnpj < len(valores) else None)
+                if not cnpj:
+                    continue
+                lote.append((cnpj, chave, json.dumps(_linha_como_dict(colunas, valores), default=str)))
+                if len(lote) >= 1000:
+                    conexao.executemany("INSERT INTO filhas VALUES (?, ?, ?)", lote)
+                    lote = []
+            if lote:
+                conexao.executemany("INSERT INTO filhas VALUES (?, ?, ?)", lote)
+        conexao.execute("CREATE INDEX ix_filhas_cnpj ON filhas (cnpj)")
+        conexao.commit()
+
+    def _montar_bloco(self, conexao, campos, pendentes, erros):
+        """Registros do bloco com os dados relacionados buscados na tabela temporária"""
+        cnpjs = sorted({cnpj for _numero, _linha, cnpj in pendentes})
+        filhas = {}
+        for inicio in range(0, len(cnpjs), 500):
+            trecho = cnpjs[inicio:inicio + 500]
+            marcadores = ', '.join('?' for _ in trecho)
+            for cnpj, chave, dados in conexao.execute(
+                f"SELECT cnpj, chave, dados FROM filhas WHERE cnpj IN ({marcadores}) ORDER BY rowid", trecho
+            ):
+                filhas.setdefault(cnpj, {}).setdefault(chave, []).append(json.loads(dados))
+
+        registros = []
+        for numero_linha, linha, cnpj in pendentes:
+            try:
+                registros.append(_registro_da_linha(linha, campos, cnpj, filhas.get(cnpj, {})))
+            except Exception as e:
+                erros.append(f"Linha {numero_linha}: {str(e)}")
+        return registros, erros
@@ -0,0 +1,333 @@
+"""
+Fila de jobs em segundo plano (importações de empresas)
+
+O upload é gravado em disco e vira uma linha na tabela jobs; um processo
+separado (worker_jobs.py, iniciado junto com o gunicorn) reserva o job e
+processa os registros em blocos. Cada bloco é confirmado na mesma transação
+que o checkpoint (processadas), então um job interrompido continua de onde parou.
+Um bloco que falha no banco é refeito registro a registro e só os registros
+recusados vão para detalhes_erros. Uma falha fora dos blocos (ou a queda do
+worker) deixa o job para ser retomado depois de TIMEOUT_HEARTBEAT, até
+MAXIMO_TENTATIVAS_JOB vezes; o upload só é removido quando o job termina.
+"""
+
+import json
+import os
+import time
+import uuid
+from datetime import timedelta
+from enum import Enum
+from sqlalchemy import update, or_, and_
+from . import db
+from .usuario import get_brasilia_time
+from .importacao import (
+    ImportadorEmpresas, LeitorExcelStreaming, ler_registros_json, ler_registros_excel, TAMANHO_LOTE_PADRAO
+)
+from src.metricas import JOBS_LINHAS, JOBS_EMPRESAS, JOBS_FINALIZADOS, JOBS_DURACAO_SEGUNDOS
+
+# Uploads aguardando processamento
+DIRETORIO_JOBS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'jobs')
+
+# Empresas confirmadas por commit
+TAMANHO_BLOCO_JOB = 2000
+
+# Job em processamento sem sinal de vida há mais que isso é retomado (segundos)
+TIMEOUT_HEARTBEAT = 300
+
+# Execuções de um job (reservas) antes de ele ser dado como erro
+MAXIMO_TENTATIVAS_JOB = 3
+
+# Intervalo entre consultas à fila quando não há jobs (segundos)
+INTERVALO_FILA = 2.0
+
+# Erros por linha guardados no job
+LIMITE_DETALHES_ERROS = 1000
+
+TIPO_IMPORTACAO_JSON = 'importacao_json'
+TIPO_IMPORTACAO_EXCEL = 'importacao_excel'
+
+
+class StatusJob(Enum):
+    PENDENTE = "pendente"
+    PROCESSANDO = "processando"
+    CONCLUIDO = "concluido"
+    ERRO = "erro"
+
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.Enum(StatusJob), nullable=False, default=StatusJob.PENDENTE, index=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
+
+    # Arquivo e parâmetros
+    arquivo = db.Column(db.String(500), nullable=False)
+    nome_arquivo = db.Column(db.String(255))
+    parametros = db.Column(db.Text)
+
+    # Progresso (processadas é o checkpoint usado para retomar)
+    total = db.Column(db.Integer)
+    processadas = db.Column(db.Integer, nullable=False, default=0)
+    estatisticas = db.Column(db.Text)
+    erro = db.Column(db.Text)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=get_brasilia_time)
+    iniciado_em = db.Column(db.DateTime)
+    heartbeat_em = db.Column(db.DateTime)
+    concluido_em = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<Job {self.id}: {self.tipo} {self.status.value}>'
+
+    def to_dict(self):
+        estatisticas = json.loads(self.estatisticas) if self.estatisticas else {}
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'status': self.status.value if self.status else None,
+            'nome_arquivo': self.nome_arquivo,
+            'total': self.total,
+            'processadas': self.processadas,
+            'progresso': round(100 * self.processadas / self.total, 1) if self.total else None,
+            'linhas_por_segundo': estatisticas.get('linhas_por_segundo'),
+            'empresas_por_segundo': estatisticas.get('empresas_por_segundo'),
+            'estatisticas': estatisticas,
+            'erro': self.erro,
+            'tentativas': self.tentativas,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'concluido_em': self.concluido_em.isoformat() if self.concluido_em else None
+        }
+
+
+def _somar_estatisticas(acumulado, bloco):
+    """Soma as estatísticas de um bloco às do job e recalcula as taxas"""
+    for chave, valor in bloco.items():
+        if chave == 'detalhes_erros':
+            detalhes = acumulado.setdefault('detalhes_erros', [])
+            detalhes.extend(valor[:max(0, LIMITE_DETALHES_ERROS - len(detalhes))])
+        elif isinstance(valor, (int, float)) and chave not in ('empresas_por_segundo', 'linhas_por_segundo'):
+            acumulado[chave] = acumulado.get(chave, 0) + valor
+
+    duracao = acumulado.get('duracao_segundos') or 0
+    linhas = sum(acumulado.get(chave, 0) for chave in ('linhas_inseridas', 'linhas_removidas', 'criadas', 'atualizadas'))
+    acumulado['duracao_segundos'] = round(duracao, 3)
+    acumulado['empresas_por_segundo'] = round(acumulado.get('total_processadas', 0) / duracao, 1) if duracao else None
+    acumulado['linhas_por_segundo'] = round(linhas / duracao, 1) if duracao else None
+    return acumulado
+
+
+def _em_blocos(registros, erros):
+    """Blocos de um arquivo já lido por inteiro (linhas rejeitadas primeiro)"""
+    if erros:
+        yield [], erros, len(erros)
+    for posicao in range(0, len(registros), TAMANHO_BLOCO_JOB):
+        bloco = registros[posicao:posicao + TAMANHO_BLOCO_JOB]
+        yield bloco, [], len(bloco)
+
+
+class FilaJobs:
+    """Enfileiramento, reserva e execução dos jobs"""
+
+    # ==================== ENFILEIRAMENTO ====================
+
+    @staticmethod
+    def enfileirar(tipo, arquivo, usuario_id=None, parametros=None):
+        """Grava o upload (FileStorage) em disco e cria o job pendente"""
+        os.makedirs(DIRETORIO_JOBS, exist_ok=True)
+        job = Job(
+            tipo=tipo,
+            usuario_id=usuario_id,
+            nome_arquivo=arquivo.filename,
+            parametros=json.dumps(parametros or {})
+        )
+        job.id = uuid.uuid4().hex
+        extensao = os.path.splitext(arquivo.filename or '')[1].lower()
+        job.arquivo = os.path.join(DIRETORIO_JOBS, f"{job.id}{extensao}")
+        arquivo.save(job.arquivo)
+
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    # ==================== RESERVA ====================
+
+    @staticmethod
+    def reservar_proximo():
+        """Reserva o job pendente mais antigo (ou um interrompido); None se a fila estiver vazia"""
+        agora = get_brasilia_time()
+        limite = agora - timedelta(seconds=TIMEOUT_HEARTBEAT)
+        FilaJobs._encerrar_esgotados(limite)
+        disponivel = or_(
+            Job.status == StatusJob.PENDENTE,
+            and_(Job.status == StatusJob.PROCESSANDO, Job.heartbeat_em < limite,
+                 Job.tentativas < MAXIMO_TENTATIVAS_JOB)
+        )
+
+        candidatos = db.session.query(Job.id).filter(disponivel).order_by(Job.created_at).limit(5).all()
+        for (job_id,) in candidatos:
+            # UPDATE condicional: só um worker consegue reservar o mesmo job
+            resultado = db.session.execute(
+                update(Job).where(Job.id == job_id, disponivel).values(
+                    status=StatusJob.PROCESSANDO,
+                    heartbeat_em=agora,
+                    tentativas=Job.tentativas + 1
+                )
+            )
+            db.session.commit()
+            if resultado.rowcount == 1:
+                return db.session.get(Job, job_id)
+        return None
+
+    @staticmethod
+    def _encerrar_esgotados(limite):
+        """Jobs interrompidos sem tentativas restantes (ex.: derrubam o worker) vão para ERRO"""
+        esgotado = and_(
+            Job.status == StatusJob.PROCESSANDO, Job.heartbeat_em < limite,
+            Job.tentativas >= MAXIMO_TENTATIVAS_JOB
+        )
+        for (job_id,) in db.session.query(Job.id).filter(esgotado).all():
+            resultado = db.session.execute(update(Job).where(Job.id == job_id, esgotado).values(
+                status=StatusJob.ERRO,
+                erro=f"Job interrompido {MAXIMO_TENTATIVAS_JOB} vezes sem concluir",
+                concluido_em=get_brasilia_time()
+            ))
+            db.session.commit()
+            if resultado.rowcount == 1:
+                job = db.session.get(Job, job_id)
+                FilaJobs._remover_arquivo(job)
+                JOBS_FINALIZADOS.labels(job.tipo, job.status.value).inc()
+
+    # ==================== EXECUÇÃO ====================
+
+    @staticmethod
+    def executar(job):
+        """Processa o job a partir do checkpoint, confirmando um bloco por vez"""
+        inicio = time.monotonic()
+        try:
+            parametros = json.loads(job.parametros or '{}')
+            total, blocos = FilaJobs._ler_blocos(job, parametros)
+
+            if job.iniciado_em is None:
+                job.iniciado_em = get_brasilia_time()
+            job.total = total
+            estatisticas = json.loads(job.estatisticas) if job.estatisticas else {}
+            db.session.commit()
+
+            tamanho_lote = parametros.get('lote', TAMANHO_LOTE_PADRAO)
+            lidas = 0
+            for registros, erros, linhas in blocos:
+                lidas += linhas
+                if lidas <= job.processadas:
+                    # Bloco já confirmado antes da interrupção
+                    continue
+
+                stats = FilaJobs._importar_bloco(registros, tamanho_lote) if registros else {}
+                if erros:
+                    _somar_estatisticas(stats, {'total_processadas': len(erros), 'erros': len(erros)})
+                    stats['detalhes_erros'] = erros + stats.get('detalhes_erros', [])
+
+                # Dados do bloco e checkpoint no mesmo commit
+                job.estatisticas = json.dumps(_somar_estatisticas(estatisticas, stats))
+                job.processadas = lidas
+                job.total = max(job.total or 0, lidas)
+                job.heartbeat_em = get_brasilia_time()
+                db.session.commit()
+                JOBS_LINHAS.labels(job.tipo).inc(linhas)
+                JOBS_EMPRESAS.labels(job.tipo).inc(stats.get('criadas', 0) + stats.get('atualizadas', 0))
+
+            job.total = job.processadas = lidas
+            job.status = StatusJob.CONCLUIDO
+            job.concluido_em = get_brasilia_time()
+            db.session.commit()
+            FilaJobs._remover_arquivo(job)
+
+        except Exception as e:
+            db.session.rollback()
+            job.erro = str(e)
+            # Arquivo inválido ou ausente não melhora na próxima tentativa
+            if isinstance(e, (ValueError, FileNotFoundError)) or job.tentativas >= MAXIMO_TENTATIVAS_JOB:
+                job.status = StatusJob.ERRO
+                job.concluido_em = get_brasilia_time()
+            else:
+                # Continua PROCESSANDO: é retomado do checkpoint depois do TIMEOUT_HEARTBEAT
+                job.heartbeat_em = get_brasilia_time()
+            db.session.commit()
+            if job.status == StatusJob.ERRO:
+                FilaJobs._remover_arquivo(job)
+
+        if job.status in (StatusJob.CONCLUIDO, StatusJob.ERRO):
+            JOBS_FINALIZADOS.labels(job.tipo, job.status.value).inc()
+        JOBS_DURACAO_SEGUNDOS.labels(job.tipo).observe(time.monotonic() - inicio)
+        return job
+
+    @staticmethod
+    def _importar_bloco(registros, tamanho_lote):
+        """Importa o bloco; se o banco recusar, refaz registro a registro e guarda os recusados"""
+        try:
+            return ImportadorEmpresas(tamanho_lote=tamanho_lote).importar(registros)
+        except Exception:
+            db.session.rollback()
+
+        # Cada registro aceito é confirmado na hora: o upsert por CNPJ torna seguro
+        # refazê-lo se o job for retomado antes do checkpoint do bloco
+        stats = {}
+        for registro in registros:
+            try:
+                parcial = ImportadorEmpresas(tamanho_lote=tamanho_lote).importar([registro])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                recusado = ImportadorEmpresas()
+                recusado.stats['total_processadas'] = 1
+                recusado._erro(registro, str(e).splitlines()[0])
+                parcial = recusado.stats
+            _somar_estatisticas(stats, parcial)
+        return stats
+
+    @staticmethod
+    def _ler_blocos(job, parametros):
+        """
+        (total de linhas, gerador de blocos) conforme o tipo do job.
+        Cada bloco é (registros, linhas rejeitadas na leitura, linhas do arquivo consumidas).
+        """
+        if job.tipo == TIPO_IMPORTACAO_EXCEL and parametros.get('streaming'):
+            leitor = LeitorExcelStreaming(job.arquivo, TAMANHO_BLOCO_JOB)
+            return leitor.total_estimado, leitor.blocos()
+        if job.tipo == TIPO_IMPORTACAO_EXCEL:
+            registros, erros = ler_registros_excel(job.arquivo)
+        elif job.tipo == TIPO_IMPORTACAO_JSON:
+            with open(job.arquivo, encoding='utf-8') as arquivo:
+                conteudo = arquivo.read()
+            registros, erros = ler_registros_json(conteudo, ndjson=job.arquivo.endswith('.ndjson')), []
+        else:
+            raise ValueError(f"Tipo de job desconhecido: {job.tipo}")
+        return len(registros) + len(erros), _em_blocos(registros, erros)
+
+    @staticmethod
+    def _remover_arquivo(job):
+        try:
+            os.remove(job.arquivo)
+        except OSError:
+            pass
+
+    @staticmethod
+    def processar_continuamente(app, intervalo=INTERVALO_FILA):
+        """Loop do worker: executa os jobs da fila, um por vez"""
+        while True:
+            with app.app_context():
+                try:
+                    job = FilaJobs.reservar_proximo()
+                    if job:
+                        FilaJobs.executar(job)
+                        continue
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Erro no worker de jobs: {str(e)}")
+                finally:
+                    db.session.remove()
+            time.sleep(intervalo)
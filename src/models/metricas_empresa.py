@@ -0,0 +1,121 @@
+"""
+Métricas das empresas prestadoras (cotações em que a empresa forneceu o serviço)
+
+Uma única consulta com agregação condicional, agrupada por empresa e
+modalidade, calcula todos os números de um lote de empresas; os totais por
+empresa e as médias saem da soma dos grupos.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+from sqlalchemy.orm import load_only
+from . import db
+from .cotacao import Cotacao, StatusCotacao
+from .empresa import Empresa
+
+# Limite de empresas por chamada do endpoint em lote
+MAXIMO_EMPRESAS_LOTE = 200
+
+# Janela de "cotações recentes"
+DIAS_RECENTES = 180
+
+
+def _contar_se(condicao):
+    return func.sum(case((condicao, 1), else_=0))
+
+
+def _valor_se(condicao, coluna):
+    # NULL fora da condição: sum/count ignoram a linha
+    return case((condicao, coluna), else_=None)
+
+
+def _metricas_vazias():
+    return {
+        'total': 0, 'aceitas': 0, 'negadas': 0, 'finalizadas': 0, 'recentes': 0,
+        'soma_valor': 0.0, 'qtd_valor': 0, 'soma_prazo': 0.0, 'qtd_prazo': 0, 'modalidades': {}
+    }
+
+
+class MetricasEmpresa:
+    """Métricas de cotações por empresa prestadora"""
+
+    @staticmethod
+    def calcular(empresa_ids):
+        """Retorna {empresa_id: metricas} para as empresas informadas (sem cotações = zeros)"""
+        ids = sorted({int(i) for i in empresa_ids})
+        if not ids:
+            return {}
+        acumulado = {empresa_id: _metricas_vazias() for empresa_id in ids}
+
+        aceita = Cotacao.status == StatusCotacao.ACEITA_CONSULTOR
+        valor_aceito = _valor_se(aceita, Cotacao.cotacao_valor_frete)
+        prazo_aceito = _valor_se(aceita, Cotacao.cotacao_prazo_entrega)
+        data_limite = datetime.now() - timedelta(days=DIAS_RECENTES)
+        grupos = db.session.query(
+            Cotacao.empresa_prestadora_id,
+            Cotacao.empresa_transporte,
+            func.count(Cotacao.id),
+            _contar_se(aceita),
+            _contar_se(Cotacao.status == StatusCotacao.NEGADA_CONSULTOR),
+            _contar_se(Cotacao.status == StatusCotacao.FINALIZADA),
+            _contar_se(Cotacao.created_at >= data_limite),
+            func.sum(valor_aceito),
+            func.count(valor_aceito),
+            func.sum(prazo_aceito),
+            func.count(prazo_aceito),
+        ).filter(
+            Cotacao.empresa_prestadora_id.in_(ids)
+        ).group_by(Cotacao.empresa_prestadora_id, Cotacao.empresa_transporte)
+
+        for (empresa_id, modalidade, total, aceitas, negadas, finalizadas, recentes,
+             soma_valor, qtd_valor, soma_prazo, qtd_prazo) in grupos:
+            metricas = acumulado[empresa_id]
+            metricas['total'] += total
+            metricas['aceitas'] += aceitas or 0
+            metricas['negadas'] += negadas or 0
+            metricas['finalizadas'] += finalizadas or 0
+            metricas['recentes'] += recentes or 0
+            metricas['soma_valor'] += float(soma_valor or 0)
+            metricas['qtd_valor'] += qtd_valor
+            metricas['soma_prazo'] += float(soma_prazo or 0)
+            metricas['qtd_prazo'] += qtd_prazo
+            metricas['modalidades'][modalidade.value] = total
+
+        return {empresa_id: MetricasEmpresa._formatar(m) for empresa_id, m in acumulado.items()}
+
+    @staticmethod
+    def _formatar(m):
+        """Mesmo formato que o endpoint de métricas já retornava"""
+        return {
+            'total_cotacoes_solicitadas': m['total'],
+            'cotacoes_aceitas': m['aceitas'],
+            'cotacoes_negadas': m['negadas'],
+            'cotacoes_finalizadas': m['finalizadas'],
+            'taxa_aceitacao': round(m['aceitas'] / m['total'] * 100, 2) if m['total'] else 0,
+            'valor_medio_cotacoes': round(m['soma_valor'] / m['qtd_valor'], 2) if m['qtd_valor'] else 0,
+            'prazo_medio_entrega': round(m['soma_prazo'] / m['qtd_prazo'], 1) if m['qtd_prazo'] else 0,
+            'cotacoes_por_modalidade': m['modalidades'],
+            'cotacoes_ultimos_6_meses': m['recentes']
+        }
+
+    @staticmethod
+    def obter(empresa_ids):
+        """Lista [{'empresa': ..., 'metricas': ...}] na ordem pedida; ids inexistentes ficam de fora"""
+        empresas = {
+            empresa.id: empresa
+            for empresa in Empresa.query.options(
+                load_only(Empresa.id, Empresa.razao_social, Empresa.cnpj)
+            ).filter(Empresa.id.in_(set(empresa_ids)))
+        }
+        metricas = MetricasEmpresa.calcular(empresas.keys())
+        return [
+            {
+                'empresa': {
+                    'id': empresa_id,
+                    'nome': empresas[empresa_id].razao_social,
+                    'cnpj': empresas[empresa_id].cnpj
+                },
+                'metricas': metricas[empresa_id]
+            }
+            for empresa_id in dict.fromkeys(empresa_ids) if empresa_id in empresas
+        ]
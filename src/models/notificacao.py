@@ -3,8 +3,11 @@ Modelo para sistema de notificações
 """
 
 from enum import Enum
+from sqlalchemy import insert
 from . import db
 from .usuario import get_brasilia_time
+from .eventos import BarramentoEventos
+from src.metricas import NOTIFICACOES_FANOUT
 
 class TipoNotificacao(Enum):
     NOVA_COTACAO = "nova_cotacao"  # Para operadores: nova cotação disponível
@@ -14,6 +17,10 @@ class TipoNotificacao(Enum):
 
 class Notificacao(db.Model):
     __tablename__ = 'notificacoes'
+    __table_args__ = (
+        # Não lidas: contagem geral do painel e por usuário
+        db.Index('ix_notificacoes_lida_usuario', 'lida', 'usuario_id'),
+    )
     
     # Identificação
     id = db.Column(db.Integer, primary_key=True)
@@ -53,7 +60,7 @@ class Notificacao(db.Model):
         }
     
     @staticmethod
-    def criar_notificacao(usuario_id, cotacao_id, tipo, titulo, mensagem):
+    def criar_notificacao(usuario_id, cotacao_id, tipo, titulo, mensagem, commit=True):
         """Cria uma nova notificação"""
         notificacao = Notificacao(
             usuario_id=usuario_id,
@@ -64,10 +71,46 @@ class Notificacao(db.Model):
         )
         
         db.session.add(notificacao)
-        db.session.commit()
+        BarramentoEventos.publicar('notificacao', {
+            'cotacao_id': cotacao_id,
+            'tipo': tipo.value,
+            'titulo': titulo,
+            'mensagem': mensagem
+        }, usuario_ids=[usuario_id])
+        if commit:
+            db.session.commit()
         
         return notificacao
     
+    @staticmethod
+    def criar_notificacoes_em_lote(usuario_ids, cotacao_id, tipo, titulo, mensagem):
+        """
+        Cria a mesma notificação para vários usuários com um único INSERT (executemany).
+        Não faz commit: as linhas entram na transação de quem chamou.
+        """
+        linhas = [
+            {
+                'usuario_id': usuario_id,
+                'cotacao_id': cotacao_id,
+                'tipo': tipo,
+                'titulo': titulo,
+                'mensagem': mensagem,
+                'lida': False,
+                'created_at': get_brasilia_time()
+            }
+            for usuario_id in usuario_ids
+        ]
+        if linhas:
+            db.session.execute(insert(Notificacao), linhas)
+            NOTIFICACOES_FANOUT.labels(tipo.value).observe(len(linhas))
+            BarramentoEventos.publicar('notificacao', {
+                'cotacao_id': cotacao_id,
+                'tipo': tipo.value,
+                'titulo': titulo,
+                'mensagem': mensagem
+            }, usuario_ids=usuario_ids)
+        return len(linhas)
+    
     @staticmethod
     def marcar_como_lida(notificacao_id, usuario_id):
         """Marca uma notificação como lida"""
@@ -101,24 +144,27 @@ class Notificacao(db.Model):
     
     @staticmethod
     def notificar_nova_cotacao(cotacao):
-        """Notifica todos os operadores sobre nova cotação"""
-        from .usuario import Usuario
+        """Notifica todos os operadores sobre nova cotação (na transação corrente, sem commit)"""
+        from .usuario import Usuario, TipoUsuario
         
-        operadores = Usuario.query.filter_by(tipo='operador', ativo=True).all()
-        
-        for operador in operadores:
-            titulo = f"Nova Cotação Disponível - {cotacao.numero_cotacao}"
-            mensagem = f"Uma nova cotação foi solicitada por {cotacao.consultor.nome_completo}. " \
-                      f"Empresa: {cotacao.empresa_transporte.value}. " \
-                      f"Cliente: {cotacao.cliente_nome}."
-            
-            Notificacao.criar_notificacao(
-                usuario_id=operador.id,
-                cotacao_id=cotacao.id,
-                tipo=TipoNotificacao.NOVA_COTACAO,
-                titulo=titulo,
-                mensagem=mensagem
+        operador_ids = [
+            operador_id for (operador_id,) in db.session.query(Usuario.id).filter_by(
+                tipo_usuario=TipoUsuario.OPERADOR, ativo=True
             )
+        ]
+        
+        titulo = f"Nova Cotação Disponível - {cotacao.numero_cotacao}"
+        mensagem = f"Uma nova cotação foi solicitada por {cotacao.consultor.nome_completo}. " \
+                  f"Empresa: {cotacao.empresa_transporte.value}. " \
+                  f"Cliente: {cotacao.cliente_nome}."
+        
+        return Notificacao.criar_notificacoes_em_lote(
+            usuario_ids=operador_ids,
+            cotacao_id=cotacao.id,
+            tipo=TipoNotificacao.NOVA_COTACAO,
+            titulo=titulo,
+            mensagem=mensagem
+        )
     
     @staticmethod
     def notificar_cotacao_aceita(cotacao):
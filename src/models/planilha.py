@@ -0,0 +1,202 @@
+"""
+Esquema da planilha Excel de importação de empresas
+
+Uma única definição (abas, colunas, conversões e linhas de exemplo) usada
+tanto pela leitura da planilha (importacao.py) quanto pelo template para
+download. O template é gerado uma vez por versão do esquema e fica em memória.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from io import BytesIO
+
+
+def converter_sim_nao(valor):
+    return str(valor).lower() in ['sim', 'yes', 'true', '1']
+
+
+def converter_data(valor):
+    import pandas as pd
+    return pd.to_datetime(valor).date()
+
+
+CNPJ_EXEMPLO = '12.345.678/0001-90'
+
+# Aba principal: coluna -> valor de exemplo
+ABA_EMPRESAS = 'Empresas'
+COLUNAS_OBRIGATORIAS = ['razao_social', 'cnpj']
+COLUNAS_EMPRESAS = {
+    'razao_social': 'Exemplo Transportes Ltda',
+    'nome_fantasia': 'Exemplo Transportes',
+    'cnpj': CNPJ_EXEMPLO,
+    'inscricao_estadual': '123456789',
+    'endereco_completo': 'Rua Exemplo, 123 - Centro - São Paulo/SP',
+    'telefone_comercial': '(11) 1234-5678',
+    'telefone_emergencial': '(11) 9876-5432',
+    'email': 'contato@exemplo.com.br',
+    'website': 'www.exemplo.com.br',
+    'data_fundacao': '2020-01-15',
+    'etiqueta': 'CADASTRADA'
+}
+
+# Abas relacionadas (ligadas pela coluna cnpj_empresa):
+# chave do registro -> (nomes aceitos da aba, o primeiro vai no template;
+#                       conversão de cada coluna; linhas de exemplo do template)
+ABAS_EXCEL = {
+    'regulamentacoes': (('Regulamentações', 'Regulamentacoes'), {
+        'tipo_regulamentacao': str, 'numero_registro': str, 'data_emissao': converter_data,
+        'data_validade': converter_data, 'orgao_emissor': str
+    }, [
+        {'tipo_regulamentacao': 'RNTRC', 'numero_registro': '123456789', 'data_emissao': '2020-01-01',
+         'data_validade': '2025-01-01', 'orgao_emissor': 'ANTT'}
+    ]),
+    'certificacoes': (('Certificações', 'Certificacoes'), {
+        'nome_certificacao': str, 'numero_certificacao': str, 'data_emissao': converter_data,
+        'data_validade': converter_data, 'orgao_certificador': str
+    }, [
+        {'nome_certificacao': 'ISO 9001', 'numero_certificacao': 'ISO9001-2020-001', 'data_emissao': '2020-01-01',
+         'data_validade': '2023-01-01', 'orgao_certificador': 'Bureau Veritas'}
+    ]),
+    'modalidades_transporte': (('Modalidades', 'Modalidades de Transporte'), {
+        'modalidade': str
+    }, [
+        {'modalidade': 'Rodoviário'},
+        {'modalidade': 'Multimodal'}
+    ]),
+    'tipos_carga': (('Tipos_Carga', 'Tipos de Carga'), {
+        'tipo_carga': str
+    }, [
+        {'tipo_carga': 'Carga Geral'},
+        {'tipo_carga': 'Carga Refrigerada'}
+    ]),
+    'abrangencia_geografica': (('Abrangencia', 'Abrangência Geográfica'), {
+        'tipo_abrangencia': str, 'detalhes': str
+    }, [
+        {'tipo_abrangencia': 'Regional', 'detalhes': 'Sudeste e Sul'}
+    ]),
+    'frota': (('Frota',), {
+        'tipo_frota': str, 'quantidade': int, 'tipo_veiculo': str,
+        'tipo_carroceria': str, 'capacidade': float, 'ano_medio': int
+    }, [
+        {'tipo_frota': 'Própria', 'quantidade': 25, 'tipo_veiculo': 'Carreta',
+         'tipo_carroceria': 'Baú', 'capacidade': 30.0, 'ano_medio': 2018}
+    ]),
+    'armazenagem': (('Armazenagem',), {
+        'possui_armazem': converter_sim_nao, 'localizacao': str, 'capacidade_m2': float,
+        'capacidade_m3': float, 'tipos_armazenagem': str, 'servicos_oferecidos': str
+    }, [
+        {'possui_armazem': 'Sim', 'localizacao': 'São Paulo/SP', 'capacidade_m2': 5000.0, 'capacidade_m3': 15000.0,
+         'tipos_armazenagem': 'Seca, Refrigerada', 'servicos_oferecidos': 'Cross-docking, Picking, Packing'}
+    ]),
+    'portos_terminais': (('Portos', 'Portos e Terminais'), {
+        'nome_porto_terminal': str, 'tipo_terminal': str
+    }, [
+        {'nome_porto_terminal': 'Porto de Santos', 'tipo_terminal': 'Marítimo'},
+        {'nome_porto_terminal': 'Porto de Paranaguá', 'tipo_terminal': 'Marítimo'}
+    ]),
+    'seguros_coberturas': (('Seguros', 'Seguros e Coberturas'), {
+        'tipo_seguro': str, 'numero_apolice': str, 'data_validade': converter_data,
+        'seguradora': str, 'valor_cobertura': str
+    }, [
+        {'tipo_seguro': 'RCTR-C', 'numero_apolice': '123456789', 'data_validade': '2024-12-31',
+         'seguradora': 'Seguradora Exemplo', 'valor_cobertura': 'R$ 200.000,00'}
+    ]),
+    'tecnologias': (('Tecnologias',), {
+        'nome_tecnologia': str, 'detalhes': str
+    }, [
+        {'nome_tecnologia': 'GPS', 'detalhes': 'Rastreamento em tempo real'},
+        {'nome_tecnologia': 'TMS', 'detalhes': 'Sistema de gestão de transporte'}
+    ]),
+    'desempenho_qualidade': (('Desempenho', 'Desempenho e Qualidade'), {
+        'prazo_medio_atendimento': str, 'unidade_prazo': str,
+        'indice_avarias_extravios': float, 'indice_entregas_prazo': float
+    }, [
+        {'prazo_medio_atendimento': '3', 'unidade_prazo': 'dias',
+         'indice_avarias_extravios': 0.5, 'indice_entregas_prazo': 98.5}
+    ]),
+    'clientes_segmentos': (('Clientes', 'Clientes e Segmentos'), {
+        'segmento': str, 'principais_clientes': str
+    }, [
+        {'segmento': 'Varejo', 'principais_clientes': 'Cliente A, Cliente B, Cliente C'}
+    ]),
+    'recursos_humanos': (('RH', 'Recursos Humanos'), {
+        'numero_funcionarios': int, 'programas_treinamento': str
+    }, [
+        {'numero_funcionarios': 150, 'programas_treinamento': 'Direção defensiva, Produtos perigosos'}
+    ]),
+    'sustentabilidade': (('Sustentabilidade',), {
+        'certificacao_ambiental': str, 'programas_reducao_emissoes': str
+    }, [
+        {'certificacao_ambiental': 'ISO 14001', 'programas_reducao_emissoes': 'Frota Euro 6, Biodiesel'}
+    ]),
+}
+
+# Valor usado quando a célula está vazia (demais colunas ficam None)
+PADROES_EXCEL = {'possui_armazem': False, 'unidade_prazo': 'dias'}
+
+
+# ==================== TEMPLATE ====================
+
+def _descricao_esquema():
+    return json.dumps({
+        'empresas': COLUNAS_EMPRESAS,
+        'abas': {
+            chave: [nomes, {coluna: conversao.__name__ for coluna, conversao in colunas.items()}, exemplos]
+            for chave, (nomes, colunas, exemplos) in ABAS_EXCEL.items()
+        }
+    }, sort_keys=True, ensure_ascii=False)
+
+
+# Muda sempre que o esquema muda (ETag do template)
+VERSAO_TEMPLATE = hashlib.sha256(_descricao_esquema().encode('utf-8')).hexdigest()[:16]
+
+# Last-Modified do template: última alteração desta definição
+DATA_TEMPLATE = datetime.fromtimestamp(int(os.path.getmtime(__file__)), tz=timezone.utc)
+
+_templates = {}
+_lock_template = threading.Lock()
+
+
+def gerar_template_excel():
+    """Monta o template (uma aba por definição do esquema) e retorna os bytes do .xlsx"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    abas = [(ABA_EMPRESAS, list(COLUNAS_EMPRESAS), [COLUNAS_EMPRESAS])]
+    for nomes, colunas, exemplos in ABAS_EXCEL.values():
+        abas.append((
+            nomes[0],
+            ['cnpj_empresa'] + list(colunas),
+            [dict(exemplo, cnpj_empresa=CNPJ_EXEMPLO) for exemplo in exemplos]
+        ))
+
+    planilha = Workbook(write_only=True)
+    for nome, colunas, linhas in abas:
+        aba = planilha.create_sheet(nome)
+        cabecalho = []
+        for coluna in colunas:
+            celula = WriteOnlyCell(aba, value=coluna)
+            celula.font = Font(bold=True)
+            cabecalho.append(celula)
+        aba.append(cabecalho)
+        for linha in linhas:
+            aba.append([linha.get(coluna) for coluna in colunas])
+
+    buffer = BytesIO()
+    planilha.save(buffer)
+    return buffer.getvalue()
+
+
+def obter_template_excel():
+    """Bytes do template da versão atual do esquema (gerado só na primeira vez)"""
+    conteudo = _templates.get(VERSAO_TEMPLATE)
+    if conteudo is None:
+        with _lock_template:
+            conteudo = _templates.get(VERSAO_TEMPLATE)
+            if conteudo is None:
+                conteudo = _templates[VERSAO_TEMPLATE] = gerar_template_excel()
+    return conteudo
@@ -0,0 +1,106 @@
+"""
+Rankings de empresas prestadoras, consultores e operadores
+
+Os totais de cada participante (cotações, aceitas pelo consultor e frete) saem
+de rollup_cotacoes_participantes, uma linha por participante e mês. O
+agregado de cada papel/período fica em CacheCompartilhado com a versão
+"cotacoes": só é recalculado depois de uma transição de cotação; os rankings
+(critério, mínimo de cotações, top N) são ordenados a partir dele.
+"""
+
+from sqlalchemy import func, select
+from . import db
+from .empresa import Empresa
+from .usuario import Usuario
+from .cache import CacheCompartilhado
+from .relatorio_cotacoes import (
+    ParticipanteCotacoesMensal, VERSAO_COTACOES, PAPEL_CONSULTOR, PAPEL_OPERADOR, PAPEL_EMPRESA, _meses_periodo
+)
+
+# valor_medio ordena do frete mais baixo para o mais alto; os demais, do maior para o menor
+CRITERIOS = ('taxa_aceitacao', 'volume', 'valor_medio')
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+# Sem transição o agregado continua válido; o prazo só renova nomes alterados
+TTL_AGREGADO = 3600
+
+
+def _agregar(papel, meses):
+    """[{id, nome, tipo, total, aceitas, soma_frete_centavos, qtd_frete}] de todos os participantes do papel"""
+    participantes = ParticipanteCotacoesMensal.__table__
+    if papel == PAPEL_EMPRESA:
+        cadastro = (Empresa.id, Empresa.razao_social)
+    else:
+        cadastro = (Usuario.id, Usuario.nome_completo, Usuario.tipo_usuario)
+    # Join: participantes removidos (ids sem cadastro) ficam de fora
+    consulta = select(
+        *cadastro,
+        func.sum(participantes.c.quantidade),
+        func.sum(participantes.c.aceitas),
+        func.sum(participantes.c.soma_frete_centavos),
+        func.sum(participantes.c.qtd_frete),
+    ).select_from(participantes).join(cadastro[0].class_, cadastro[0] == participantes.c.participante_id).where(
+        participantes.c.papel == papel
+    ).group_by(*cadastro)
+    if meses:
+        consulta = consulta.where(participantes.c.mes >= _meses_periodo(meses)[0])
+
+    agregado = []
+    for linha in db.session.execute(consulta):
+        total, aceitas, soma_frete, qtd_frete = linha[-4:]
+        agregado.append({
+            'id': linha[0], 'nome': linha[1], 'tipo': linha[2].value if len(cadastro) > 2 else None,
+            'total': int(total), 'aceitas': int(aceitas or 0),
+            'soma_frete_centavos': int(soma_frete or 0), 'qtd_frete': int(qtd_frete or 0)
+        })
+    return agregado
+
+
+class RankingCotacoes:
+    """Top N por taxa de aceitação, volume ou frete médio"""
+
+    @staticmethod
+    def agregado(papel, meses=None):
+        """Totais por participante do papel (em cache até a próxima transição de cotação)"""
+        return CacheCompartilhado.obter(
+            f'ranking:{papel}:{meses or "total"}', lambda: _agregar(papel, meses),
+            TTL_AGREGADO, versao_de=VERSAO_COTACOES
+        )
+
+    @staticmethod
+    def gerar(papel, criterio='taxa_aceitacao', limite=LIMITE_PADRAO, minimo=1, meses=None, tipo=None):
+        """
+        Ranking do papel (empresa, consultor ou operador).
+
+        minimo: cotações necessárias para entrar no ranking
+        tipo: só usuários desse tipo (TipoUsuario.value)
+        """
+        if criterio not in CRITERIOS:
+            raise ValueError(f"Critério inválido. Use {', '.join(CRITERIOS)}")
+
+        itens = []
+        for participante in RankingCotacoes.agregado(papel, meses):
+            if participante['total'] < max(minimo, 1) or (tipo and participante['tipo'] != tipo):
+                continue
+            # Sem nenhum frete informado não há como ordenar por valor médio
+            if criterio == 'valor_medio' and not participante['qtd_frete']:
+                continue
+            itens.append({
+                'id': participante['id'],
+                'nome': participante['nome'],
+                'total': participante['total'],
+                'aceitas': participante['aceitas'],
+                'taxa_aceitacao': round(participante['aceitas'] / participante['total'] * 100, 2),
+                'valor_medio': round(participante['soma_frete_centavos'] / participante['qtd_frete'] / 100, 2)
+                               if participante['qtd_frete'] else 0
+            })
+
+        if criterio == 'taxa_aceitacao':
+            itens.sort(key=lambda item: (-item['taxa_aceitacao'], -item['total'], item['id']))
+        elif criterio == 'volume':
+            itens.sort(key=lambda item: (-item['total'], -item['taxa_aceitacao'], item['id']))
+        else:
+            itens.sort(key=lambda item: (item['valor_medio'], -item['total'], item['id']))
+        return itens[:limite]
@@ -0,0 +1,351 @@
+"""
+Rollup das cotações (/analytics/sistema/geral)
+
+Cada cotação conta 1 em rollup_cotacoes_diario, chaveado pelo dia da
+solicitação, status atual, modalidade, consultor e operador. Os mesmos deltas
+alimentam dois agregados mensais pequenos, lidos pelo relatório:
+rollup_cotacoes_mensal (mês, status, modalidade) e
+rollup_cotacoes_participantes (mês, consultor/operador/empresa prestadora, com
+aceitas e soma do frete, usado também pelos rankings).
+
+A chave de cada cotação fica em rollup_cotacoes_contribuicoes; quando uma
+transição é registrada em HistoricoCotacao (ou a cotação muda), só aquela
+cotação é recalculada e a diferença é aplicada no mesmo commit. O relatório de
+12 meses lê algumas centenas de linhas em vez de varrer cotacoes.
+"""
+
+from collections import Counter
+from datetime import date
+from sqlalchemy import bindparam, delete, event, func, insert, literal, or_, select, union_all
+from . import db
+from .cotacao import Cotacao, HistoricoCotacao, StatusCotacao, EmpresaCotacao
+from .notificacao import Notificacao
+from .usuario import get_brasilia_time
+from .busca import VersaoIndice
+from .cache import CacheCompartilhado
+
+TAMANHO_LOTE = 500
+
+# Ids fazem parte das chaves primárias: 0 = cotação ainda sem operador/empresa
+SEM_ID = 0
+
+# Colunas da contribuição (chave do rollup diário + empresa prestadora e frete)
+COLUNAS_CONTRIBUICAO = (
+    'dia', 'status', 'modalidade', 'consultor_id', 'operador_id', 'empresa_id', 'valor_frete_centavos'
+)
+
+PAPEL_CONSULTOR = 'consultor'
+PAPEL_OPERADOR = 'operador'
+PAPEL_EMPRESA = 'empresa'
+
+MESES_RELATORIO = 12
+
+# Nome em VersaoIndice incrementado a cada mudança nos rollups (invalida os caches)
+VERSAO_COTACOES = 'cotacoes'
+
+# Validade do painel em tempo real (segundos)
+TTL_TEMPO_REAL = 5
+
+
+class ContribuicaoRollupCotacao(db.Model):
+    """Chave em que a cotação está contada nos rollups"""
+    __tablename__ = 'rollup_cotacoes_contribuicoes'
+
+    cotacao_id = db.Column(db.Integer, primary_key=True)
+    dia = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(30), nullable=False)
+    modalidade = db.Column(db.String(30), nullable=False)
+    consultor_id = db.Column(db.Integer, nullable=False)
+    operador_id = db.Column(db.Integer, nullable=False)
+    empresa_id = db.Column(db.Integer, nullable=False)
+    valor_frete_centavos = db.Column(db.BigInteger)
+
+
+class RollupCotacoesMensal(db.Model):
+    """Quantidade de cotações por mês (AAAA-MM), status e modalidade"""
+    __tablename__ = 'rollup_cotacoes_mensal'
+
+    mes = db.Column(db.String(7), primary_key=True)
+    status = db.Column(db.String(30), primary_key=True)
+    modalidade = db.Column(db.String(30), primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ParticipanteCotacoesMensal(db.Model):
+    """Cotações de cada consultor, operador e empresa prestadora no mês"""
+    __tablename__ = 'rollup_cotacoes_participantes'
+
+    mes = db.Column(db.String(7), primary_key=True)
+    papel = db.Column(db.String(10), primary_key=True)
+    participante_id = db.Column(db.Integer, primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    # Cotações aceitas pelo consultor
+    aceitas = db.Column(db.Integer, nullable=False, default=0)
+    # Frete das cotações com valor (centavos: somas exatas nos dois bancos)
+    soma_frete_centavos = db.Column(db.BigInteger, nullable=False, default=0)
+    qtd_frete = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RollupCotacoes(db.Model):
+    """Quantidade de cotações por dia, status, modalidade, consultor e operador"""
+    __tablename__ = 'rollup_cotacoes_diario'
+
+    dia = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(30), primary_key=True)
+    modalidade = db.Column(db.String(30), primary_key=True)
+    consultor_id = db.Column(db.Integer, primary_key=True)
+    operador_id = db.Column(db.Integer, primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def garantir_rollup():
+        """Reconstrói o rollup quando ele não cobre todas as cotações (ex.: primeira execução)"""
+        with db.engine.begin() as conexao:
+            total_contribuicoes = conexao.execute(
+                select(func.count()).select_from(ContribuicaoRollupCotacao.__table__)
+            ).scalar()
+            total_cotacoes = conexao.execute(
+                select(func.count()).select_from(Cotacao.__table__).where(
+                    or_(Cotacao.data_solicitacao.isnot(None), Cotacao.created_at.isnot(None))
+                )
+            ).scalar()
+            if total_contribuicoes != total_cotacoes:
+                RollupCotacoes.reconstruir(conexao)
+
+    @staticmethod
+    def reconstruir(conexao):
+        """Recalcula os rollups inteiros"""
+        for modelo in (ContribuicaoRollupCotacao, RollupCotacoes, RollupCotacoesMensal, ParticipanteCotacoesMensal):
+            conexao.execute(delete(modelo.__table__))
+        ids = conexao.execute(select(Cotacao.id)).scalars().all()
+        RollupCotacoes.atualizar(conexao, ids)
+        VersaoIndice.incrementar(conexao, VERSAO_COTACOES)
+
+    @staticmethod
+    def atualizar(conexao, cotacao_ids):
+        """Recalcula a contribuição das cotações informadas e aplica a diferença nos rollups.
+        Retorna quantas cotações mudaram de chave"""
+        ids = sorted({int(i) for i in cotacao_ids if i is not None})
+        return sum(
+            RollupCotacoes._atualizar_lote(conexao, ids[inicio:inicio + TAMANHO_LOTE])
+            for inicio in range(0, len(ids), TAMANHO_LOTE)
+        )
+
+    @staticmethod
+    def _atualizar_lote(conexao, ids):
+        contribuicoes = ContribuicaoRollupCotacao.__table__
+        antigas = {
+            linha[0]: tuple(linha[1:])
+            for linha in conexao.execute(
+                select(contribuicoes.c.cotacao_id, *(contribuicoes.c[coluna] for coluna in COLUNAS_CONTRIBUICAO))
+                .where(contribuicoes.c.cotacao_id.in_(ids))
+            )
+        }
+        novas = {}
+        for linha in conexao.execute(
+            select(
+                Cotacao.id, Cotacao.data_solicitacao, Cotacao.created_at, Cotacao.status,
+                Cotacao.empresa_transporte, Cotacao.consultor_id, Cotacao.operador_id, Cotacao.empresa_prestadora_id,
+                Cotacao.cotacao_valor_frete
+            ).where(Cotacao.id.in_(ids))
+        ):
+            momento = linha.data_solicitacao or linha.created_at
+            if momento is None:
+                continue
+            novas[linha.id] = (
+                momento.date(), linha.status.value, linha.empresa_transporte.value,
+                linha.consultor_id, linha.operador_id or SEM_ID, linha.empresa_prestadora_id or SEM_ID,
+                None if linha.cotacao_valor_frete is None else int(round(linha.cotacao_valor_frete * 100))
+            )
+
+        alteradas = [cotacao_id for cotacao_id in ids if antigas.get(cotacao_id) != novas.get(cotacao_id)]
+        if not alteradas:
+            return 0
+
+        diferencas = {modelo: {} for modelo in (RollupCotacoes, RollupCotacoesMensal, ParticipanteCotacoesMensal)}
+        for cotacao_id in alteradas:
+            for contribuicao, sinal in ((novas.get(cotacao_id), 1), (antigas.get(cotacao_id), -1)):
+                if contribuicao:
+                    for modelo, chave, valores in _chaves(contribuicao):
+                        atual = diferencas[modelo].get(chave) or (0,) * len(valores)
+                        diferencas[modelo][chave] = tuple(a + sinal * v for a, v in zip(atual, valores))
+
+        conexao.execute(delete(contribuicoes).where(contribuicoes.c.cotacao_id.in_(alteradas)))
+        linhas = [
+            dict(zip(('cotacao_id',) + COLUNAS_CONTRIBUICAO, (cotacao_id,) + novas[cotacao_id]))
+            for cotacao_id in alteradas if cotacao_id in novas
+        ]
+        if linhas:
+            conexao.execute(insert(contribuicoes), linhas)
+
+        for modelo, diferenca in diferencas.items():
+            _somar(conexao, modelo.__table__, {chave: delta for chave, delta in diferenca.items() if any(delta)})
+        return len(alteradas)
+
+
+def _chaves(contribuicao):
+    """(modelo, chave, valores) de cada rollup em que a contribuição conta; valores na ordem das colunas"""
+    dia, status, modalidade, consultor_id, operador_id, empresa_id, frete = contribuicao
+    mes = dia.strftime('%Y-%m')
+    yield RollupCotacoes, (dia, status, modalidade, consultor_id, operador_id), (1,)
+    yield RollupCotacoesMensal, (mes, status, modalidade), (1,)
+
+    # quantidade, aceitas, soma_frete_centavos, qtd_frete
+    participacao = (
+        1, 1 if status == StatusCotacao.ACEITA_CONSULTOR.value else 0,
+        frete or 0, 0 if frete is None else 1
+    )
+    yield ParticipanteCotacoesMensal, (mes, PAPEL_CONSULTOR, consultor_id), participacao
+    if operador_id != SEM_ID:
+        yield ParticipanteCotacoesMensal, (mes, PAPEL_OPERADOR, operador_id), participacao
+    if empresa_id != SEM_ID:
+        yield ParticipanteCotacoesMensal, (mes, PAPEL_EMPRESA, empresa_id), participacao
+
+
+def _somar(conexao, tabela, deltas):
+    """
+    Soma os deltas {chave primária: (delta de cada coluna de valor)} na tabela, criando as
+    linhas que faltam, e remove as que ficaram sem cotações (quantidade zerada)
+    """
+    if not deltas:
+        return
+    if conexao.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as inserir
+    else:
+        from sqlalchemy.dialects.sqlite import insert as inserir
+    colunas = [coluna.name for coluna in tabela.primary_key.columns]
+    valores = [coluna.name for coluna in tabela.columns if not coluna.primary_key]
+
+    # Commits concorrentes podem criar a mesma linha: o conflito vira soma
+    comando = inserir(tabela)
+    conexao.execute(comando.on_conflict_do_update(
+        index_elements=list(tabela.primary_key.columns),
+        set_={coluna: tabela.c[coluna] + comando.excluded[coluna] for coluna in valores}
+    ), [{**dict(zip(colunas, chave)), **dict(zip(valores, delta))} for chave, delta in deltas.items()])
+
+    negativas = [chave for chave, delta in deltas.items() if delta[0] < 0]
+    if negativas:
+        conexao.execute(
+            delete(tabela).where(
+                *(tabela.c[coluna] == bindparam(f'chave_{coluna}') for coluna in colunas),
+                tabela.c.quantidade <= 0
+            ),
+            [{f'chave_{coluna}': valor for coluna, valor in zip(colunas, chave)} for chave in negativas]
+        )
+
+
+def _meses_periodo(meses):
+    """Meses (AAAA-MM) do período que termina no mês atual"""
+    hoje = date.today()
+    atual = hoje.year * 12 + hoje.month - 1
+    return [f'{indice // 12:04d}-{indice % 12 + 1:02d}' for indice in range(atual - meses + 1, atual + 1)]
+
+
+class RelatorioCotacoes:
+    """Relatório geral do sistema a partir dos rollups mensais"""
+
+    @staticmethod
+    def gerar(meses=MESES_RELATORIO):
+        periodo = _meses_periodo(meses)
+        mensal = RollupCotacoesMensal.__table__
+        participantes = ParticipanteCotacoesMensal.__table__
+
+        por_status = Counter()
+        por_modalidade = Counter()
+        por_mes = Counter()
+        for mes, status, modalidade, quantidade in db.session.execute(
+            select(mensal.c.mes, mensal.c.status, mensal.c.modalidade, mensal.c.quantidade)
+            .where(mensal.c.mes >= periodo[0])
+        ):
+            por_status[status] += quantidade
+            por_modalidade[modalidade] += quantidade
+            por_mes[mes] += quantidade
+
+        ativos = dict(db.session.execute(
+            select(participantes.c.papel, func.count(participantes.c.participante_id.distinct()))
+            .where(participantes.c.mes >= periodo[0])
+            .group_by(participantes.c.papel)
+        ).all())
+
+        total = sum(por_status.values())
+        finalizadas = por_status[StatusCotacao.FINALIZADA.value]
+        andamento = sum(por_status[s.value] for s in (
+            StatusCotacao.SOLICITADA, StatusCotacao.ACEITA_OPERADOR, StatusCotacao.COTACAO_ENVIADA
+        ))
+
+        return {
+            'periodo': {'inicio': f'{periodo[0]}-01', 'meses': meses},
+            'total_cotacoes': total,
+            'cotacoes_por_status': {s.value: por_status[s.value] for s in StatusCotacao},
+            'total_cotacoes_finalizadas': finalizadas,
+            'cotacoes_andamento': andamento,
+            'taxa_sucesso': round(finalizadas / total * 100, 1) if total else 0,
+            'cotacoes_por_modalidade': {m.value: por_modalidade[m.value] for m in EmpresaCotacao},
+            'usuarios_ativos': {
+                'consultores': ativos.get(PAPEL_CONSULTOR, 0),
+                'operadores': ativos.get(PAPEL_OPERADOR, 0)
+            },
+            'empresas_prestadoras_ativas': ativos.get(PAPEL_EMPRESA, 0),
+            'evolucao_mensal': [{'mes': mes, 'cotacoes': por_mes[mes]} for mes in periodo]
+        }
+
+
+class PainelTempoReal:
+    """Contadores do painel em tempo real, em cache compartilhado entre os workers"""
+
+    @staticmethod
+    def obter():
+        """Snapshot em cache: vale por TTL_TEMPO_REAL segundos ou até a próxima transição de cotação"""
+        return CacheCompartilhado.obter(
+            'painel_tempo_real', PainelTempoReal.calcular, TTL_TEMPO_REAL, versao_de=VERSAO_COTACOES
+        )
+
+    @staticmethod
+    def calcular():
+        """Todos os contadores em uma consulta sobre os rollups (e as notificações não lidas)"""
+        mensal = RollupCotacoesMensal.__table__
+        diario = RollupCotacoes.__table__
+        agora = get_brasilia_time()
+        contadores = dict(db.session.execute(union_all(
+            select(mensal.c.status, func.sum(mensal.c.quantidade)).group_by(mensal.c.status),
+            select(literal('hoje'), func.sum(diario.c.quantidade)).where(diario.c.dia == agora.date()),
+            select(literal('notificacoes'), func.count()).select_from(Notificacao).where(Notificacao.lida == False)
+        )).all())
+
+        return {
+            'cotacoes_aguardando_operador': int(contadores.get(StatusCotacao.SOLICITADA.value) or 0),
+            'cotacoes_sendo_processadas': int(contadores.get(StatusCotacao.ACEITA_OPERADOR.value) or 0),
+            'cotacoes_aguardando_consultor': int(contadores.get(StatusCotacao.COTACAO_ENVIADA.value) or 0),
+            'notificacoes_nao_lidas': int(contadores.get('notificacoes') or 0),
+            'cotacoes_criadas_hoje': int(contadores.get('hoje') or 0),
+            'timestamp': agora.isoformat()
+        }
+
+
+# ==================== MANUTENÇÃO AUTOMÁTICA ====================
+
+@event.listens_for(db.session, 'after_flush')
+def _coletar_cotacoes_alteradas(session, flush_context):
+    """Registra as cotações com transição (HistoricoCotacao) ou alteradas no flush"""
+    pendentes = session.info.setdefault('rollup_cotacoes_pendentes', set())
+    for obj in session.new:
+        if isinstance(obj, HistoricoCotacao):
+            pendentes.add(obj.cotacao_id)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Cotacao):
+            pendentes.add(obj.id)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _aplicar_rollup(session):
+    """Aplica as cotações pendentes nos rollups dentro da mesma transação do commit"""
+    # O before_commit roda antes do flush do próprio commit
+    session.flush()
+    pendentes = session.info.pop('rollup_cotacoes_pendentes', set())
+    if pendentes and RollupCotacoes.atualizar(session.connection(), pendentes):
+        VersaoIndice.incrementar(session.connection(), VERSAO_COTACOES)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar_pendentes(session):
+    session.info.pop('rollup_cotacoes_pendentes', None)
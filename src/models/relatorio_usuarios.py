@@ -0,0 +1,155 @@
+"""
+Relatório de desempenho da equipe (consultores e operadores)
+
+Duas consultas agrupadas, uma por consultor_id e outra por operador_id, calculam
+as métricas de todos os usuários de uma vez; o relatório individual usa as
+mesmas consultas filtradas pelo usuário.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from . import db
+from .cotacao import Cotacao, StatusCotacao
+from .usuario import Usuario, TipoUsuario
+from .metricas_empresa import _contar_se, _valor_se
+
+# Janela da "atividade recente"
+DIAS_ATIVIDADE = 30
+
+# Colunas do CSV (métrica -> cabeçalho), na ordem do arquivo
+COLUNAS_CSV = (
+    ('id', 'id'), ('nome', 'nome'), ('username', 'username'), ('tipo', 'tipo'),
+    ('consultor.total_cotacoes_solicitadas', 'consultor_solicitadas'),
+    ('consultor.cotacoes_aceitas', 'consultor_aceitas'),
+    ('consultor.cotacoes_negadas', 'consultor_negadas'),
+    ('consultor.cotacoes_finalizadas', 'consultor_finalizadas'),
+    ('consultor.taxa_aceitacao_propria', 'consultor_taxa_aceitacao'),
+    ('consultor.valor_total_cotacoes_aceitas', 'consultor_valor_aceito'),
+    ('consultor.atividade_ultimos_30_dias', 'consultor_atividade_30_dias'),
+    ('operador.total_cotacoes_aceitas', 'operador_aceitas'),
+    ('operador.cotacoes_respondidas', 'operador_respondidas'),
+    ('operador.cotacoes_aceitas_consultor', 'operador_aceitas_consultor'),
+    ('operador.cotacoes_negadas_consultor', 'operador_negadas_consultor'),
+    ('operador.taxa_conversao', 'operador_taxa_conversao'),
+    ('operador.valor_total_cotacoes_aceitas', 'operador_valor_aceito'),
+    ('operador.atividade_ultimos_30_dias', 'operador_atividade_30_dias'),
+)
+
+
+def _filtrar_periodo(query, inicio, fim):
+    """Cotações solicitadas entre inicio e fim (datas inclusivas)"""
+    if inicio:
+        query = query.filter(Cotacao.data_solicitacao >= inicio)
+    if fim:
+        query = query.filter(Cotacao.data_solicitacao < fim + timedelta(days=1))
+    return query
+
+
+class RelatorioEquipe:
+    """Métricas de consultor e de operador por usuário"""
+
+    @staticmethod
+    def calcular(usuario_ids=None, inicio=None, fim=None):
+        """Retorna ({usuario_id: metricas_consultor}, {usuario_id: metricas_operador})"""
+        data_limite = datetime.now() - timedelta(days=DIAS_ATIVIDADE)
+        aceita = Cotacao.status == StatusCotacao.ACEITA_CONSULTOR
+        valor_aceito = func.sum(_valor_se(aceita, Cotacao.cotacao_valor_frete))
+
+        consultores = _filtrar_periodo(db.session.query(
+            Cotacao.consultor_id,
+            func.count(Cotacao.id),
+            _contar_se(aceita),
+            _contar_se(Cotacao.status == StatusCotacao.NEGADA_CONSULTOR),
+            _contar_se(Cotacao.status == StatusCotacao.FINALIZADA),
+            valor_aceito,
+            _contar_se(Cotacao.created_at >= data_limite),
+        ), inicio, fim)
+        operadores = _filtrar_periodo(db.session.query(
+            Cotacao.operador_id,
+            func.count(Cotacao.id),
+            _contar_se(Cotacao.status == StatusCotacao.COTACAO_ENVIADA),
+            _contar_se(aceita),
+            _contar_se(Cotacao.status == StatusCotacao.NEGADA_CONSULTOR),
+            valor_aceito,
+            _contar_se(Cotacao.data_aceite_operador >= data_limite),
+        ).filter(Cotacao.operador_id.isnot(None)), inicio, fim)
+        if usuario_ids is not None:
+            consultores = consultores.filter(Cotacao.consultor_id.in_(usuario_ids))
+            operadores = operadores.filter(Cotacao.operador_id.in_(usuario_ids))
+
+        metricas_consultor = {}
+        for usuario_id, total, aceitas, negadas, finalizadas, valor, recentes in consultores.group_by(Cotacao.consultor_id):
+            aceitas = aceitas or 0
+            metricas_consultor[usuario_id] = {
+                'total_cotacoes_solicitadas': total,
+                'cotacoes_aceitas': aceitas,
+                'cotacoes_negadas': negadas or 0,
+                'cotacoes_finalizadas': finalizadas or 0,
+                'taxa_aceitacao_propria': round(aceitas / total * 100, 2) if total else 0,
+                'valor_total_cotacoes_aceitas': round(float(valor or 0), 2),
+                'atividade_ultimos_30_dias': recentes or 0
+            }
+
+        metricas_operador = {}
+        for usuario_id, total, respondidas, aceitas, negadas, valor, recentes in operadores.group_by(Cotacao.operador_id):
+            respondidas, aceitas = respondidas or 0, aceitas or 0
+            metricas_operador[usuario_id] = {
+                'total_cotacoes_aceitas': total,
+                'cotacoes_respondidas': respondidas,
+                'cotacoes_aceitas_consultor': aceitas,
+                'cotacoes_negadas_consultor': negadas or 0,
+                # Aceitas pelo consultor / respondidas
+                'taxa_conversao': round(aceitas / respondidas * 100, 2) if respondidas else 0,
+                'valor_total_cotacoes_aceitas': round(float(valor or 0), 2),
+                'atividade_ultimos_30_dias': recentes or 0
+            }
+
+        return metricas_consultor, metricas_operador
+
+    @staticmethod
+    def gerar(inicio=None, fim=None):
+        """
+        Um item por usuário com o papel (consultor/operador) ou com cotações no período;
+        usuários sem cotações no papel recebem métricas zeradas.
+        """
+        metricas_consultor, metricas_operador = RelatorioEquipe.calcular(inicio=inicio, fim=fim)
+        itens = []
+        for usuario in Usuario.query.order_by(Usuario.nome_completo, Usuario.id):
+            consultor = metricas_consultor.get(usuario.id)
+            operador = metricas_operador.get(usuario.id)
+            if consultor is None and usuario.tipo_usuario == TipoUsuario.CONSULTOR:
+                consultor = RelatorioEquipe.metricas_zeradas('consultor')
+            if operador is None and usuario.tipo_usuario == TipoUsuario.OPERADOR:
+                operador = RelatorioEquipe.metricas_zeradas('operador')
+            if consultor is None and operador is None:
+                continue
+            itens.append({
+                'usuario': {
+                    'id': usuario.id,
+                    'nome': usuario.nome_completo,
+                    'username': usuario.username,
+                    'tipo': usuario.tipo_usuario.value
+                },
+                'metricas_consultor': consultor,
+                'metricas_operador': operador
+            })
+        return itens
+
+    @staticmethod
+    def metricas_zeradas(papel):
+        """Métricas do papel ('consultor' ou 'operador') sem cotações"""
+        chaves = [coluna.split('.', 1)[1] for coluna, _ in COLUNAS_CSV if coluna.startswith(papel + '.')]
+        return dict.fromkeys(chaves, 0)
+
+    @staticmethod
+    def linha_csv(item):
+        """Valores de um item na ordem de COLUNAS_CSV (vazio quando o usuário não tem o papel)"""
+        blocos = {
+            'consultor': item['metricas_consultor'] or {},
+            'operador': item['metricas_operador'] or {}
+        }
+        valores = []
+        for coluna, _ in COLUNAS_CSV:
+            papel, _, chave = coluna.partition('.')
+            valores.append(blocos[papel].get(chave, '') if chave else item['usuario'][papel])
+        return valores
@@ -158,6 +158,10 @@ class Usuario(UserMixin, db.Model):
 
 class LogAuditoria(db.Model):
     __tablename__ = 'logs_auditoria'
+    __table_args__ = (
+        # Chave da paginação por cursor
+        db.Index('ix_logs_auditoria_timestamp_id', 'timestamp', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
@@ -171,19 +175,29 @@ class LogAuditoria(db.Model):
     usuario = db.relationship('Usuario', backref='logs_auditoria')
     
     @staticmethod
-    def registrar_acao(usuario_id, acao, recurso, detalhes=None, ip_address=None, user_agent=None):
-        """Registra uma ação no log de auditoria"""
-        log = LogAuditoria(
-            usuario_id=usuario_id,
-            acao=acao,
-            recurso=recurso,
-            detalhes=detalhes,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.session.add(log)
-        db.session.commit()
-        return log
+    def registrar_acao(usuario_id, acao, recurso, detalhes=None, ip_address=None, user_agent=None, commit=True):
+        """
+        Registra uma ação no log de auditoria.
+        Com commit=False o log entra na transação da sessão (gravado no commit de quem chamou);
+        caso contrário vai para a fila de gravação assíncrona (auditoria.py) e retorna None.
+        """
+        registro = {
+            'usuario_id': usuario_id,
+            'acao': acao,
+            'recurso': recurso,
+            'detalhes': detalhes,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'timestamp': get_brasilia_time()
+        }
+        if not commit:
+            log = LogAuditoria(**registro)
+            db.session.add(log)
+            return log
+
+        from .auditoria import gravador_auditoria
+        gravador_auditoria.registrar(registro)
+        return None
     
     def to_dict(self):
         """Converte o log para dicionário"""
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, session, redirect, url_for, render_template_string
 from flask_login import login_user, logout_user, login_required, current_user
 from src.models.usuario import Usuario, LogAuditoria, db
+from src.routes.paginacao import cursor_solicitado, resposta_cursor, chave_filtros
 from datetime import datetime
 import re
 
@@ -648,6 +649,18 @@ def listar_logs():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
         
+        # Paginação por cursor (keyset em timestamp, id)
+        if cursor_solicitado(request.args):
+            logs, paginacao = resposta_cursor(
+                request.args, LogAuditoria.query, [LogAuditoria.timestamp, LogAuditoria.id],
+                chave_total=chave_filtros('logs_auditoria', request.args),
+                limite=per_page
+            )
+            return jsonify({
+                'logs': [log.to_dict() for log in logs],
+                **paginacao
+            }), 200
+        
         logs = LogAuditoria.query.order_by(LogAuditoria.timestamp.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -659,6 +672,8 @@ def listar_logs():
             'current_page': page
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
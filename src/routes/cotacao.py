@@ -2,12 +2,14 @@ from flask import Blueprint, request, jsonify
 from flask_cors import CORS
 from flask_login import login_required, current_user
 from sqlalchemy import or_, and_, desc
+from sqlalchemy.orm import joinedload
 from datetime import datetime, date
 import re
 
 from src.models import db
 from src.models.cotacao import Cotacao, HistoricoCotacao, StatusCotacao, EmpresaCotacao
 from src.models.usuario import Usuario, TipoUsuario, LogAuditoria
+from src.routes.paginacao import cursor_solicitado, resposta_cursor, chave_filtros
 
 cotacao_bp = Blueprint("cotacao", __name__)
 CORS(cotacao_bp)
@@ -81,10 +83,10 @@ def listar_cotacoes():
         # Query base dependendo do tipo de usuário
         if current_user.tipo_usuario == TipoUsuario.CONSULTOR:
             # Consultores só veem suas próprias cotações
-            query = Cotacao.query.filter(Cotacao.consultor_id == current_user.id)
+            query = Cotacao.query_listagem().filter(Cotacao.consultor_id == current_user.id)
         else:
             # Operadores, gerentes e administradores veem todas
-            query = Cotacao.query
+            query = Cotacao.query_listagem()
         
         # Aplicar filtros
         if status:
@@ -136,6 +138,19 @@ def listar_cotacoes():
             except ValueError:
                 pass
         
+        # Paginação por cursor (keyset em data_solicitacao, id)
+        if cursor_solicitado(request.args):
+            cotacoes, paginacao = resposta_cursor(
+                request.args, query, [Cotacao.data_solicitacao, Cotacao.id],
+                chave_total=chave_filtros('cotacoes', request.args, current_user.id),
+                limite=per_page
+            )
+            return jsonify({
+                'success': True,
+                'cotacoes': [cotacao.to_dict() for cotacao in cotacoes],
+                **paginacao
+            }), 200
+        
         # Ordenar por data de solicitação (mais recentes primeiro)
         query = query.order_by(desc(Cotacao.data_solicitacao))
         
@@ -160,6 +175,11 @@ def listar_cotacoes():
             'has_prev': cotacoes_paginadas.has_prev
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -393,7 +413,7 @@ def criar_cotacao():
         )
         
         db.session.add(cotacao)
-        db.session.commit()
+        db.session.flush()  # Para obter o ID
         
         # Registrar no histórico
         HistoricoCotacao.registrar_mudanca(
@@ -401,7 +421,8 @@ def criar_cotacao():
             usuario_id=current_user.id,
             status_anterior=None,
             status_novo=StatusCotacao.SOLICITADA,
-            observacoes=f"Cotação criada pelo consultor {current_user.nome_completo}"
+            observacoes=f"Cotação criada pelo consultor {current_user.nome_completo}",
+            commit=False
         )
         
         # Registrar log de auditoria
@@ -409,9 +430,13 @@ def criar_cotacao():
             usuario_id=current_user.id,
             acao='CRIAR',
             recurso='COTACAO',
-            detalhes=f'Cotação {cotacao.numero_cotacao} criada para cliente {cotacao.cliente_nome}'
+            detalhes=f'Cotação {cotacao.numero_cotacao} criada para cliente {cotacao.cliente_nome}',
+            commit=False
         )
         
+        # Cotação, histórico e auditoria em um único commit
+        db.session.commit()
+        
         return jsonify({
             'success': True,
             'message': 'Cotação criada com sucesso',
@@ -441,7 +466,8 @@ def obter_cotacao(cotacao_id):
             }), 403
         
         # Buscar histórico
-        historico = HistoricoCotacao.query.filter_by(cotacao_id=cotacao_id)\
+        historico = HistoricoCotacao.query.options(joinedload(HistoricoCotacao.usuario))\
+            .filter_by(cotacao_id=cotacao_id)\
             .order_by(HistoricoCotacao.timestamp.desc()).all()
         
         cotacao_data = cotacao.to_dict()
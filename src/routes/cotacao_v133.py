@@ -3,22 +3,35 @@ Rotas adicionais para BRCcSis v1.3.3
 Sistema completo de fluxo de cotações
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app
 from flask_cors import CORS
 from flask_login import login_required, current_user
 from sqlalchemy import or_, and_, desc, func
 from datetime import datetime, date
+import json
+import queue
 import re
+import time
 
 from src.models import db
 from src.models.cotacao import Cotacao, HistoricoCotacao, StatusCotacao, EmpresaCotacao
 from src.models.usuario import Usuario, TipoUsuario
 from src.models.notificacao import Notificacao, TipoNotificacao
+from src.models.eventos import BarramentoEventos
 from src.models.empresa import Empresa
+from src.models.relatorio_cotacoes import RollupCotacoes
+from src.routes.paginacao import cursor_solicitado, resposta_cursor, chave_filtros
 
 cotacao_v133_bp = Blueprint("cotacao_v133", __name__)
 CORS(cotacao_v133_bp)
 
+# Duração máxima de uma conexão SSE (o EventSource do navegador reconecta sozinho)
+DURACAO_MAXIMA_STREAM = 300
+INTERVALO_KEEPALIVE = 15
+
+# Espera sugerida ao cliente quando o processo está no limite de conexões SSE (segundos)
+ESPERA_STREAM_LOTADO = 30
+
 # ==================== ROTAS GERAIS ====================
 
 @cotacao_v133_bp.route("/cotacoes", methods=["GET"])
@@ -40,10 +53,10 @@ def listar_cotacoes():
         # Query base dependendo do tipo de usuário
         if current_user.tipo_usuario == TipoUsuario.CONSULTOR:
             # Consultores só veem suas próprias cotações
-            query = Cotacao.query.filter(Cotacao.consultor_id == current_user.id)
+            query = Cotacao.query_listagem().filter(Cotacao.consultor_id == current_user.id)
         elif current_user.tipo_usuario == TipoUsuario.OPERADOR:
             # Operadores veem cotações disponíveis OU suas próprias
-            query = Cotacao.query.filter(
+            query = Cotacao.query_listagem().filter(
                 or_(
                     Cotacao.status == StatusCotacao.SOLICITADA,
                     Cotacao.operador_id == current_user.id
@@ -51,7 +64,7 @@ def listar_cotacoes():
             )
         else:
             # Administradores e gerentes veem todas
-            query = Cotacao.query
+            query = Cotacao.query_listagem()
         
         # Aplicar filtros
         if status:
@@ -85,6 +98,19 @@ def listar_cotacoes():
             except ValueError:
                 pass
         
+        # Paginação por cursor (keyset em data_solicitacao, id)
+        if cursor_solicitado(request.args):
+            cotacoes, paginacao = resposta_cursor(
+                request.args, query, [Cotacao.data_solicitacao, Cotacao.id],
+                chave_total=chave_filtros('cotacoes_v133', request.args, current_user.id),
+                limite=per_page
+            )
+            return jsonify({
+                'success': True,
+                'cotacoes': [cotacao.to_dict() for cotacao in cotacoes],
+                **paginacao
+            }), 200
+        
         # Ordenar por data de solicitação (mais recentes primeiro)
         query = query.order_by(desc(Cotacao.data_solicitacao))
         
@@ -109,6 +135,11 @@ def listar_cotacoes():
             'has_prev': cotacoes_paginadas.has_prev
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -333,7 +364,7 @@ def criar_cotacao():
         )
         
         db.session.add(cotacao)
-        db.session.commit()
+        db.session.flush()  # Para obter o ID
         
         # Registrar no histórico
         HistoricoCotacao.registrar_mudanca(
@@ -341,18 +372,26 @@ def criar_cotacao():
             usuario_id=current_user.id,
             status_anterior=None,
             status_novo=StatusCotacao.SOLICITADA,
-            observacoes=f"Cotação criada pelo consultor {current_user.nome_completo}"
+            observacoes=f"Cotação criada pelo consultor {current_user.nome_completo}",
+            commit=False
         )
         
+        # Notificar operadores (INSERT em lote na mesma transação)
+        Notificacao.notificar_nova_cotacao(cotacao)
+        
         # Registrar log de auditoria
         from src.models.usuario import LogAuditoria
         LogAuditoria.registrar_acao(
             usuario_id=current_user.id,
             acao='CRIAR',
             recurso='COTACAO',
-            detalhes=f'Cotação {cotacao.numero_cotacao} criada para cliente {cotacao.cliente_nome}'
+            detalhes=f'Cotação {cotacao.numero_cotacao} criada para cliente {cotacao.cliente_nome}',
+            commit=False
         )
         
+        # Cotação, histórico, notificações e auditoria em um único commit
+        db.session.commit()
+        
         return jsonify({
             'success': True,
             'message': 'Cotação criada com sucesso',
@@ -416,7 +455,7 @@ def obter_cotacoes_disponiveis():
             }), 403
         
         # Buscar cotações com status SOLICITADA
-        cotacoes = Cotacao.query.filter_by(
+        cotacoes = Cotacao.query_listagem().filter_by(
             status=StatusCotacao.SOLICITADA
         ).order_by(Cotacao.created_at.desc()).all()
         
@@ -591,11 +630,11 @@ def obter_minhas_operacoes():
         # Para operadores, mostrar apenas suas cotações
         # Para admin/gerente, mostrar todas
         if current_user.tipo_usuario == TipoUsuario.OPERADOR:
-            cotacoes = Cotacao.query.filter_by(
+            cotacoes = Cotacao.query_listagem().filter_by(
                 operador_id=current_user.id
             ).order_by(Cotacao.updated_at.desc()).all()
         else:
-            cotacoes = Cotacao.query.filter(
+            cotacoes = Cotacao.query_listagem().filter(
                 Cotacao.operador_id.isnot(None)
             ).order_by(Cotacao.updated_at.desc()).all()
         
@@ -717,11 +756,11 @@ def obter_minhas_solicitacoes():
         # Para consultores, mostrar apenas suas cotações
         # Para admin/gerente, mostrar todas
         if current_user.tipo_usuario == TipoUsuario.CONSULTOR:
-            cotacoes = Cotacao.query.filter_by(
+            cotacoes = Cotacao.query_listagem().filter_by(
                 consultor_id=current_user.id
             ).order_by(Cotacao.created_at.desc()).all()
         else:
-            cotacoes = Cotacao.query.order_by(Cotacao.created_at.desc()).all()
+            cotacoes = Cotacao.query_listagem().order_by(Cotacao.created_at.desc()).all()
         
         return jsonify({
             'success': True,
@@ -741,7 +780,7 @@ def obter_minhas_solicitacoes():
 def obter_cotacoes_rodoviarias():
     """Obtém cotações rodoviárias"""
     try:
-        cotacoes = Cotacao.query.filter_by(
+        cotacoes = Cotacao.query_listagem().filter_by(
             empresa_transporte=EmpresaCotacao.BRCARGO_RODOVIARIO
         ).order_by(Cotacao.created_at.desc()).all()
         
@@ -761,7 +800,7 @@ def obter_cotacoes_rodoviarias():
 def obter_cotacoes_maritimas():
     """Obtém cotações marítimas"""
     try:
-        cotacoes = Cotacao.query.filter_by(
+        cotacoes = Cotacao.query_listagem().filter_by(
             empresa_transporte=EmpresaCotacao.BRCARGO_MARITIMO
         ).order_by(Cotacao.created_at.desc()).all()
         
@@ -781,7 +820,7 @@ def obter_cotacoes_maritimas():
 def obter_cotacoes_aereas():
     """Obtém cotações aéreas"""
     try:
-        cotacoes = Cotacao.query.filter_by(
+        cotacoes = Cotacao.query_listagem().filter_by(
             empresa_transporte=EmpresaCotacao.FRETE_AEREO
         ).order_by(Cotacao.created_at.desc()).all()
         
@@ -828,6 +867,62 @@ def obter_notificacoes():
             'message': f'Erro interno: {str(e)}'
         }), 500
 
+def _formatar_evento_sse(evento):
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {json.dumps(evento['dados'], ensure_ascii=False)}\n\n"
+
+@cotacao_v133_bp.route("/notificacoes/stream", methods=["GET"])
+@login_required
+def stream_notificacoes():
+    """Canal SSE com notificações e mudanças de status das cotações (substitui o polling)"""
+    usuario_id = current_user.id
+    fila = BarramentoEventos.assinar(current_app._get_current_object(), usuario_id)
+    if fila is None:
+        # Sem threads para mais uma conexão longa: o painel volta a atualizar por polling
+        return Response(f"retry: {ESPERA_STREAM_LOTADO * 1000}\n\n", status=503, mimetype='text/event-stream', headers={
+            'Retry-After': str(ESPERA_STREAM_LOTADO),
+            'Cache-Control': 'no-cache'
+        })
+    try:
+        # Reconexão: reenviar o que foi perdido desde o último evento recebido
+        ultimo_id = request.headers.get('Last-Event-ID', type=int)
+        pendentes = BarramentoEventos.eventos_desde(usuario_id, ultimo_id) if ultimo_id else []
+        nao_lidas = Notificacao.contar_nao_lidas(usuario_id)
+    except Exception as e:
+        BarramentoEventos.cancelar(usuario_id, fila)
+        return jsonify({
+            'success': False,
+            'message': f'Erro interno: {str(e)}'
+        }), 500
+    
+    def gerar():
+        # Ids da recuperação inicial, que também podem chegar pela fila
+        enviados = {evento['id'] for evento in pendentes}
+        try:
+            yield "retry: 3000\n\n"
+            yield f"event: nao_lidas\ndata: {json.dumps({'total_nao_lidas': nao_lidas})}\n\n"
+            for evento in pendentes:
+                yield _formatar_evento_sse(evento)
+            
+            fim = time.monotonic() + DURACAO_MAXIMA_STREAM
+            while time.monotonic() < fim:
+                try:
+                    evento = fila.get(timeout=INTERVALO_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                # Eventos já enviados na recuperação inicial (o id pode ser menor
+                # que o último enviado: commits fora de ordem)
+                if evento['id'] in enviados:
+                    continue
+                yield _formatar_evento_sse(evento)
+        finally:
+            BarramentoEventos.cancelar(usuario_id, fila)
+    
+    return Response(gerar(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @cotacao_v133_bp.route("/notificacoes/<int:notificacao_id>/marcar-lida", methods=["POST"])
 @login_required
 def marcar_notificacao_lida(notificacao_id):
@@ -943,6 +1038,9 @@ def deletar_todas_cotacoes():
         # Deletar todas as cotações
         Cotacao.query.delete()
         
+        # Exclusão em massa não passa pelos hooks do rollup do relatório geral
+        RollupCotacoes.reconstruir(db.session.connection())
+        
         db.session.commit()
         
         # Registrar log de auditoria
@@ -978,7 +1076,7 @@ def obter_cotacoes_teste():
     """Endpoint temporário para testar dados reais (SEM AUTENTICAÇÃO)"""
     try:
         # Buscar todas as cotações para teste
-        cotacoes = Cotacao.query.order_by(Cotacao.created_at.desc()).limit(10).all()
+        cotacoes = Cotacao.query_listagem().order_by(Cotacao.created_at.desc()).limit(10).all()
         
         return jsonify({
             'success': True,
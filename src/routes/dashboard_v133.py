@@ -3,18 +3,26 @@ Rotas para Dashboard de Análise - BRCcSis v1.3.3
 Métricas e relatórios por empresa, usuário e sistema
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from flask_login import login_required, current_user
 from sqlalchemy import func, and_, or_, desc
-from datetime import datetime, timedelta
-import calendar
+from datetime import date, datetime, timedelta
+import csv
+import io
+import json
 
 from src.models import db
 from src.models.cotacao import Cotacao, StatusCotacao, EmpresaCotacao
 from src.models.usuario import Usuario, TipoUsuario
 from src.models.empresa import Empresa
 from src.models.notificacao import Notificacao
+from src.models.metricas_empresa import MetricasEmpresa, MAXIMO_EMPRESAS_LOTE
+from src.models.relatorio_cotacoes import (
+    RelatorioCotacoes, PainelTempoReal, MESES_RELATORIO, PAPEL_CONSULTOR, PAPEL_OPERADOR, PAPEL_EMPRESA
+)
+from src.models.relatorio_usuarios import RelatorioEquipe, COLUNAS_CSV
+from src.models.ranking import RankingCotacoes, CRITERIOS, LIMITE_PADRAO, LIMITE_MAXIMO
 
 dashboard_v133_bp = Blueprint("dashboard_v133", __name__)
 CORS(dashboard_v133_bp)
@@ -26,128 +34,109 @@ CORS(dashboard_v133_bp)
 def obter_metricas_empresa(empresa_id):
     """Obtém métricas detalhadas de uma empresa específica"""
     try:
-        empresa = Empresa.query.get_or_404(empresa_id)
-        
-        # Cotações onde a empresa foi prestadora do serviço
-        cotacoes_empresa = Cotacao.query.filter_by(empresa_prestadora_id=empresa_id)
-        
-        # Total de cotações
-        total_cotacoes = cotacoes_empresa.count()
-        
-        # Cotações aceitas (aceita_consultor)
-        cotacoes_aceitas = cotacoes_empresa.filter_by(status=StatusCotacao.ACEITA_CONSULTOR).count()
-        
-        # Cotações negadas (negada_consultor)
-        cotacoes_negadas = cotacoes_empresa.filter_by(status=StatusCotacao.NEGADA_CONSULTOR).count()
-        
-        # Taxa de aceitação
-        taxa_aceitacao = (cotacoes_aceitas / total_cotacoes * 100) if total_cotacoes > 0 else 0
-        
-        # Cotações finalizadas
-        cotacoes_finalizadas = cotacoes_empresa.filter_by(status=StatusCotacao.FINALIZADA).count()
-        
-        # Valor médio das cotações aceitas
-        valor_medio = db.session.query(func.avg(Cotacao.cotacao_valor_frete)).filter(
-            and_(
-                Cotacao.empresa_prestadora_id == empresa_id,
-                Cotacao.cotacao_valor_frete.isnot(None),
-                Cotacao.status == StatusCotacao.ACEITA_CONSULTOR
-            )
-        ).scalar() or 0
-        
-        # Prazo médio de entrega
-        prazo_medio = db.session.query(func.avg(Cotacao.cotacao_prazo_entrega)).filter(
-            and_(
-                Cotacao.empresa_prestadora_id == empresa_id,
-                Cotacao.cotacao_prazo_entrega.isnot(None),
-                Cotacao.status == StatusCotacao.ACEITA_CONSULTOR
-            )
-        ).scalar() or 0
-        
-        # Cotações por modalidade
-        cotacoes_por_modalidade = db.session.query(
-            Cotacao.empresa_transporte,
-            func.count(Cotacao.id).label('count')
-        ).filter_by(empresa_prestadora_id=empresa_id).group_by(Cotacao.empresa_transporte).all()
-        
-        modalidades = {}
-        for modalidade, count in cotacoes_por_modalidade:
-            modalidades[modalidade.value] = count
-        
-        # Cotações nos últimos 6 meses
-        data_limite = datetime.now() - timedelta(days=180)
-        cotacoes_recentes = cotacoes_empresa.filter(
-            Cotacao.created_at >= data_limite
-        ).count()
+        resultado = MetricasEmpresa.obter([empresa_id])
+        if not resultado:
+            return jsonify({
+                'success': False,
+                'message': 'Empresa não encontrada'
+            }), 404
+
+        return jsonify({'success': True, **resultado[0]}), 200
         
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erro interno: {str(e)}'
+        }), 500
+
+@dashboard_v133_bp.route("/analytics/empresas/metricas", methods=["GET"])
+@login_required
+def obter_metricas_empresas():
+    """Métricas de várias empresas numa chamada (?ids=1,2,3), para a tela de comparação"""
+    try:
+        try:
+            ids = [int(valor) for valor in request.args.get('ids', '').split(',') if valor.strip()]
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'ids deve ser uma lista de números separados por vírgula'
+            }), 400
+
+        if not ids:
+            return jsonify({
+                'success': False,
+                'message': 'Informe os ids das empresas (?ids=1,2,3)'
+            }), 400
+        if len(ids) > MAXIMO_EMPRESAS_LOTE:
+            return jsonify({
+                'success': False,
+                'message': f'Máximo de {MAXIMO_EMPRESAS_LOTE} empresas por chamada'
+            }), 400
+
+        empresas = MetricasEmpresa.obter(ids)
+        encontradas = {item['empresa']['id'] for item in empresas}
         return jsonify({
             'success': True,
-            'empresa': {
-                'id': empresa.id,
-                'nome': empresa.nome,
-                'cnpj': empresa.cnpj
-            },
-            'metricas': {
-                'total_cotacoes_solicitadas': total_cotacoes,
-                'cotacoes_aceitas': cotacoes_aceitas,
-                'cotacoes_negadas': cotacoes_negadas,
-                'cotacoes_finalizadas': cotacoes_finalizadas,
-                'taxa_aceitacao': round(taxa_aceitacao, 2),
-                'valor_medio_cotacoes': round(float(valor_medio), 2) if valor_medio else 0,
-                'prazo_medio_entrega': round(float(prazo_medio), 1) if prazo_medio else 0,
-                'cotacoes_por_modalidade': modalidades,
-                'cotacoes_ultimos_6_meses': cotacoes_recentes
-            }
+            'empresas': empresas,
+            'nao_encontradas': [empresa_id for empresa_id in dict.fromkeys(ids) if empresa_id not in encontradas]
         }), 200
-        
+
     except Exception as e:
         return jsonify({
             'success': False,
             'message': f'Erro interno: {str(e)}'
         }), 500
 
+def _parametros_ranking(minimo_padrao):
+    """(criterio, limite, minimo, meses) da query string; ValueError com a mensagem para o 400"""
+    criterio = request.args.get('criterio', 'taxa_aceitacao')
+    if criterio not in CRITERIOS:
+        raise ValueError(f"criterio deve ser um de: {', '.join(CRITERIOS)}")
+    limite = request.args.get('limite', LIMITE_PADRAO, type=int)
+    minimo = request.args.get('minimo', minimo_padrao, type=int)
+    meses = request.args.get('meses', 0, type=int)
+    if limite is None or not 1 <= limite <= LIMITE_MAXIMO:
+        raise ValueError(f'limite deve estar entre 1 e {LIMITE_MAXIMO}')
+    if minimo is None or minimo < 1:
+        raise ValueError('minimo deve ser pelo menos 1')
+    if meses is None or not 0 <= meses <= 36:
+        raise ValueError('meses deve estar entre 0 (todo o histórico) e 36')
+    return criterio, limite, minimo, meses
+
 @dashboard_v133_bp.route("/analytics/empresas/ranking", methods=["GET"])
 @login_required
 def obter_ranking_empresas():
-    """Obtém ranking das empresas por performance"""
+    """
+    Obtém ranking das empresas por performance.
+
+    ?criterio=taxa_aceitacao|volume|valor_medio, ?limite=50 (top N),
+    ?minimo=3 (cotações para aparecer), ?meses=N (0 = todo o histórico)
+    """
     try:
-        # Ranking por taxa de aceitação
-        ranking_query = db.session.query(
-            Empresa.id,
-            Empresa.nome,
-            func.count(Cotacao.id).label('total_cotacoes'),
-            func.sum(
-                func.case(
-                    (Cotacao.status == StatusCotacao.ACEITA_CONSULTOR, 1),
-                    else_=0
-                )
-            ).label('cotacoes_aceitas'),
-            func.avg(Cotacao.cotacao_valor_frete).label('valor_medio')
-        ).join(
-            Cotacao, Empresa.id == Cotacao.empresa_prestadora_id
-        ).group_by(
-            Empresa.id, Empresa.nome
-        ).having(
-            func.count(Cotacao.id) >= 3  # Pelo menos 3 cotações para aparecer no ranking
-        ).all()
-        
-        ranking = []
-        for empresa_id, nome, total, aceitas, valor_medio in ranking_query:
-            taxa_aceitacao = (aceitas / total * 100) if total > 0 else 0
-            ranking.append({
-                'empresa_id': empresa_id,
-                'nome': nome,
-                'total_cotacoes': total,
-                'cotacoes_aceitas': aceitas or 0,
-                'taxa_aceitacao': round(taxa_aceitacao, 2),
-                'valor_medio': round(float(valor_medio), 2) if valor_medio else 0
-            })
-        
-        # Ordenar por taxa de aceitação
-        ranking.sort(key=lambda x: x['taxa_aceitacao'], reverse=True)
+        try:
+            criterio, limite, minimo, meses = _parametros_ranking(minimo_padrao=3)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        ranking = [
+            {
+                'empresa_id': item['id'],
+                'nome': item['nome'],
+                'total_cotacoes': item['total'],
+                'cotacoes_aceitas': item['aceitas'],
+                'taxa_aceitacao': item['taxa_aceitacao'],
+                'valor_medio': item['valor_medio']
+            }
+            for item in RankingCotacoes.gerar(PAPEL_EMPRESA, criterio, limite, minimo, meses)
+        ]
         
         return jsonify({
             'success': True,
+            'criterio': criterio,
+            'minimo_cotacoes': minimo,
             'ranking': ranking
         }), 200
         
@@ -172,82 +161,32 @@ def obter_relatorio_usuario(usuario_id):
                 'message': 'Acesso negado'
             }), 403
         
-        usuario = Usuario.query.get_or_404(usuario_id)
+        usuario = db.session.get(Usuario, usuario_id)
+        if not usuario:
+            return jsonify({
+                'success': False,
+                'message': 'Usuário não encontrado'
+            }), 404
         
         relatorio = {
             'usuario': {
                 'id': usuario.id,
-                'nome': usuario.nome,
+                'nome': usuario.nome_completo,
                 'tipo': usuario.tipo_usuario.value
             }
         }
         
+        metricas_consultor, metricas_operador = RelatorioEquipe.calcular(usuario_ids=[usuario_id])
         if usuario.tipo_usuario == TipoUsuario.CONSULTOR:
-            # Relatório para consultor
-            cotacoes_solicitadas = Cotacao.query.filter_by(consultor_id=usuario_id)
-            
-            total_solicitadas = cotacoes_solicitadas.count()
-            aceitas_consultor = cotacoes_solicitadas.filter_by(status=StatusCotacao.ACEITA_CONSULTOR).count()
-            negadas_consultor = cotacoes_solicitadas.filter_by(status=StatusCotacao.NEGADA_CONSULTOR).count()
-            finalizadas = cotacoes_solicitadas.filter_by(status=StatusCotacao.FINALIZADA).count()
-            
-            # Valor total economizado/gasto
-            valor_total = db.session.query(func.sum(Cotacao.cotacao_valor_frete)).filter(
-                and_(
-                    Cotacao.consultor_id == usuario_id,
-                    Cotacao.status == StatusCotacao.ACEITA_CONSULTOR,
-                    Cotacao.cotacao_valor_frete.isnot(None)
-                )
-            ).scalar() or 0
-            
-            relatorio['metricas_consultor'] = {
-                'total_cotacoes_solicitadas': total_solicitadas,
-                'cotacoes_aceitas': aceitas_consultor,
-                'cotacoes_negadas': negadas_consultor,
-                'cotacoes_finalizadas': finalizadas,
-                'taxa_aceitacao_propria': round((aceitas_consultor / total_solicitadas * 100) if total_solicitadas > 0 else 0, 2),
-                'valor_total_cotacoes_aceitas': round(float(valor_total), 2)
-            }
-            
-        elif usuario.tipo_usuario == TipoUsuario.OPERADOR:
-            # Relatório para operador
-            cotacoes_operadas = Cotacao.query.filter_by(operador_id=usuario_id)
-            
-            total_aceitas_operador = cotacoes_operadas.count()
-            respondidas = cotacoes_operadas.filter_by(status=StatusCotacao.COTACAO_ENVIADA).count()
-            aceitas_final = cotacoes_operadas.filter_by(status=StatusCotacao.ACEITA_CONSULTOR).count()
-            negadas_final = cotacoes_operadas.filter_by(status=StatusCotacao.NEGADA_CONSULTOR).count()
-            
-            # Taxa de conversão (aceitas pelo consultor / respondidas)
-            taxa_conversao = (aceitas_final / respondidas * 100) if respondidas > 0 else 0
-            
-            relatorio['metricas_operador'] = {
-                'total_cotacoes_aceitas': total_aceitas_operador,
-                'cotacoes_respondidas': respondidas,
-                'cotacoes_aceitas_consultor': aceitas_final,
-                'cotacoes_negadas_consultor': negadas_final,
-                'taxa_conversao': round(taxa_conversao, 2)
-            }
-        
-        # Atividade nos últimos 30 dias
-        data_limite = datetime.now() - timedelta(days=30)
-        
-        if usuario.tipo_usuario == TipoUsuario.CONSULTOR:
-            atividade_recente = Cotacao.query.filter(
-                and_(
-                    Cotacao.consultor_id == usuario_id,
-                    Cotacao.created_at >= data_limite
-                )
-            ).count()
+            metricas = metricas_consultor.get(usuario_id) or RelatorioEquipe.metricas_zeradas('consultor')
+            relatorio['metricas_consultor'] = metricas
         else:
-            atividade_recente = Cotacao.query.filter(
-                and_(
-                    Cotacao.operador_id == usuario_id,
-                    Cotacao.data_aceite_operador >= data_limite
-                )
-            ).count()
+            metricas = metricas_operador.get(usuario_id) or RelatorioEquipe.metricas_zeradas('operador')
+            if usuario.tipo_usuario == TipoUsuario.OPERADOR:
+                relatorio['metricas_operador'] = metricas
         
-        relatorio['atividade_ultimos_30_dias'] = atividade_recente
+        # Atividade nos últimos 30 dias
+        relatorio['atividade_ultimos_30_dias'] = metricas['atividade_ultimos_30_dias']
         
         return jsonify({
             'success': True,
@@ -260,83 +199,76 @@ def obter_relatorio_usuario(usuario_id):
             'message': f'Erro interno: {str(e)}'
         }), 500
 
-@dashboard_v133_bp.route("/analytics/usuarios/ranking", methods=["GET"])
+@dashboard_v133_bp.route("/analytics/usuarios/relatorio", methods=["GET"])
 @login_required
-def obter_ranking_usuarios():
-    """Obtém ranking de usuários por performance"""
+def obter_relatorio_equipe():
+    """
+    Relatório de todos os usuários (métricas de consultor e de operador) em uma chamada.
+
+    ?inicio=AAAA-MM-DD&fim=AAAA-MM-DD limitam as cotações pela data de solicitação;
+    ?formato=json (padrão) ou csv, enviado em streaming.
+    """
     try:
-        # Verificar permissão
         if current_user.tipo_usuario not in [TipoUsuario.ADMINISTRADOR, TipoUsuario.GERENTE]:
             return jsonify({
                 'success': False,
                 'message': 'Acesso negado'
             }), 403
         
-        # Ranking de consultores
-        ranking_consultores = db.session.query(
-            Usuario.id,
-            Usuario.nome,
-            func.count(Cotacao.id).label('total_solicitadas'),
-            func.sum(
-                func.case(
-                    (Cotacao.status == StatusCotacao.ACEITA_CONSULTOR, 1),
-                    else_=0
-                )
-            ).label('aceitas')
-        ).join(
-            Cotacao, Usuario.id == Cotacao.consultor_id
-        ).filter(
-            Usuario.tipo_usuario == TipoUsuario.CONSULTOR
-        ).group_by(
-            Usuario.id, Usuario.nome
-        ).all()
-        
-        consultores = []
-        for user_id, nome, total, aceitas in ranking_consultores:
-            taxa = (aceitas / total * 100) if total > 0 else 0
-            consultores.append({
-                'usuario_id': user_id,
-                'nome': nome,
-                'total_solicitadas': total,
-                'aceitas': aceitas or 0,
-                'taxa_aceitacao': round(taxa, 2)
-            })
-        
-        # Ranking de operadores
-        ranking_operadores = db.session.query(
-            Usuario.id,
-            Usuario.nome,
-            func.count(Cotacao.id).label('total_operadas'),
-            func.sum(
-                func.case(
-                    (Cotacao.status == StatusCotacao.ACEITA_CONSULTOR, 1),
-                    else_=0
-                )
-            ).label('convertidas')
-        ).join(
-            Cotacao, Usuario.id == Cotacao.operador_id
-        ).filter(
-            Usuario.tipo_usuario == TipoUsuario.OPERADOR
-        ).group_by(
-            Usuario.id, Usuario.nome
-        ).all()
+        formato = request.args.get('formato', 'json').lower()
+        if formato not in ('json', 'csv'):
+            return jsonify({
+                'success': False,
+                'message': 'Formato inválido. Use json ou csv'
+            }), 400
+        try:
+            inicio, fim = (
+                date.fromisoformat(request.args[nome]) if request.args.get(nome) else None
+                for nome in ('inicio', 'fim')
+            )
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'Datas inválidas (use AAAA-MM-DD)'
+            }), 400
+        if inicio and fim and inicio > fim:
+            return jsonify({
+                'success': False,
+                'message': 'inicio deve ser anterior a fim'
+            }), 400
         
-        operadores = []
-        for user_id, nome, total, convertidas in ranking_operadores:
-            taxa = (convertidas / total * 100) if total > 0 else 0
-            operadores.append({
-                'usuario_id': user_id,
-                'nome': nome,
-                'total_operadas': total,
-                'convertidas': convertidas or 0,
-                'taxa_conversao': round(taxa, 2)
-            })
+        itens = RelatorioEquipe.gerar(inicio=inicio, fim=fim)
+        periodo = {
+            'inicio': inicio.isoformat() if inicio else None,
+            'fim': fim.isoformat() if fim else None
+        }
         
-        return jsonify({
-            'success': True,
-            'ranking_consultores': sorted(consultores, key=lambda x: x['taxa_aceitacao'], reverse=True),
-            'ranking_operadores': sorted(operadores, key=lambda x: x['taxa_conversao'], reverse=True)
-        }), 200
+        if formato == 'csv':
+            def gerar():
+                buffer = io.StringIO()
+                escritor = csv.writer(buffer)
+                escritor.writerow([cabecalho for _, cabecalho in COLUNAS_CSV])
+                for item in itens:
+                    escritor.writerow(RelatorioEquipe.linha_csv(item))
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                yield buffer.getvalue()
+            mimetype = 'text/csv'
+        else:
+            def gerar():
+                yield '{"success": true, "periodo": ' + json.dumps(periodo) + ', "usuarios": ['
+                separador = ''
+                for item in itens:
+                    yield separador + json.dumps(item, ensure_ascii=False)
+                    separador = ', '
+                yield ']}'
+            mimetype = 'application/json'
+        
+        nome_arquivo = f"relatorio_equipe_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+        return Response(stream_with_context(gerar()), mimetype=mimetype, headers={
+            "Content-Disposition": f"{'attachment' if formato == 'csv' else 'inline'}; filename={nome_arquivo}"
+        })
         
     except Exception as e:
         return jsonify({
@@ -344,106 +276,84 @@ def obter_ranking_usuarios():
             'message': f'Erro interno: {str(e)}'
         }), 500
 
-# ==================== RELATÓRIOS GERAIS DO SISTEMA ====================
-
-@dashboard_v133_bp.route("/analytics/sistema/geral", methods=["GET"])
+@dashboard_v133_bp.route("/analytics/usuarios/ranking", methods=["GET"])
 @login_required
-def obter_relatorio_geral():
-    """Obtém relatório geral do sistema"""
+def obter_ranking_usuarios():
+    """Obtém ranking de usuários por performance (mesmos parâmetros do ranking de empresas, ?minimo=1)"""
     try:
-        # Dados básicos e seguros
-        total_cotacoes = 3
-        total_finalizadas = 2
-        
-        # Status counts básicos
-        status_counts = {
-            'FINALIZADA': 2,
-            'COTACAO_ENVIADA': 1,
-            'SOLICITADA': 0,
-            'ACEITA_OPERADOR': 0
-        }
-        
-        # Modalidades básicas
-        modalidades = {
-            'BRCARGO_RODOVIARIO': 3,
-            'BRCARGO_MARITIMO': 0,
-            'FRETE_AEREO': 0
-        }
-        
-        # Dados simplificados
-        consultores_ativos = 1
-        operadores_ativos = 1
-        empresas_ativas = 1
+        # Verificar permissão
+        if current_user.tipo_usuario not in [TipoUsuario.ADMINISTRADOR, TipoUsuario.GERENTE]:
+            return jsonify({
+                'success': False,
+                'message': 'Acesso negado'
+            }), 403
         
-        # Evolução mensal simplificada
-        evolucao_mensal = [
-            {'mes': 'Jan', 'cotacoes': 0},
-            {'mes': 'Fev', 'cotacoes': 0},
-            {'mes': 'Mar', 'cotacoes': 0},
-            {'mes': 'Abr', 'cotacoes': 0},
-            {'mes': 'Mai', 'cotacoes': 0},
-            {'mes': 'Jun', 'cotacoes': 0},
-            {'mes': 'Jul', 'cotacoes': 0},
-            {'mes': 'Ago', 'cotacoes': 3},
-            {'mes': 'Set', 'cotacoes': 0}
+        try:
+            criterio, limite, minimo, meses = _parametros_ranking(minimo_padrao=1)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        consultores = [
+            {
+                'usuario_id': item['id'],
+                'nome': item['nome'],
+                'total_solicitadas': item['total'],
+                'aceitas': item['aceitas'],
+                'taxa_aceitacao': item['taxa_aceitacao'],
+                'valor_medio': item['valor_medio']
+            }
+            for item in RankingCotacoes.gerar(
+                PAPEL_CONSULTOR, criterio, limite, minimo, meses, tipo=TipoUsuario.CONSULTOR.value
+            )
+        ]
+        operadores = [
+            {
+                'usuario_id': item['id'],
+                'nome': item['nome'],
+                'total_operadas': item['total'],
+                'convertidas': item['aceitas'],
+                'taxa_conversao': item['taxa_aceitacao'],
+                'valor_medio': item['valor_medio']
+            }
+            for item in RankingCotacoes.gerar(
+                PAPEL_OPERADOR, criterio, limite, minimo, meses, tipo=TipoUsuario.OPERADOR.value
+            )
         ]
         
         return jsonify({
             'success': True,
-            'data': {
-                'total_cotacoes': total_cotacoes,
-                'total_finalizadas': total_finalizadas,
-                'cotacoes_em_andamento': total_cotacoes - total_finalizadas,
-                'taxa_sucesso': round((total_finalizadas / total_cotacoes * 100) if total_cotacoes > 0 else 0, 1),
-                'status_counts': status_counts,
-                'modalidades': modalidades,
-                'consultores_ativos': consultores_ativos,
-                'operadores_ativos': operadores_ativos,
-                'empresas_ativas': empresas_ativas,
-                'evolucao_mensal': evolucao_mensal
-            }
-        })
+            'criterio': criterio,
+            'minimo_cotacoes': minimo,
+            'ranking_consultores': consultores,
+            'ranking_operadores': operadores
+        }), 200
         
     except Exception as e:
-        print(f"Erro ao gerar analytics: {e}")
         return jsonify({
             'success': False,
             'message': f'Erro interno: {str(e)}'
         }), 500
-        
-        # Evolução mensal (últimos 12 meses)
-        evolucao_mensal = []
-        for i in range(12):
-            data_inicio = datetime.now().replace(day=1) - timedelta(days=30*i)
-            data_fim = data_inicio.replace(day=calendar.monthrange(data_inicio.year, data_inicio.month)[1])
-            
-            cotacoes_mes = Cotacao.query.filter(
-                and_(
-                    Cotacao.created_at >= data_inicio,
-                    Cotacao.created_at <= data_fim
-                )
-            ).count()
-            
-            evolucao_mensal.append({
-                'mes': data_inicio.strftime('%Y-%m'),
-                'cotacoes': cotacoes_mes
-            })
-        
-        evolucao_mensal.reverse()  # Ordem cronológica
-        
+
+# ==================== RELATÓRIOS GERAIS DO SISTEMA ====================
+
+@dashboard_v133_bp.route("/analytics/sistema/geral", methods=["GET"])
+@login_required
+def obter_relatorio_geral():
+    """Obtém relatório geral do sistema (últimos ?meses=12, a partir dos rollups de cotações)"""
+    try:
+        meses = request.args.get('meses', MESES_RELATORIO, type=int)
+        if not meses or not 1 <= meses <= 36:
+            return jsonify({
+                'success': False,
+                'message': 'meses deve estar entre 1 e 36'
+            }), 400
+
         return jsonify({
             'success': True,
-            'relatorio_geral': {
-                'cotacoes_por_status': status_counts,
-                'total_cotacoes_finalizadas': total_finalizadas,
-                'cotacoes_por_modalidade': modalidades,
-                'usuarios_ativos': {
-                    'consultores': consultores_ativos,
-                    'operadores': operadores_ativos
-                },
-                'empresas_prestadoras_ativas': empresas_ativas,
-                'evolucao_mensal': evolucao_mensal
-            }
+            'relatorio_geral': RelatorioCotacoes.gerar(meses)
         }), 200
         
     except Exception as e:
@@ -455,32 +365,11 @@ def obter_relatorio_geral():
 @dashboard_v133_bp.route("/analytics/sistema/tempo-real", methods=["GET"])
 @login_required
 def obter_dados_tempo_real():
-    """Obtém dados em tempo real para dashboard"""
+    """Obtém dados em tempo real para dashboard (snapshot compartilhado, ver PainelTempoReal)"""
     try:
-        # Cotações aguardando ação
-        cotacoes_solicitadas = Cotacao.query.filter_by(status=StatusCotacao.SOLICITADA).count()
-        cotacoes_aceitas_operador = Cotacao.query.filter_by(status=StatusCotacao.ACEITA_OPERADOR).count()
-        cotacoes_aguardando_consultor = Cotacao.query.filter_by(status=StatusCotacao.COTACAO_ENVIADA).count()
-        
-        # Notificações não lidas por tipo de usuário
-        notificacoes_nao_lidas = Notificacao.query.filter_by(lida=False).count()
-        
-        # Atividade hoje
-        hoje = datetime.now().date()
-        cotacoes_hoje = Cotacao.query.filter(
-            func.date(Cotacao.created_at) == hoje
-        ).count()
-        
         return jsonify({
             'success': True,
-            'tempo_real': {
-                'cotacoes_aguardando_operador': cotacoes_solicitadas,
-                'cotacoes_sendo_processadas': cotacoes_aceitas_operador,
-                'cotacoes_aguardando_consultor': cotacoes_aguardando_consultor,
-                'notificacoes_nao_lidas': notificacoes_nao_lidas,
-                'cotacoes_criadas_hoje': cotacoes_hoje,
-                'timestamp': datetime.now().isoformat()
-            }
+            'tempo_real': PainelTempoReal.obter()
         }), 200
         
     except Exception as e:
@@ -1,6 +1,8 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 import json
+import zlib
+from io import BytesIO
 from src.models import db
 from src.models.empresa import (
     Empresa, Regulamentacao, Certificacao, ModalidadeTransporte, 
@@ -8,9 +10,20 @@ from src.models.empresa import (
     SeguroCobertura, Tecnologia, DesempenhoQualidade, ClienteSegmento,
     RecursoHumano, Sustentabilidade
 )
+from src.models.busca import IndiceBuscaEmpresa
+from src.models.facetas import IndiceFacetasEmpresa, FACETAS
+from src.models.analytics import (
+    RollupAnalytics, extrair_regiao_do_endereco, DIMENSAO_REGIAO, DIMENSAO_MES,
+    DIMENSAO_TIPO_CARGA, DIMENSAO_CERTIFICACAO, DIMENSAO_METRICA
+)
+from src.models.importacao import TAMANHO_LOTE_PADRAO, LIMITE_STREAMING_EXCEL
+from src.models.jobs import FilaJobs, TIPO_IMPORTACAO_JSON, TIPO_IMPORTACAO_EXCEL
+from src.models.planilha import obter_template_excel, VERSAO_TEMPLATE, DATA_TEMPLATE
 from src.models.usuario import LogAuditoria
-from datetime import datetime
+from src.routes.paginacao import cursor_solicitado, resposta_cursor, chave_filtros, limitar_pagina
+from datetime import datetime, timezone
 from sqlalchemy import or_, and_
+from sqlalchemy.orm import selectinload
 from flask_login import login_required, current_user
 
 empresa_bp = Blueprint("empresa", __name__)
@@ -21,22 +34,11 @@ def get_empresas():
     """Listar todas as empresas com filtros opcionais"""
     try:
         # Parâmetros de filtro
-        razao_social = request.args.get("razao_social")
-        cnpj = request.args.get("cnpj")
+        termo = request.args.get("q")
+        filtros_texto = _filtros_texto(request.args)
         etiqueta = request.args.get("etiqueta")
-        tipo_carga = request.args.get("tipo_carga")
-        modalidade = request.args.get("modalidade")
-        certificacao = request.args.get("certificacao")
-        abrangencia = request.args.get("abrangencia")
         possui_armazem = request.args.get("possui_armazem")
-        portos_atendidos = request.args.get("portos_atendidos")
-        tipo_regulamentacao = request.args.get("tipo_regulamentacao")
-        tipo_frota = request.args.get("tipo_frota")
-        tipo_veiculo = request.args.get("tipo_veiculo")
         possui_seguro = request.args.get("possui_seguro")
-        nome_tecnologia = request.args.get("nome_tecnologia")
-        segmento_cliente = request.args.get("segmento_cliente")
-        certificacao_ambiental = request.args.get("certificacao_ambiental")
         
         # Paginação
         page = request.args.get("page", 1, type=int)
@@ -45,49 +47,16 @@ def get_empresas():
         # Query base
         query = Empresa.query
         
-        # Aplicar filtros
-        if razao_social:
-            query = query.filter(Empresa.razao_social.ilike(f"%{razao_social}%"))
-        
-        if cnpj:
-            query = query.filter(Empresa.cnpj.like(f"%{cnpj}%"))
+        # Filtros de texto
+        query = _aplicar_filtros_texto(query, filtros_texto, termo)
         
         if etiqueta:
             query = query.filter(Empresa.etiqueta == etiqueta)
         
-        if tipo_carga:
-            query = query.join(TipoCarga).filter(TipoCarga.tipo_carga.ilike(f"%{tipo_carga}%"))
-        
-        if modalidade:
-            query = query.join(ModalidadeTransporte).filter(ModalidadeTransporte.modalidade.ilike(f"%{modalidade}%"))
-        
-        if certificacao:
-            query = query.join(Certificacao).filter(Certificacao.nome_certificacao.ilike(f"%{certificacao}%"))
-        
-        if abrangencia:
-            query = query.join(AbrangenciaGeografica).filter(
-                or_(
-                    AbrangenciaGeografica.tipo_abrangencia.ilike(f"%{abrangencia}%"),
-                    AbrangenciaGeografica.detalhes.ilike(f"%{abrangencia}%")
-                )
-            )
-        
         if possui_armazem:
             possui_armazem_bool = possui_armazem.lower() in ["true", "1", "sim"]
             query = query.join(Armazenagem).filter(Armazenagem.possui_armazem == possui_armazem_bool)
         
-        if portos_atendidos:
-            query = query.join(PortoTerminal).filter(PortoTerminal.nome_porto_terminal.ilike(f"%{portos_atendidos}%"))
-        
-        if tipo_regulamentacao:
-            query = query.join(Regulamentacao).filter(Regulamentacao.tipo_regulamentacao.ilike(f"%{tipo_regulamentacao}%"))
-        
-        if tipo_frota:
-            query = query.join(Frota).filter(Frota.tipo_frota.ilike(f"%{tipo_frota}%"))
-        
-        if tipo_veiculo:
-            query = query.join(Frota).filter(Frota.tipo_veiculo.ilike(f"%{tipo_veiculo}%"))
-        
         if possui_seguro:
             possui_seguro_bool = possui_seguro.lower() in ["true", "1", "sim"]
             if possui_seguro_bool:
@@ -96,16 +65,22 @@ def get_empresas():
                 # Empresas que não possuem nenhum registro de seguro
                 query = query.outerjoin(SeguroCobertura).filter(SeguroCobertura.id.is_(None))
         
-        if nome_tecnologia:
-            query = query.join(Tecnologia).filter(Tecnologia.nome_tecnologia.ilike(f"%{nome_tecnologia}%"))
+        query = query.distinct()
         
-        if segmento_cliente:
-            query = query.join(ClienteSegmento).filter(ClienteSegmento.segmento.ilike(f"%{segmento_cliente}%"))
+        # Paginação por cursor (keyset em razao_social, id)
+        if cursor_solicitado(request.args):
+            empresas, paginacao = resposta_cursor(
+                request.args, query, [Empresa.razao_social, Empresa.id],
+                chave_total=chave_filtros('empresas', request.args),
+                limite=per_page, descendente=False
+            )
+            return jsonify({
+                "empresas": [empresa.to_dict() for empresa in empresas],
+                **paginacao
+            })
         
-        if certificacao_ambiental:
-            query = query.join(Sustentabilidade).filter(Sustentabilidade.certificacao_ambiental.ilike(f"%{certificacao_ambiental}%"))
         # Executar query com paginação
-        empresas = query.distinct().paginate(
+        empresas = query.paginate(
             page=page, per_page=per_page, error_out=False
         )
         
@@ -117,6 +92,126 @@ def get_empresas():
             "per_page": per_page
         })
     
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _filtros_texto(args):
+    """Mapeia os parâmetros de texto da listagem para as colunas do índice de busca"""
+    return {
+        "razao_social": args.get("razao_social"),
+        "cnpj": args.get("cnpj"),
+        "tipos_carga": args.get("tipo_carga"),
+        "modalidades": args.get("modalidade"),
+        "certificacoes": args.get("certificacao"),
+        "abrangencia": args.get("abrangencia"),
+        "portos": args.get("portos_atendidos"),
+        "regulamentacoes": args.get("tipo_regulamentacao"),
+        "tipos_frota": args.get("tipo_frota"),
+        "tipos_veiculo": args.get("tipo_veiculo"),
+        "tecnologias": args.get("nome_tecnologia"),
+        "segmentos": args.get("segmento_cliente"),
+        "sustentabilidade": args.get("certificacao_ambiental")
+    }
+
+
+def _aplicar_filtros_texto(query, filtros, termo=None):
+    """Aplica os filtros de texto pelo índice FTS ou, sem ele, por ILIKE + JOIN"""
+    if IndiceBuscaEmpresa.disponivel():
+        return IndiceBuscaEmpresa.filtrar(query, Empresa, filtros, termo=termo)
+    
+    if termo:
+        query = query.filter(or_(
+            Empresa.razao_social.ilike(f"%{termo}%"),
+            Empresa.nome_fantasia.ilike(f"%{termo}%"),
+            Empresa.cnpj.like(f"%{termo}%")
+        ))
+    
+    if filtros.get("razao_social"):
+        query = query.filter(Empresa.razao_social.ilike(f"%{filtros['razao_social']}%"))
+    
+    if filtros.get("cnpj"):
+        query = query.filter(Empresa.cnpj.like(f"%{filtros['cnpj']}%"))
+    
+    if filtros.get("tipos_carga"):
+        query = query.join(TipoCarga).filter(TipoCarga.tipo_carga.ilike(f"%{filtros['tipos_carga']}%"))
+    
+    if filtros.get("modalidades"):
+        query = query.join(ModalidadeTransporte).filter(ModalidadeTransporte.modalidade.ilike(f"%{filtros['modalidades']}%"))
+    
+    if filtros.get("certificacoes"):
+        query = query.join(Certificacao).filter(Certificacao.nome_certificacao.ilike(f"%{filtros['certificacoes']}%"))
+    
+    if filtros.get("abrangencia"):
+        query = query.join(AbrangenciaGeografica).filter(
+            or_(
+                AbrangenciaGeografica.tipo_abrangencia.ilike(f"%{filtros['abrangencia']}%"),
+                AbrangenciaGeografica.detalhes.ilike(f"%{filtros['abrangencia']}%")
+            )
+        )
+    
+    if filtros.get("portos"):
+        query = query.join(PortoTerminal).filter(PortoTerminal.nome_porto_terminal.ilike(f"%{filtros['portos']}%"))
+    
+    if filtros.get("regulamentacoes"):
+        query = query.join(Regulamentacao).filter(Regulamentacao.tipo_regulamentacao.ilike(f"%{filtros['regulamentacoes']}%"))
+    
+    if filtros.get("tipos_frota"):
+        query = query.join(Frota).filter(Frota.tipo_frota.ilike(f"%{filtros['tipos_frota']}%"))
+    
+    if filtros.get("tipos_veiculo"):
+        query = query.join(Frota).filter(Frota.tipo_veiculo.ilike(f"%{filtros['tipos_veiculo']}%"))
+    
+    if filtros.get("tecnologias"):
+        query = query.join(Tecnologia).filter(Tecnologia.nome_tecnologia.ilike(f"%{filtros['tecnologias']}%"))
+    
+    if filtros.get("segmentos"):
+        query = query.join(ClienteSegmento).filter(ClienteSegmento.segmento.ilike(f"%{filtros['segmentos']}%"))
+    
+    if filtros.get("sustentabilidade"):
+        query = query.join(Sustentabilidade).filter(Sustentabilidade.certificacao_ambiental.ilike(f"%{filtros['sustentabilidade']}%"))
+    
+    return query
+
+
+@empresa_bp.route("/empresas/facetas", methods=["GET"])
+def get_empresas_facetas():
+    """Listar empresas com as contagens por faceta do painel de filtros"""
+    try:
+        # Facetas aceitam múltiplos valores (?modalidade=A&modalidade=B)
+        selecionados = {faceta: request.args.getlist(faceta) for faceta in FACETAS}
+        
+        # Busca textual opcional (razão social, CNPJ, termo livre)
+        termo = request.args.get("q")
+        filtros_texto = {
+            "razao_social": request.args.get("razao_social"),
+            "cnpj": request.args.get("cnpj")
+        }
+        ids_restritos = None
+        if termo or any(filtros_texto.values()):
+            query = _aplicar_filtros_texto(db.session.query(Empresa.id), filtros_texto, termo)
+            ids_restritos = {empresa_id for (empresa_id,) in query.distinct()}
+        
+        # Paginação
+        page = max(request.args.get("page", 1, type=int), 1)
+        per_page = limitar_pagina(request.args.get("per_page", 10, type=int))
+        
+        resultado, contagens = IndiceFacetasEmpresa.calcular(selecionados, ids_restritos)
+        ids_pagina, total = IndiceFacetasEmpresa.paginar(resultado, page, per_page)
+        
+        empresas = Empresa.query.filter(Empresa.id.in_(ids_pagina)).order_by(Empresa.id).all() if ids_pagina else []
+        
+        return jsonify({
+            "empresas": [empresa.to_dict() for empresa in empresas],
+            "total": total,
+            "pages": (total + per_page - 1) // per_page,
+            "current_page": page,
+            "per_page": per_page,
+            "facetas": contagens
+        })
+    
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -334,12 +429,24 @@ def search_empresas():
         # Query base
         query = Empresa.query
         
-        # Filtros de texto
-        if data.get("razao_social"):
-            query = query.filter(Empresa.razao_social.ilike(f"%{data['razao_social']}%"))
+        regioes = None
+        if data.get("regioes"):
+            regioes = data["regioes"] if isinstance(data["regioes"], list) else [data["regioes"]]
         
-        if data.get("cnpj"):
-            query = query.filter(Empresa.cnpj.like(f"%{data['cnpj']}%"))
+        # Filtros de texto: índice FTS quando disponível
+        usar_indice = IndiceBuscaEmpresa.disponivel()
+        if usar_indice:
+            query = IndiceBuscaEmpresa.filtrar(query, Empresa, {
+                "razao_social": data.get("razao_social"),
+                "cnpj": data.get("cnpj"),
+                "abrangencia": regioes
+            }, termo=data.get("q"))
+        else:
+            if data.get("razao_social"):
+                query = query.filter(Empresa.razao_social.ilike(f"%{data['razao_social']}%"))
+            
+            if data.get("cnpj"):
+                query = query.filter(Empresa.cnpj.like(f"%{data['cnpj']}%"))
         
         # Filtros por relacionamentos
         if data.get("tipos_carga"):
@@ -354,8 +461,7 @@ def search_empresas():
             certificacoes = data["certificacoes"] if isinstance(data["certificacoes"], list) else [data["certificacoes"]]
             query = query.join(Certificacao).filter(Certificacao.nome_certificacao.in_(certificacoes))
         
-        if data.get("regioes"):
-            regioes = data["regioes"] if isinstance(data["regioes"], list) else [data["regioes"]]
+        if regioes and not usar_indice:
             conditions = []
             for regiao in regioes:
                 conditions.append(AbrangenciaGeografica.tipo_abrangencia.ilike(f"%{regiao}%"))
@@ -643,10 +749,12 @@ def _add_related_data(empresa, data):
 def get_analytics():
     """Retorna dados analytics para o dashboard"""
     try:
-        # Buscar todas as empresas
-        empresas = Empresa.query.all()
+        # Totais pré-agregados (mantidos a cada escrita em empresas)
+        rollup = RollupAnalytics.obter()
+        metricas = rollup.get(DIMENSAO_METRICA, {})
+        total_empresas = metricas.get('total', 0)
         
-        if not empresas:
+        if not total_empresas:
             # Retornar dados de exemplo se não houver empresas
             return jsonify({
                 'empresasPorRegiao': [
@@ -669,15 +777,8 @@ def get_analytics():
             })
         
         # Análise por região
-        regioes_count = {}
-        for empresa in empresas:
-            endereco = empresa.endereco_completo if empresa.endereco_completo else 'Não informado'
-            regiao = extrair_regiao_do_endereco(endereco)
-            regioes_count[regiao] = regioes_count.get(regiao, 0) + 1
-        
-        total_empresas = len(empresas)
         empresas_por_regiao = []
-        for regiao, count in regioes_count.items():
+        for regiao, count in rollup.get(DIMENSAO_REGIAO, {}).items():
             porcentagem = round((count / total_empresas) * 100, 1)
             empresas_por_regiao.append({
                 'regiao': regiao,
@@ -686,58 +787,47 @@ def get_analytics():
             })
         
         # Análise de tipos de carga
-        tipos_carga_count = {}
-        for empresa in empresas:
-            for tipo_carga in empresa.tipos_carga:
-                tipo = tipo_carga.tipo_carga if tipo_carga.tipo_carga else 'Não informado'
-                tipos_carga_count[tipo] = tipos_carga_count.get(tipo, 0) + 1
-        
         tipos_carga = []
-        for tipo, count in sorted(tipos_carga_count.items(), key=lambda x: x[1], reverse=True)[:6]:
+        for tipo, count in sorted(rollup.get(DIMENSAO_TIPO_CARGA, {}).items(), key=lambda x: x[1], reverse=True)[:6]:
             tipos_carga.append({
                 'tipo': tipo,
                 'quantidade': count
             })
         
         # Análise de certificações
-        certificacoes_count = {}
-        for empresa in empresas:
-            for certificacao in empresa.certificacoes:
-                nome = certificacao.nome_certificacao if certificacao.nome_certificacao else 'Não informado'
-                certificacoes_count[nome] = certificacoes_count.get(nome, 0) + 1
-        
         certificacoes = []
-        for cert, count in sorted(certificacoes_count.items(), key=lambda x: x[1], reverse=True)[:6]:
+        for cert, count in sorted(rollup.get(DIMENSAO_CERTIFICACAO, {}).items(), key=lambda x: x[1], reverse=True)[:6]:
             certificacoes.append({
                 'certificacao': cert,
                 'quantidade': count
             })
         
-        # Crescimento mensal (simulado baseado no número atual de empresas)
+        # Crescimento mensal: total acumulado de empresas ao fim de cada um dos últimos 6 meses
         import datetime
+        cadastros_por_mes = rollup.get(DIMENSAO_MES, {})
         hoje = datetime.date.today()
+        meses = []
+        ano, mes = hoje.year, hoje.month
+        for _ in range(6):
+            meses.insert(0, (ano, mes))
+            ano, mes = (ano, mes - 1) if mes > 1 else (ano - 1, 12)
+        
+        primeiro_mes = f"{meses[0][0]:04d}-{meses[0][1]:02d}"
+        acumulado = sum(count for mes_chave, count in cadastros_por_mes.items() if mes_chave < primeiro_mes)
         crescimento_mensal = []
-        
-        for i in range(6):
-            mes_data = hoje.replace(day=1) - datetime.timedelta(days=30*i)
-            mes_nome = mes_data.strftime('%b')
-            # Simular crescimento gradual
-            empresas_no_mes = max(1, total_empresas - (5-i) * 2)
-            crescimento_mensal.insert(0, {
-                'mes': mes_nome,
-                'empresas': empresas_no_mes
+        for ano, mes in meses:
+            acumulado += cadastros_por_mes.get(f"{ano:04d}-{mes:02d}", 0)
+            crescimento_mensal.append({
+                'mes': datetime.date(ano, mes, 1).strftime('%b'),
+                'empresas': acumulado
             })
         
         # Métricas detalhadas para a tabela
-        empresas_certificadas = len(set(empresa.id for empresa in empresas for cert in empresa.certificacoes))
-        empresas_com_armazem = len([empresa for empresa in empresas for arm in empresa.armazenagem if arm.possui_armazem])
-        empresas_abrangencia_nacional = len([empresa for empresa in empresas for abr in empresa.abrangencia_geografica if 'nacional' in abr.tipo_abrangencia.lower()])
-        
         metricas_detalhadas = [
             {'metrica': 'Total de Empresas', 'valor': total_empresas},
-            {'metrica': 'Empresas Certificadas', 'valor': empresas_certificadas},
-            {'metrica': 'Empresas com Armazém', 'valor': empresas_com_armazem},
-            {'metrica': 'Abrangência Nacional', 'valor': empresas_abrangencia_nacional}
+            {'metrica': 'Empresas Certificadas', 'valor': metricas.get('certificadas', 0)},
+            {'metrica': 'Empresas com Armazém', 'valor': metricas.get('com_armazem', 0)},
+            {'metrica': 'Abrangência Nacional', 'valor': metricas.get('abrangencia_nacional', 0)}
         ]
         
         return jsonify({
@@ -752,29 +842,6 @@ def get_analytics():
         print(f"Erro ao gerar analytics: {str(e)}")
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
-def extrair_regiao_do_endereco(endereco):
-    """Extrai a região do endereço completo baseado em palavras-chave"""
-    if not endereco or endereco == 'Não informado' or endereco.strip() == '':
-        return 'Não Informado'
-    
-    endereco_upper = endereco.upper()
-    
-    # Mapeamento de estados e cidades para regiões
-    regioes_keywords = {
-        'Sudeste': ['SP', 'SÃO PAULO', 'RJ', 'RIO DE JANEIRO', 'MG', 'MINAS GERAIS', 'BELO HORIZONTE', 'ES', 'ESPÍRITO SANTO', 'VITÓRIA'],
-        'Sul': ['RS', 'RIO GRANDE DO SUL', 'PORTO ALEGRE', 'SC', 'SANTA CATARINA', 'FLORIANÓPOLIS', 'PR', 'PARANÁ', 'CURITIBA'],
-        'Nordeste': ['BA', 'BAHIA', 'SALVADOR', 'PE', 'PERNAMBUCO', 'RECIFE', 'CE', 'CEARÁ', 'FORTALEZA', 'PB', 'PARAÍBA', 'JOÃO PESSOA', 'RN', 'RIO GRANDE DO NORTE', 'NATAL', 'AL', 'ALAGOAS', 'MACEIÓ', 'SE', 'SERGIPE', 'ARACAJU', 'MA', 'MARANHÃO', 'SÃO LUÍS', 'PI', 'PIAUÍ', 'TERESINA'],
-        'Centro-Oeste': ['MT', 'MATO GROSSO', 'CUIABÁ', 'MS', 'MATO GROSSO DO SUL', 'CAMPO GRANDE', 'GO', 'GOIÁS', 'GOIÂNIA', 'DF', 'DISTRITO FEDERAL', 'BRASÍLIA'],
-        'Norte': ['AM', 'AMAZONAS', 'MANAUS', 'PA', 'PARÁ', 'BELÉM', 'AC', 'ACRE', 'RIO BRANCO', 'RR', 'RORAIMA', 'BOA VISTA', 'RO', 'RONDÔNIA', 'PORTO VELHO', 'AP', 'AMAPÁ', 'MACAPÁ', 'TO', 'TOCANTINS', 'PALMAS']
-    }
-    
-    for regiao, keywords in regioes_keywords.items():
-        for keyword in keywords:
-            if keyword in endereco_upper:
-                return regiao
-    
-    return 'Não Informado'
-
 def mapear_estado_para_regiao(estado):
     """Mapeia estado brasileiro para região"""
     if not estado or estado.strip() == '':
@@ -850,29 +917,100 @@ def get_metricas_avancadas():
 
 
 
+# Coleções carregadas em lote (selectin) a cada bloco da exportação
+RELACOES_EXPORTACAO = [
+    'regulamentacoes', 'certificacoes', 'modalidades_transporte', 'tipos_carga',
+    'abrangencia_geografica', 'frota', 'armazenagem', 'portos_terminais',
+    'seguros_coberturas', 'tecnologias', 'desempenho_qualidade', 'clientes_segmentos',
+    'recursos_humanos', 'sustentabilidade'
+]
+TAMANHO_BLOCO_EXPORTACAO = 500
+
+
 @empresa_bp.route("/empresas/export", methods=["GET"])
 def export_empresas():
-    """Exportar todos os dados das empresas em formato JSON"""
+    """
+    Exportar os dados das empresas em streaming.
+
+    ?formato=json (padrão, mesmo layout aceito pelo /empresas/import) ou ndjson
+    (uma linha de metadados seguida de uma empresa por linha);
+    ?gzip=1 comprime a saída durante o envio;
+    ?since=<data ISO> exporta apenas empresas alteradas desde a data (backup incremental;
+    sem fuso horário a data é lida em UTC).
+    """
     try:
-        # Buscar todas as empresas com dados completos
-        empresas = Empresa.query.all()
+        formato = request.args.get('formato', 'json').lower()
+        if formato not in ('json', 'ndjson'):
+            return jsonify({"error": "Formato inválido. Use json ou ndjson"}), 400
+        comprimir = request.args.get('gzip', '').lower() in ('1', 'true', 'sim')
         
-        # Preparar dados para exportação
-        export_data = {
-            "metadata": {
-                "export_date": datetime.utcnow().isoformat(),
-                "total_empresas": len(empresas),
-                "version": "1.0"
-            },
-            "empresas": [empresa.to_dict_complete() for empresa in empresas]
+        query = Empresa.query
+        since = request.args.get('since')
+        if since:
+            try:
+                since_dt = datetime.fromisoformat(since.replace('Z', '+00:00'))
+            except ValueError:
+                return jsonify({"error": "Parâmetro since inválido (use data ISO 8601)"}), 400
+            # updated_at é gravado em UTC sem fuso: datas com fuso são convertidas, sem fuso valem como UTC
+            if since_dt.tzinfo is not None:
+                since_dt = since_dt.astimezone(timezone.utc).replace(tzinfo=None)
+            query = query.filter(Empresa.updated_at >= since_dt)
+        
+        metadata = {
+            "export_date": datetime.utcnow().isoformat(),
+            "total_empresas": query.order_by(None).count(),
+            "version": "1.0"
         }
-        
-        # Retornar dados como JSON para download
-        response = jsonify(export_data)
-        response.headers["Content-Disposition"] = f"attachment; filename=brccsis_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        response.headers["Content-Type"] = "application/json"
-        
-        return response
+        if since:
+            metadata["since"] = since
+        
+        empresas = query.options(
+            *[selectinload(getattr(Empresa, relacao)) for relacao in RELACOES_EXPORTACAO]
+        ).order_by(Empresa.id).yield_per(TAMANHO_BLOCO_EXPORTACAO)
+        
+        def gerar_linhas():
+            if formato == 'ndjson':
+                yield json.dumps({"metadata": metadata}, ensure_ascii=False) + "\n"
+                for empresa in empresas:
+                    yield json.dumps(empresa.to_dict_complete(), ensure_ascii=False) + "\n"
+            else:
+                yield '{"metadata": ' + json.dumps(metadata, ensure_ascii=False) + ', "empresas": ['
+                separador = ''
+                for empresa in empresas:
+                    yield separador + json.dumps(empresa.to_dict_complete(), ensure_ascii=False)
+                    separador = ', '
+                yield ']}'
+        
+        def gerar():
+            if not comprimir:
+                for linha in gerar_linhas():
+                    yield linha.encode('utf-8')
+                return
+            # wbits=31: formato gzip
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            buffer = []
+            tamanho = 0
+            for linha in gerar_linhas():
+                dados = linha.encode('utf-8')
+                buffer.append(dados)
+                tamanho += len(dados)
+                if tamanho >= 64 * 1024:
+                    bloco = compressor.compress(b''.join(buffer))
+                    buffer, tamanho = [], 0
+                    if bloco:
+                        yield bloco
+            yield compressor.compress(b''.join(buffer)) + compressor.flush()
+        
+        extensao = 'ndjson' if formato == 'ndjson' else 'json'
+        mimetype = 'application/x-ndjson' if formato == 'ndjson' else 'application/json'
+        nome_arquivo = f"brccsis_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extensao}"
+        if comprimir:
+            nome_arquivo += '.gz'
+            mimetype = 'application/gzip'
+        
+        return Response(stream_with_context(gerar()), mimetype=mimetype, headers={
+            "Content-Disposition": f"attachment; filename={nome_arquivo}"
+        })
     
     except Exception as e:
         return jsonify({"error": f"Erro ao exportar dados: {str(e)}"}), 500
@@ -880,7 +1018,11 @@ def export_empresas():
 
 @empresa_bp.route("/empresas/import", methods=["POST"])
 def import_empresas():
-    """Importar dados das empresas a partir de arquivo JSON"""
+    """
+    Importar dados das empresas a partir de arquivo JSON (ou NDJSON do export).
+    O arquivo é processado em segundo plano; acompanhe por /api/jobs/<job_id>.
+    ?lote=<n> define quantas empresas são gravadas por bloco.
+    """
     try:
         # Verificar se foi enviado um arquivo
         if 'file' not in request.files:
@@ -891,141 +1033,23 @@ def import_empresas():
             return jsonify({"error": "Nenhum arquivo selecionado"}), 400
         
         # Verificar se é um arquivo JSON
-        if not file.filename.lower().endswith('.json'):
+        if not file.filename.lower().endswith(('.json', '.ndjson')):
             return jsonify({"error": "Arquivo deve ser do tipo JSON"}), 400
         
-        # Ler e processar o arquivo JSON
-        try:
-            import_data = json.loads(file.read().decode('utf-8'))
-        except json.JSONDecodeError:
-            return jsonify({"error": "Arquivo JSON inválido"}), 400
-        
-        # Validar estrutura do arquivo
-        if 'empresas' not in import_data:
-            return jsonify({"error": "Estrutura do arquivo inválida. Campo 'empresas' não encontrado"}), 400
-        
-        empresas_data = import_data['empresas']
-        if not isinstance(empresas_data, list):
-            return jsonify({"error": "Campo 'empresas' deve ser uma lista"}), 400
-        
-        # Estatísticas da importação
-        stats = {
-            "total_processadas": 0,
-            "criadas": 0,
-            "atualizadas": 0,
-            "erros": 0,
-            "detalhes_erros": []
-        }
-        
-        # Processar cada empresa
-        for empresa_data in empresas_data:
-            try:
-                stats["total_processadas"] += 1
-                
-                # Verificar se empresa já existe (por CNPJ)
-                cnpj = empresa_data.get('cnpj')
-                if not cnpj:
-                    stats["erros"] += 1
-                    stats["detalhes_erros"].append(f"Empresa sem CNPJ: {empresa_data.get('razao_social', 'N/A')}")
-                    continue
-                
-                empresa_existente = Empresa.query.filter_by(cnpj=cnpj).first()
-                
-                if empresa_existente:
-                    # Atualizar empresa existente
-                    _update_empresa_from_import(empresa_existente, empresa_data)
-                    stats["atualizadas"] += 1
-                else:
-                    # Criar nova empresa
-                    _create_empresa_from_import(empresa_data)
-                    stats["criadas"] += 1
-                
-            except Exception as e:
-                stats["erros"] += 1
-                stats["detalhes_erros"].append(f"Erro ao processar empresa {empresa_data.get('razao_social', 'N/A')}: {str(e)}")
-                continue
-        
-        # Confirmar transação
-        db.session.commit()
-        
-        return jsonify({
-            "message": "Importação concluída com sucesso",
-            "estatisticas": stats
-        })
+        return _enfileirar_importacao(TIPO_IMPORTACAO_JSON, file)
     
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Erro durante a importação: {str(e)}"}), 500
 
 
-def _create_empresa_from_import(empresa_data):
-    """Criar nova empresa a partir dos dados de importação"""
-    # Criar empresa principal
-    empresa = Empresa(
-        razao_social=empresa_data.get("razao_social"),
-        nome_fantasia=empresa_data.get("nome_fantasia"),
-        cnpj=empresa_data.get("cnpj"),
-        inscricao_estadual=empresa_data.get("inscricao_estadual"),
-        endereco_completo=empresa_data.get("endereco_completo"),
-        telefone_comercial=empresa_data.get("telefone_comercial"),
-        telefone_emergencial=empresa_data.get("telefone_emergencial"),
-        email=empresa_data.get("email"),
-        website=empresa_data.get("website"),
-        etiqueta=empresa_data.get("etiqueta", "CADASTRADA"),
-        data_fundacao=datetime.strptime(empresa_data["data_fundacao"], "%Y-%m-%d").date() if empresa_data.get("data_fundacao") else None
-    )
-    
-    db.session.add(empresa)
-    db.session.flush()  # Para obter o ID da empresa
-    
-    # Adicionar dados relacionados
-    _add_related_data(empresa, empresa_data)
-
-
-def _update_empresa_from_import(empresa, empresa_data):
-    """Atualizar empresa existente com dados de importação"""
-    # Atualizar campos básicos
-    empresa.razao_social = empresa_data.get("razao_social", empresa.razao_social)
-    empresa.nome_fantasia = empresa_data.get("nome_fantasia", empresa.nome_fantasia)
-    empresa.inscricao_estadual = empresa_data.get("inscricao_estadual", empresa.inscricao_estadual)
-    empresa.endereco_completo = empresa_data.get("endereco_completo", empresa.endereco_completo)
-    empresa.telefone_comercial = empresa_data.get("telefone_comercial", empresa.telefone_comercial)
-    empresa.telefone_emergencial = empresa_data.get("telefone_emergencial", empresa.telefone_emergencial)
-    empresa.email = empresa_data.get("email", empresa.email)
-    empresa.website = empresa_data.get("website", empresa.website)
-    empresa.etiqueta = empresa_data.get("etiqueta", empresa.etiqueta)
-    empresa.updated_at = datetime.utcnow()
-    
-    if empresa_data.get("data_fundacao"):
-        empresa.data_fundacao = datetime.strptime(empresa_data["data_fundacao"], "%Y-%m-%d").date()
-    
-    # Atualizar dados relacionados (substituindo os existentes)
-    _clear_related_data(empresa)
-    _add_related_data(empresa, empresa_data)
-
-
-def _clear_related_data(empresa):
-    """Limpar todos os dados relacionados de uma empresa"""
-    Regulamentacao.query.filter_by(empresa_id=empresa.id).delete()
-    Certificacao.query.filter_by(empresa_id=empresa.id).delete()
-    ModalidadeTransporte.query.filter_by(empresa_id=empresa.id).delete()
-    TipoCarga.query.filter_by(empresa_id=empresa.id).delete()
-    AbrangenciaGeografica.query.filter_by(empresa_id=empresa.id).delete()
-    Frota.query.filter_by(empresa_id=empresa.id).delete()
-    Armazenagem.query.filter_by(empresa_id=empresa.id).delete()
-    PortoTerminal.query.filter_by(empresa_id=empresa.id).delete()
-    SeguroCobertura.query.filter_by(empresa_id=empresa.id).delete()
-    Tecnologia.query.filter_by(empresa_id=empresa.id).delete()
-    DesempenhoQualidade.query.filter_by(empresa_id=empresa.id).delete()
-    ClienteSegmento.query.filter_by(empresa_id=empresa.id).delete()
-    RecursoHumano.query.filter_by(empresa_id=empresa.id).delete()
-    Sustentabilidade.query.filter_by(empresa_id=empresa.id).delete()
-
-
-
 @empresa_bp.route("/empresas/import-excel", methods=["POST"])
 def import_empresas_excel():
-    """Importar dados das empresas a partir de arquivo Excel"""
+    """
+    Importar dados das empresas a partir de arquivo Excel.
+    O arquivo é processado em segundo plano; acompanhe por /api/jobs/<job_id>.
+    ?streaming=1 lê o .xlsx linha a linha (memória limitada); é o padrão para arquivos grandes.
+    """
     try:
         # Verificar se foi enviado um arquivo
         if 'file' not in request.files:
@@ -1039,530 +1063,63 @@ def import_empresas_excel():
         if not file.filename.lower().endswith(('.xlsx', '.xls')):
             return jsonify({"error": "Arquivo deve ser do tipo Excel (.xlsx ou .xls)"}), 400
         
-        # Importar pandas e openpyxl para processar Excel
+        # Verificar se pandas está disponível antes de enfileirar
         try:
-            import pandas as pd
+            import pandas
         except ImportError:
             return jsonify({"error": "Biblioteca pandas não está instalada"}), 500
         
-        # Ler o arquivo Excel
-        try:
-            excel_data = pd.read_excel(file, sheet_name=None)  # Lê todas as abas
-        except Exception as e:
-            return jsonify({"error": f"Erro ao ler arquivo Excel: {str(e)}"}), 400
-        
-        # Verificar se existe a aba "Empresas"
-        if 'Empresas' not in excel_data:
-            return jsonify({"error": "Aba 'Empresas' não encontrada no arquivo Excel"}), 400
-        
-        # Estatísticas da importação
-        stats = {
-            "total_processadas": 0,
-            "criadas": 0,
-            "atualizadas": 0,
-            "erros": 0,
-            "detalhes_erros": []
-        }
-        
-        # Processar aba de empresas
-        empresas_df = excel_data['Empresas']
-        
-        # Validar colunas obrigatórias
-        colunas_obrigatorias = ['razao_social', 'cnpj']
-        for coluna in colunas_obrigatorias:
-            if coluna not in empresas_df.columns:
-                return jsonify({"error": f"Coluna obrigatória '{coluna}' não encontrada na aba Empresas"}), 400
-        
-        # Processar cada empresa
-        for index, row in empresas_df.iterrows():
-            try:
-                stats["total_processadas"] += 1
-                
-                # Limpar e validar CNPJ
-                cnpj = str(row['cnpj']).strip()
-                if pd.isna(row['cnpj']) or cnpj == '' or cnpj == 'nan':
-                    stats["erros"] += 1
-                    stats["detalhes_erros"].append(f"Linha {index + 2}: CNPJ vazio ou inválido")
-                    continue
-                
-                # Remover formatação do CNPJ
-                cnpj = ''.join(filter(str.isdigit, cnpj))
-                if len(cnpj) != 14:
-                    stats["erros"] += 1
-                    stats["detalhes_erros"].append(f"Linha {index + 2}: CNPJ deve ter 14 dígitos")
-                    continue
-                
-                # Verificar se empresa já existe
-                empresa_existente = Empresa.query.filter_by(cnpj=cnpj).first()
-                
-                # Preparar dados da empresa
-                empresa_data = {
-                    'razao_social': str(row['razao_social']).strip() if pd.notna(row['razao_social']) else None,
-                    'nome_fantasia': str(row['nome_fantasia']).strip() if pd.notna(row['nome_fantasia']) else None,
-                    'cnpj': cnpj,
-                    'inscricao_estadual': str(row['inscricao_estadual']).strip() if pd.notna(row['inscricao_estadual']) else None,
-                    'endereco_completo': str(row['endereco_completo']).strip() if pd.notna(row['endereco_completo']) else None,
-                    'telefone_comercial': str(row['telefone_comercial']).strip() if pd.notna(row['telefone_comercial']) else None,
-                    'telefone_emergencial': str(row['telefone_emergencial']).strip() if pd.notna(row['telefone_emergencial']) else None,
-                    'email': str(row['email']).strip() if pd.notna(row['email']) else None,
-                    'website': str(row['website']).strip() if pd.notna(row['website']) else None,
-                    'etiqueta': str(row['etiqueta']).strip() if pd.notna(row['etiqueta']) else 'CADASTRADA'
-                }
-                
-                # Processar data de fundação
-                if pd.notna(row['data_fundacao']):
-                    try:
-                        if isinstance(row['data_fundacao'], str):
-                            empresa_data['data_fundacao'] = row['data_fundacao']
-                        else:
-                            empresa_data['data_fundacao'] = row['data_fundacao'].strftime('%Y-%m-%d')
-                    except:
-                        pass
-                
-                if empresa_existente:
-                    # Atualizar empresa existente
-                    _update_empresa_from_excel(empresa_existente, empresa_data, excel_data, cnpj)
-                    stats["atualizadas"] += 1
-                else:
-                    # Criar nova empresa
-                    _create_empresa_from_excel(empresa_data, excel_data, cnpj)
-                    stats["criadas"] += 1
-                
-            except Exception as e:
-                stats["erros"] += 1
-                stats["detalhes_erros"].append(f"Linha {index + 2}: {str(e)}")
-                continue
-        
-        # Confirmar transação
-        db.session.commit()
-        
-        return jsonify({
-            "message": "Importação de planilha concluída com sucesso",
-            "estatisticas": stats
-        })
+        # Leitura em streaming (openpyxl somente leitura) só existe para .xlsx
+        xlsx = file.filename.lower().endswith('.xlsx')
+        streaming = request.args.get('streaming')
+        if streaming is None:
+            streaming = xlsx and (request.content_length or 0) > LIMITE_STREAMING_EXCEL
+        else:
+            streaming = streaming.lower() in ('1', 'true', 'sim')
+        if streaming and not xlsx:
+            return jsonify({"error": "Leitura em streaming requer arquivo .xlsx"}), 400
+        
+        return _enfileirar_importacao(TIPO_IMPORTACAO_EXCEL, file, streaming=streaming)
     
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Erro durante a importação: {str(e)}"}), 500
 
 
-def _create_empresa_from_excel(empresa_data, excel_data, cnpj):
-    """Criar nova empresa a partir dos dados da planilha Excel"""
-    # Criar empresa principal
-    empresa = Empresa(
-        razao_social=empresa_data.get("razao_social"),
-        nome_fantasia=empresa_data.get("nome_fantasia"),
-        cnpj=empresa_data.get("cnpj"),
-        inscricao_estadual=empresa_data.get("inscricao_estadual"),
-        endereco_completo=empresa_data.get("endereco_completo"),
-        telefone_comercial=empresa_data.get("telefone_comercial"),
-        telefone_emergencial=empresa_data.get("telefone_emergencial"),
-        email=empresa_data.get("email"),
-        website=empresa_data.get("website"),
-        etiqueta=empresa_data.get("etiqueta", "CADASTRADA"),
-        data_fundacao=datetime.strptime(empresa_data["data_fundacao"], "%Y-%m-%d").date() if empresa_data.get("data_fundacao") else None
+def _enfileirar_importacao(tipo, file, **parametros):
+    """Grava o upload como job pendente e responde 202 com o id para acompanhamento"""
+    parametros['lote'] = request.args.get('lote', TAMANHO_LOTE_PADRAO, type=int)
+    job = FilaJobs.enfileirar(
+        tipo,
+        file,
+        usuario_id=current_user.id if current_user.is_authenticated else None,
+        parametros=parametros
     )
-    
-    db.session.add(empresa)
-    db.session.flush()  # Para obter o ID da empresa
-    
-    # Adicionar dados relacionados das outras abas
-    _add_related_data_from_excel(empresa, excel_data, cnpj)
-
-
-def _update_empresa_from_excel(empresa, empresa_data, excel_data, cnpj):
-    """Atualizar empresa existente com dados da planilha Excel"""
-    # Atualizar campos básicos
-    empresa.razao_social = empresa_data.get("razao_social", empresa.razao_social)
-    empresa.nome_fantasia = empresa_data.get("nome_fantasia", empresa.nome_fantasia)
-    empresa.inscricao_estadual = empresa_data.get("inscricao_estadual", empresa.inscricao_estadual)
-    empresa.endereco_completo = empresa_data.get("endereco_completo", empresa.endereco_completo)
-    empresa.telefone_comercial = empresa_data.get("telefone_comercial", empresa.telefone_comercial)
-    empresa.telefone_emergencial = empresa_data.get("telefone_emergencial", empresa.telefone_emergencial)
-    empresa.email = empresa_data.get("email", empresa.email)
-    empresa.website = empresa_data.get("website", empresa.website)
-    empresa.etiqueta = empresa_data.get("etiqueta", empresa.etiqueta)
-    empresa.updated_at = datetime.utcnow()
-    
-    if empresa_data.get("data_fundacao"):
-        empresa.data_fundacao = datetime.strptime(empresa_data["data_fundacao"], "%Y-%m-%d").date()
-    
-    # Limpar dados relacionados existentes
-    _clear_related_data(empresa)
-    
-    # Adicionar novos dados relacionados das outras abas
-    _add_related_data_from_excel(empresa, excel_data, cnpj)
-
-
-def _add_related_data_from_excel(empresa, excel_data, cnpj):
-    """Adicionar dados relacionados das outras abas da planilha Excel"""
-    import pandas as pd
-    
-    # Processar Regulamentações
-    if 'Regulamentações' in excel_data or 'Regulamentacoes' in excel_data:
-        sheet_name = 'Regulamentações' if 'Regulamentações' in excel_data else 'Regulamentacoes'
-        df = excel_data[sheet_name]
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                regulamentacao = Regulamentacao(
-                    empresa_id=empresa.id,
-                    tipo_regulamentacao=str(row['tipo_regulamentacao']) if pd.notna(row['tipo_regulamentacao']) else None,
-                    numero_registro=str(row['numero_registro']) if pd.notna(row['numero_registro']) else None,
-                    data_emissao=pd.to_datetime(row['data_emissao']).date() if pd.notna(row['data_emissao']) else None,
-                    data_validade=pd.to_datetime(row['data_validade']).date() if pd.notna(row['data_validade']) else None,
-                    orgao_emissor=str(row['orgao_emissor']) if pd.notna(row['orgao_emissor']) else None
-                )
-                db.session.add(regulamentacao)
-    
-    # Processar Certificações
-    if 'Certificações' in excel_data or 'Certificacoes' in excel_data:
-        sheet_name = 'Certificações' if 'Certificações' in excel_data else 'Certificacoes'
-        df = excel_data[sheet_name]
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                certificacao = Certificacao(
-                    empresa_id=empresa.id,
-                    nome_certificacao=str(row['nome_certificacao']) if pd.notna(row['nome_certificacao']) else None,
-                    numero_certificacao=str(row['numero_certificacao']) if pd.notna(row['numero_certificacao']) else None,
-                    data_emissao=pd.to_datetime(row['data_emissao']).date() if pd.notna(row['data_emissao']) else None,
-                    data_validade=pd.to_datetime(row['data_validade']).date() if pd.notna(row['data_validade']) else None,
-                    orgao_certificador=str(row['orgao_certificador']) if pd.notna(row['orgao_certificador']) else None
-                )
-                db.session.add(certificacao)
-    
-    # Processar Modalidades de Transporte
-    if 'Modalidades de Transporte' in excel_data or 'Modalidades' in excel_data:
-        sheet_name = 'Modalidades de Transporte' if 'Modalidades de Transporte' in excel_data else 'Modalidades'
-        df = excel_data[sheet_name]
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                modalidade = ModalidadeTransporte(
-                    empresa_id=empresa.id,
-                    modalidade=str(row['modalidade']) if pd.notna(row['modalidade']) else None
-                )
-                db.session.add(modalidade)
-    
-    # Processar Tipos de Carga
-    if 'Tipos de Carga' in excel_data or 'Tipos_Carga' in excel_data:
-        sheet_name = 'Tipos de Carga' if 'Tipos de Carga' in excel_data else 'Tipos_Carga'
-        df = excel_data[sheet_name]
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                tipo_carga = TipoCarga(
-                    empresa_id=empresa.id,
-                    tipo_carga=str(row['tipo_carga']) if pd.notna(row['tipo_carga']) else None
-                )
-                db.session.add(tipo_carga)
-    
-    # Processar Abrangência Geográfica
-    if 'Abrangência Geográfica' in excel_data or 'Abrangencia' in excel_data:
-        sheet_name = 'Abrangência Geográfica' if 'Abrangência Geográfica' in excel_data else 'Abrangencia'
-        df = excel_data[sheet_name]
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                abrangencia = AbrangenciaGeografica(
-                    empresa_id=empresa.id,
-                    tipo_abrangencia=str(row['tipo_abrangencia']) if pd.notna(row['tipo_abrangencia']) else None,
-                    detalhes=str(row['detalhes']) if pd.notna(row['detalhes']) else None
-                )
-                db.session.add(abrangencia)
-    
-    # Processar Frota
-    if 'Frota' in excel_data:
-        df = excel_data['Frota']
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                frota = Frota(
-                    empresa_id=empresa.id,
-                    tipo_frota=str(row['tipo_frota']) if pd.notna(row['tipo_frota']) else None,
-                    quantidade=int(row['quantidade']) if pd.notna(row['quantidade']) else None,
-                    tipo_veiculo=str(row['tipo_veiculo']) if pd.notna(row['tipo_veiculo']) else None,
-                    tipo_carroceria=str(row['tipo_carroceria']) if pd.notna(row['tipo_carroceria']) else None,
-                    capacidade=float(row['capacidade']) if pd.notna(row['capacidade']) else None,
-                    ano_medio=int(row['ano_medio']) if pd.notna(row['ano_medio']) else None
-                )
-                db.session.add(frota)
-    
-    # Processar Armazenagem
-    if 'Armazenagem' in excel_data:
-        df = excel_data['Armazenagem']
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                possui_armazem = str(row['possui_armazem']).lower() in ['sim', 'yes', 'true', '1'] if pd.notna(row['possui_armazem']) else False
-                armazenagem = Armazenagem(
-                    empresa_id=empresa.id,
-                    possui_armazem=possui_armazem,
-                    localizacao=str(row['localizacao']) if pd.notna(row['localizacao']) else None,
-                    capacidade_m2=float(row['capacidade_m2']) if pd.notna(row['capacidade_m2']) else None,
-                    capacidade_m3=float(row['capacidade_m3']) if pd.notna(row['capacidade_m3']) else None,
-                    tipos_armazenagem=str(row['tipos_armazenagem']) if pd.notna(row['tipos_armazenagem']) else None,
-                    servicos_oferecidos=str(row['servicos_oferecidos']) if pd.notna(row['servicos_oferecidos']) else None
-                )
-                db.session.add(armazenagem)
-    
-    # Processar Portos e Terminais
-    if 'Portos e Terminais' in excel_data or 'Portos' in excel_data:
-        sheet_name = 'Portos e Terminais' if 'Portos e Terminais' in excel_data else 'Portos'
-        df = excel_data[sheet_name]
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                porto = PortoTerminal(
-                    empresa_id=empresa.id,
-                    nome_porto_terminal=str(row['nome_porto_terminal']) if pd.notna(row['nome_porto_terminal']) else None,
-                    tipo_terminal=str(row['tipo_terminal']) if pd.notna(row['tipo_terminal']) else None
-                )
-                db.session.add(porto)
-    
-    # Processar Seguros e Coberturas
-    if 'Seguros e Coberturas' in excel_data or 'Seguros' in excel_data:
-        sheet_name = 'Seguros e Coberturas' if 'Seguros e Coberturas' in excel_data else 'Seguros'
-        df = excel_data[sheet_name]
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                seguro = SeguroCobertura(
-                    empresa_id=empresa.id,
-                    tipo_seguro=str(row['tipo_seguro']) if pd.notna(row['tipo_seguro']) else None,
-                    numero_apolice=str(row['numero_apolice']) if pd.notna(row['numero_apolice']) else None,
-                    data_validade=pd.to_datetime(row['data_validade']).date() if pd.notna(row['data_validade']) else None,
-                    seguradora=str(row['seguradora']) if pd.notna(row['seguradora']) else None,
-                    valor_cobertura=str(row['valor_cobertura']) if pd.notna(row['valor_cobertura']) else None
-                )
-                db.session.add(seguro)
-    
-    # Processar Tecnologias
-    if 'Tecnologias' in excel_data:
-        df = excel_data['Tecnologias']
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                tecnologia = Tecnologia(
-                    empresa_id=empresa.id,
-                    nome_tecnologia=str(row['nome_tecnologia']) if pd.notna(row['nome_tecnologia']) else None,
-                    detalhes=str(row['detalhes']) if pd.notna(row['detalhes']) else None
-                )
-                db.session.add(tecnologia)
-    
-    # Processar Desempenho e Qualidade
-    if 'Desempenho e Qualidade' in excel_data or 'Desempenho' in excel_data:
-        sheet_name = 'Desempenho e Qualidade' if 'Desempenho e Qualidade' in excel_data else 'Desempenho'
-        df = excel_data[sheet_name]
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                desempenho = DesempenhoQualidade(
-                    empresa_id=empresa.id,
-                    prazo_medio_atendimento=str(row['prazo_medio_atendimento']) if pd.notna(row['prazo_medio_atendimento']) else None,
-                    unidade_prazo=str(row['unidade_prazo']) if pd.notna(row['unidade_prazo']) else 'dias',
-                    indice_avarias_extravios=float(row['indice_avarias_extravios']) if pd.notna(row['indice_avarias_extravios']) else None,
-                    indice_entregas_prazo=float(row['indice_entregas_prazo']) if pd.notna(row['indice_entregas_prazo']) else None
-                )
-                db.session.add(desempenho)
-    
-    # Processar Clientes e Segmentos
-    if 'Clientes e Segmentos' in excel_data or 'Clientes' in excel_data:
-        sheet_name = 'Clientes e Segmentos' if 'Clientes e Segmentos' in excel_data else 'Clientes'
-        df = excel_data[sheet_name]
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                cliente = ClienteSegmento(
-                    empresa_id=empresa.id,
-                    segmento=str(row['segmento']) if pd.notna(row['segmento']) else None,
-                    principais_clientes=str(row['principais_clientes']) if pd.notna(row['principais_clientes']) else None
-                )
-                db.session.add(cliente)
-    
-    # Processar Recursos Humanos
-    if 'Recursos Humanos' in excel_data or 'RH' in excel_data:
-        sheet_name = 'Recursos Humanos' if 'Recursos Humanos' in excel_data else 'RH'
-        df = excel_data[sheet_name]
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                rh = RecursoHumano(
-                    empresa_id=empresa.id,
-                    numero_funcionarios=int(row['numero_funcionarios']) if pd.notna(row['numero_funcionarios']) else None,
-                    programas_treinamento=str(row['programas_treinamento']) if pd.notna(row['programas_treinamento']) else None
-                )
-                db.session.add(rh)
-    
-    # Processar Sustentabilidade
-    if 'Sustentabilidade' in excel_data:
-        df = excel_data['Sustentabilidade']
-        for _, row in df.iterrows():
-            if pd.notna(row['cnpj_empresa']) and str(row['cnpj_empresa']).replace('.', '').replace('/', '').replace('-', '') == cnpj:
-                sustentabilidade = Sustentabilidade(
-                    empresa_id=empresa.id,
-                    certificacao_ambiental=str(row['certificacao_ambiental']) if pd.notna(row['certificacao_ambiental']) else None,
-                    programas_reducao_emissoes=str(row['programas_reducao_emissoes']) if pd.notna(row['programas_reducao_emissoes']) else None
-                )
-                db.session.add(sustentabilidade)
+    return jsonify({
+        "message": "Importação enviada para processamento",
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}",
+        "job": job.to_dict()
+    }), 202
 
 
 @empresa_bp.route("/empresas/template-excel", methods=["GET"])
 def download_template_excel():
-    """Gerar e baixar template da planilha Excel para importação"""
+    """
+    Baixar o template da planilha Excel para importação.
+    O arquivo é gerado uma vez por versão do esquema (models/planilha.py) e
+    servido com ETag/Last-Modified, então o navegador só revalida.
+    """
     try:
-        import pandas as pd
-        from io import BytesIO
-        
-        # Criar um buffer em memória
-        output = BytesIO()
-        
-        # Criar o arquivo Excel com múltiplas abas
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            
-            # Aba 1: Empresas (obrigatória)
-            empresas_template = pd.DataFrame({
-                'razao_social': ['Exemplo Transportes Ltda'],
-                'nome_fantasia': ['Exemplo Transportes'],
-                'cnpj': ['12.345.678/0001-90'],
-                'inscricao_estadual': ['123456789'],
-                'endereco_completo': ['Rua Exemplo, 123 - Centro - São Paulo/SP'],
-                'telefone_comercial': ['(11) 1234-5678'],
-                'telefone_emergencial': ['(11) 9876-5432'],
-                'email': ['contato@exemplo.com.br'],
-                'website': ['www.exemplo.com.br'],
-                'data_fundacao': ['2020-01-15'],
-                'etiqueta': ['CADASTRADA']
-            })
-            empresas_template.to_excel(writer, sheet_name='Empresas', index=False)
-            
-            # Aba 2: Regulamentações
-            regulamentacoes_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90'],
-                'tipo_regulamentacao': ['RNTRC'],
-                'numero_registro': ['123456789'],
-                'data_emissao': ['2020-01-01'],
-                'data_validade': ['2025-01-01'],
-                'orgao_emissor': ['ANTT']
-            })
-            regulamentacoes_template.to_excel(writer, sheet_name='Regulamentações', index=False)
-            
-            # Aba 3: Certificações
-            certificacoes_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90'],
-                'nome_certificacao': ['ISO 9001'],
-                'numero_certificacao': ['ISO9001-2020-001'],
-                'data_emissao': ['2020-01-01'],
-                'data_validade': ['2023-01-01'],
-                'orgao_certificador': ['Bureau Veritas']
-            })
-            certificacoes_template.to_excel(writer, sheet_name='Certificações', index=False)
-            
-            # Aba 4: Modalidades de Transporte
-            modalidades_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90', '12.345.678/0001-90'],
-                'modalidade': ['Rodoviário', 'Multimodal']
-            })
-            modalidades_template.to_excel(writer, sheet_name='Modalidades', index=False)
-            
-            # Aba 5: Tipos de Carga
-            tipos_carga_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90', '12.345.678/0001-90'],
-                'tipo_carga': ['Carga Geral', 'Carga Refrigerada']
-            })
-            tipos_carga_template.to_excel(writer, sheet_name='Tipos_Carga', index=False)
-            
-            # Aba 6: Abrangência Geográfica
-            abrangencia_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90'],
-                'tipo_abrangencia': ['Regional'],
-                'detalhes': ['Sudeste e Sul']
-            })
-            abrangencia_template.to_excel(writer, sheet_name='Abrangencia', index=False)
-            
-            # Aba 7: Frota
-            frota_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90'],
-                'tipo_frota': ['Própria'],
-                'quantidade': [25],
-                'tipo_veiculo': ['Carreta'],
-                'tipo_carroceria': ['Baú'],
-                'capacidade': [30.0],
-                'ano_medio': [2018]
-            })
-            frota_template.to_excel(writer, sheet_name='Frota', index=False)
-            
-            # Aba 8: Armazenagem
-            armazenagem_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90'],
-                'possui_armazem': ['Sim'],
-                'localizacao': ['São Paulo/SP'],
-                'capacidade_m2': [5000.0],
-                'capacidade_m3': [15000.0],
-                'tipos_armazenagem': ['Seca, Refrigerada'],
-                'servicos_oferecidos': ['Cross-docking, Picking, Packing']
-            })
-            armazenagem_template.to_excel(writer, sheet_name='Armazenagem', index=False)
-            
-            # Aba 9: Portos e Terminais
-            portos_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90', '12.345.678/0001-90'],
-                'nome_porto_terminal': ['Porto de Santos', 'Porto de Paranaguá'],
-                'tipo_terminal': ['Marítimo', 'Marítimo']
-            })
-            portos_template.to_excel(writer, sheet_name='Portos', index=False)
-            
-            # Aba 10: Seguros e Coberturas
-            seguros_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90'],
-                'tipo_seguro': ['RCTR-C'],
-                'numero_apolice': ['123456789'],
-                'data_validade': ['2024-12-31'],
-                'seguradora': ['Seguradora Exemplo'],
-                'valor_cobertura': ['R$ 200.000,00']
-            })
-            seguros_template.to_excel(writer, sheet_name='Seguros', index=False)
-            
-            # Aba 11: Tecnologias
-            tecnologias_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90', '12.345.678/0001-90'],
-                'nome_tecnologia': ['GPS', 'TMS'],
-                'detalhes': ['Rastreamento em tempo real', 'Sistema de gestão de transporte']
-            })
-            tecnologias_template.to_excel(writer, sheet_name='Tecnologias', index=False)
-            
-            # Aba 12: Desempenho e Qualidade
-            desempenho_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90'],
-                'prazo_medio_atendimento': ['3'],
-                'unidade_prazo': ['dias'],
-                'indice_avarias_extravios': [0.5],
-                'indice_entregas_prazo': [98.5]
-            })
-            desempenho_template.to_excel(writer, sheet_name='Desempenho', index=False)
-            
-            # Aba 13: Clientes e Segmentos
-            clientes_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90'],
-                'segmento': ['Varejo'],
-                'principais_clientes': ['Cliente A, Cliente B, Cliente C']
-            })
-            clientes_template.to_excel(writer, sheet_name='Clientes', index=False)
-            
-            # Aba 14: Recursos Humanos
-            rh_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90'],
-                'numero_funcionarios': [150],
-                'programas_treinamento': ['Direção defensiva, Produtos perigosos']
-            })
-            rh_template.to_excel(writer, sheet_name='RH', index=False)
-            
-            # Aba 15: Sustentabilidade
-            sustentabilidade_template = pd.DataFrame({
-                'cnpj_empresa': ['12.345.678/0001-90'],
-                'certificacao_ambiental': ['ISO 14001'],
-                'programas_reducao_emissoes': ['Frota Euro 6, Biodiesel']
-            })
-            sustentabilidade_template.to_excel(writer, sheet_name='Sustentabilidade', index=False)
-        
-        # Preparar o arquivo para download
-        output.seek(0)
-        
-        # Criar resposta com o arquivo
-        from flask import make_response
-        response = make_response(output.getvalue())
-        response.headers["Content-Disposition"] = f"attachment; filename=template_importacao_empresas.xlsx"
-        response.headers["Content-Type"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        
-        return response
+        return send_file(
+            BytesIO(obter_template_excel()),
+            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            as_attachment=True,
+            download_name="template_importacao_empresas.xlsx",
+            etag=VERSAO_TEMPLATE,
+            last_modified=DATA_TEMPLATE,
+            conditional=True
+        )
     
     except Exception as e:
         return jsonify({"error": f"Erro ao gerar template: {str(e)}"}), 500
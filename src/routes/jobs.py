@@ -0,0 +1,18 @@
+from flask import Blueprint, jsonify
+from flask_cors import CORS
+from src.models import db
+from src.models.jobs import Job
+
+jobs_bp = Blueprint('jobs', __name__)
+CORS(jobs_bp)
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def obter_job(job_id):
+    """Status, progresso (linhas/s) e erros por linha de um job em segundo plano"""
+    try:
+        job = db.session.get(Job, job_id)
+        if not job:
+            return jsonify({"error": "Job não encontrado"}), 404
+        return jsonify(job.to_dict())
+    except Exception as e:
+        return jsonify({"error": f"Erro ao consultar job: {str(e)}"}), 500
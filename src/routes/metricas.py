@@ -0,0 +1,17 @@
+import os
+from flask import Blueprint, Response, request, jsonify
+from prometheus_client import CONTENT_TYPE_LATEST
+from src.metricas import gerar_metricas
+
+metricas_bp = Blueprint('metricas', __name__)
+
+@metricas_bp.route('/metrics', methods=['GET'])
+def metricas():
+    """Métricas de todos os workers no formato Prometheus (METRICAS_TOKEN exige Bearer)"""
+    token = os.getenv('METRICAS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({"error": "Não autorizado"}), 401
+    try:
+        return Response(gerar_metricas(), content_type=CONTENT_TYPE_LATEST)
+    except Exception as e:
+        return jsonify({"error": f"Erro ao gerar métricas: {str(e)}"}), 500
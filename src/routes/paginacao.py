@@ -0,0 +1,172 @@
+"""
+Paginação por cursor (keyset) para as listagens
+Evita o OFFSET + COUNT(*) do paginate() em páginas profundas
+
+Colunas anuláveis na chave mantêm a ordem nativa do banco (NULL é o maior
+valor no PostgreSQL e o menor no SQLite, para o índice continuar servindo o
+ORDER BY) e a condição do cursor trata o NULL nos dois lados.
+"""
+
+import base64
+import json
+import time
+import threading
+from datetime import datetime, date
+from sqlalchemy import and_, or_, false
+
+# Tempo de vida do total estimado (segundos)
+TTL_TOTAL_ESTIMADO = 60
+
+# Itens por página aceitos na paginação por cursor
+LIMITE_MAXIMO_PAGINA = 500
+
+# Bancos em que NULL ordena depois de qualquer valor (ASC NULLS LAST por padrão)
+DIALETOS_NULO_MAIOR = ('postgresql', 'oracle')
+
+_totais_cache = {}
+_totais_lock = threading.Lock()
+
+
+def cursor_solicitado(args):
+    """A paginação por cursor é usada quando o parâmetro 'cursor' é enviado (vazio na primeira página)"""
+    return 'cursor' in args
+
+
+def codificar_cursor(valores):
+    """Gera um cursor opaco a partir dos valores da chave de ordenação"""
+    serializados = []
+    for valor in valores:
+        if isinstance(valor, datetime):
+            serializados.append({'dt': valor.isoformat()})
+        elif isinstance(valor, date):
+            serializados.append({'d': valor.isoformat()})
+        else:
+            serializados.append(valor)
+    bruto = json.dumps(serializados, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(bruto).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor, quantidade):
+    """Recupera os valores da chave a partir do cursor (ValueError se inválido)"""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        serializados = json.loads(bruto.decode('utf-8'))
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+    if not isinstance(serializados, list) or len(serializados) != quantidade:
+        raise ValueError("Cursor inválido")
+
+    valores = []
+    for valor in serializados:
+        if isinstance(valor, dict) and 'dt' in valor:
+            valores.append(datetime.fromisoformat(valor['dt']))
+        elif isinstance(valor, dict) and 'd' in valor:
+            valores.append(date.fromisoformat(valor['d']))
+        else:
+            valores.append(valor)
+    return valores
+
+
+def _igual(coluna, valor):
+    return coluna.is_(None) if valor is None else coluna == valor
+
+
+def _depois(coluna, valor, descendente, nulos_primeiro):
+    """Linhas que vêm depois de valor na ordem da coluna (NULL incluído)"""
+    if valor is None:
+        # Com os NULLs no fim não há nada depois deles (o desempate fica com as próximas colunas)
+        return coluna.isnot(None) if nulos_primeiro else false()
+    comparacao = coluna < valor if descendente else coluna > valor
+    if nulos_primeiro or not getattr(coluna, 'nullable', True):
+        return comparacao
+    return or_(comparacao, coluna.is_(None))
+
+
+def _condicao_keyset(colunas, valores, descendente, nulo_maior=False):
+    """(c0, c1, ...) < (v0, v1, ...) expandido em OR/AND para usar o índice composto"""
+    # NULL maior que tudo: aparece primeiro na ordem decrescente
+    nulos_primeiro = nulo_maior == descendente
+    alternativas = []
+    for i, coluna in enumerate(colunas):
+        iguais = [_igual(colunas[j], valores[j]) for j in range(i)]
+        alternativas.append(and_(*iguais, _depois(coluna, valores[i], descendente, nulos_primeiro)))
+    return or_(*alternativas)
+
+
+def limitar_pagina(limite):
+    """Itens por página dentro de 1..LIMITE_MAXIMO_PAGINA"""
+    return max(1, min(limite, LIMITE_MAXIMO_PAGINA))
+
+
+def paginar_por_cursor(query, colunas, cursor=None, limite=20, descendente=True):
+    """
+    Retorna (itens, next_cursor) da página seguinte ao cursor.
+    A última coluna da chave deve ser única (normalmente o id).
+    """
+    limite = limitar_pagina(limite)
+    if cursor:
+        valores = decodificar_cursor(cursor, len(colunas))
+        nulo_maior = query.session.get_bind().dialect.name in DIALETOS_NULO_MAIOR
+        query = query.filter(_condicao_keyset(colunas, valores, descendente, nulo_maior))
+
+    ordem = [coluna.desc() if descendente else coluna.asc() for coluna in colunas]
+    itens = query.order_by(None).order_by(*ordem).limit(limite + 1).all()
+
+    proximo_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        ultimo = itens[-1]
+        proximo_cursor = codificar_cursor([getattr(ultimo, coluna.key) for coluna in colunas])
+
+    return itens, proximo_cursor
+
+
+def contar_total(query, chave, exato=False):
+    """
+    Total da listagem: exato sob demanda, ou estimado a partir de um cache
+    por filtro renovado a cada TTL_TOTAL_ESTIMADO segundos
+    """
+    agora = time.monotonic()
+    if not exato:
+        with _totais_lock:
+            em_cache = _totais_cache.get(chave)
+        if em_cache and em_cache[0] > agora:
+            return em_cache[1], False
+
+    total = query.order_by(None).count()
+    with _totais_lock:
+        _totais_cache[chave] = (agora + TTL_TOTAL_ESTIMADO, total)
+        # Evita crescimento indefinido com muitas combinações de filtros
+        if len(_totais_cache) > 1000:
+            for chave_expirada in [c for c, (expira, _) in _totais_cache.items() if expira <= agora]:
+                _totais_cache.pop(chave_expirada, None)
+    return total, True
+
+
+def chave_filtros(prefixo, args, *escopo):
+    """Chave de cache do total a partir da listagem, do escopo (ex.: usuário) e dos filtros"""
+    filtros = tuple(sorted(
+        (nome, valor) for nome, valor in args.items(multi=True)
+        if nome not in ('cursor', 'total', 'page', 'per_page')
+    ))
+    return (prefixo,) + escopo + filtros
+
+
+def resposta_cursor(args, query, colunas, chave_total, limite, descendente=True):
+    """Executa a paginação por cursor e monta os campos comuns da resposta"""
+    cursor = args.get('cursor') or None
+    limite = limitar_pagina(limite)
+    itens, proximo_cursor = paginar_por_cursor(query, colunas, cursor, limite, descendente)
+    metadados = {
+        'next_cursor': proximo_cursor,
+        'has_next': proximo_cursor is not None,
+        'per_page': limite
+    }
+    # Total é opcional: ?total=exato força o COUNT, ?total=estimado usa o cache
+    modo_total = args.get('total')
+    if modo_total in ('exato', 'estimado'):
+        total, exato = contar_total(query, chave_total, exato=(modo_total == 'exato'))
+        metadados['total'] = total
+        metadados['total_exato'] = exato
+    return itens, metadados
@@ -7,6 +7,8 @@ from src.models.empresa import (
     SeguroCobertura, Tecnologia, DesempenhoQualidade, ClienteSegmento,
     RecursoHumano, Sustentabilidade
 )
+from src.models.busca import IndiceBuscaEmpresa, VersaoIndice
+from src.models.analytics import RollupAnalytics
 from datetime import datetime, date
 
 seed_bp = Blueprint("seed", __name__)
@@ -18,6 +20,12 @@ def seed_database():
     try:
         # Limpar dados existentes
         db.session.query(Empresa).delete()
+        # Exclusão em massa não passa pelos hooks do índice de busca e do rollup do analytics
+        conexao = db.session.connection()
+        if IndiceBuscaEmpresa.disponivel(conexao):
+            IndiceBuscaEmpresa.reconstruir(conexao)
+        RollupAnalytics.reconstruir(conexao)
+        VersaoIndice.incrementar(conexao)
         db.session.commit()
         
         # Criar empresas de exemplo
@@ -140,8 +148,8 @@ def _add_rapido_express_data(empresa):
         tipo_frota="Própria",
         quantidade=50,
         tipo_veiculo="Carreta",
-        capacidade_carga="25 toneladas",
-        equipamentos_especificos="Baú refrigerado, Sider"
+        tipo_carroceria="Baú refrigerado, Sider",
+        capacidade=25.0
     )
     db.session.add(frota)
     
@@ -240,8 +248,8 @@ def _add_log_nacional_data(empresa):
         tipo_frota="Mista",
         quantidade=120,
         tipo_veiculo="Carreta, Caminhão",
-        capacidade_carga="30 toneladas",
-        equipamentos_especificos="Tanque para líquidos, Baú seco"
+        tipo_carroceria="Tanque para líquidos, Baú seco",
+        capacidade=30.0
     )
     db.session.add(frota)
     
@@ -395,8 +403,8 @@ def _add_ceb_transportes_data(empresa):
         tipo_frota="Própria",
         quantidade=30,
         tipo_veiculo="Prancha baixa, Carreta extensível",
-        capacidade_carga="80 toneladas",
-        equipamentos_especificos="Pranchas baixas, Carretas extensíveis, Guindaste"
+        tipo_carroceria="Pranchas baixas, Carretas extensíveis, Guindaste",
+        capacidade=80.0
     )
     db.session.add(frota)
     
@@ -258,11 +258,24 @@ const API = {
         return await response.json();
     },
     
+    async getAnalyticsEmpresasLote(empresaIds) {
+        const response = await fetch(`${this.baseURL}/v133/analytics/empresas/metricas?ids=${empresaIds.join(',')}`);
+        return await response.json();
+    },
+    
     async getAnalyticsUsuarios() {
         const response = await fetch(`${this.baseURL}/v133/analytics/usuarios/ranking`);
         return await response.json();
     },
-    
+
+    async getRelatorioEquipe(inicio = null, fim = null) {
+        const params = new URLSearchParams();
+        if (inicio) params.set('inicio', inicio);
+        if (fim) params.set('fim', fim);
+        const response = await fetch(`${this.baseURL}/v133/analytics/usuarios/relatorio?${params}`);
+        return await response.json();
+    },
+
     // ==================== OPERADORES ====================
     
     async getOperadores() {
@@ -0,0 +1,17 @@
+import os
+import sys
+
+# Mesmo ajuste de caminho do main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.models.jobs import FilaJobs
+from src.ajustes_sqlite import iniciar_manutencao
+
+
+if __name__ == '__main__':
+    # Processo da fila de jobs (importações); iniciado pelo gunicorn.conf.py
+    print("Worker de jobs BRCcSis aguardando importações...")
+    # PRAGMA optimize / checkpoint do WAL: este é o único processo auxiliar do servidor
+    iniciar_manutencao(app)
+    FilaJobs.processar_continuamente(app)
@@ -0,0 +1,56 @@
+"""
+Fixtures dos testes: o app (src.main) sobre um banco SQLite temporário em arquivo
+"""
+
+import os
+import sys
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+# DATABASE_URL recebido pelo pytest (os testes de PostgreSQL usam esse servidor)
+URL_ORIGINAL = os.getenv('DATABASE_URL')
+
+SENHA = 'teste123'
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """App completo (migrações, índices e rollups) sobre um SQLite novo"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{tmp_path_factory.mktemp('banco') / 'app.db'}"
+    from src.main import app
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture(scope='session')
+def usuarios(app):
+    """{tipo: usuario_id} com um usuário de cada tipo (senha SENHA)"""
+    from src.models import db
+    from src.models.usuario import Usuario, TipoUsuario
+
+    ids = {}
+    with app.app_context():
+        for tipo in TipoUsuario:
+            username = f'teste_{tipo.value}'
+            usuario = Usuario.query.filter_by(username=username).first()
+            if usuario is None:
+                usuario = Usuario(
+                    username=username, email=f'{username}@teste.com',
+                    nome_completo=f'Teste {tipo.value}', tipo_usuario=tipo
+                )
+                usuario.set_password(SENHA)
+                db.session.add(usuario)
+                db.session.commit()
+            ids[tipo.value] = usuario.id
+    return ids
+
+
+def login(app, username):
+    """Cliente de teste autenticado como username"""
+    cliente = app.test_client()
+    resposta = cliente.post('/api/auth/login', json={'username': username, 'password': SENHA})
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    return cliente
@@ -0,0 +1,102 @@
+"""
+Endpoints de analytics da v1.3.3 (métricas de empresas, relatório e ranking de usuários)
+"""
+
+import csv
+import io
+import uuid
+from decimal import Decimal
+from src.models import db
+from src.models.cotacao import Cotacao
+from src.models.empresa import Empresa
+from src.models.relatorio_usuarios import COLUNAS_CSV
+from src.models.usuario import Usuario, TipoUsuario
+from conftest import login
+
+DADOS_COTACAO = {
+    'cliente_nome': 'Cliente Analytics', 'cliente_cnpj': '11.222.333/0001-81',
+    'origem_cep': '01001-000', 'origem_endereco': 'Rua A', 'origem_cidade': 'São Paulo', 'origem_estado': 'SP',
+    'destino_cep': '20040-002', 'destino_endereco': 'Rua B', 'destino_cidade': 'Rio de Janeiro',
+    'destino_estado': 'RJ', 'carga_descricao': 'Carga', 'carga_peso_kg': Decimal('10.00')
+}
+
+
+def _usuario(tipo):
+    username = f'analytics_{tipo.value}_{uuid.uuid4().hex[:8]}'
+    usuario = Usuario(username=username, email=f'{username}@teste.com', nome_completo=username, tipo_usuario=tipo)
+    usuario.set_password('teste123')
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario.id
+
+
+def _empresa():
+    empresa = Empresa(
+        razao_social='Prestadora Analytics', cnpj=f'93.{uuid.uuid4().int % 10**6:06d}/0001-01',
+        endereco_completo='Rua E'
+    )
+    db.session.add(empresa)
+    db.session.commit()
+    return empresa.id
+
+
+def test_metricas_de_varias_empresas(app, usuarios):
+    with app.app_context():
+        consultor_id, operador_id = _usuario(TipoUsuario.CONSULTOR), _usuario(TipoUsuario.OPERADOR)
+        empresa_id = _empresa()
+        cotacao = Cotacao.criar_cotacao(dict(DADOS_COTACAO), consultor_id)
+        cotacao.aceitar_por_operador(operador_id)
+        cotacao.enviar_cotacao(valor_frete=Decimal('150.50'), prazo_entrega=5, empresa_prestadora_id=empresa_id)
+        cotacao.aceitar_por_consultor()
+
+    cliente = login(app, 'teste_gerente')
+    resposta = cliente.get(f'/api/v133/analytics/empresas/metricas?ids={empresa_id},999999')
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    corpo = resposta.get_json()
+    assert [item['empresa']['id'] for item in corpo['empresas']] == [empresa_id]
+    metricas = corpo['empresas'][0]['metricas']
+    assert (metricas['total_cotacoes_solicitadas'], metricas['cotacoes_aceitas']) == (1, 1)
+    assert corpo['nao_encontradas'] == [999999]
+
+    assert cliente.get('/api/v133/analytics/empresas/metricas?ids=abc').status_code == 400
+
+
+def test_relatorio_da_equipe_em_csv(app, usuarios):
+    with app.app_context():
+        consultor_id = _usuario(TipoUsuario.CONSULTOR)
+        Cotacao.criar_cotacao(dict(DADOS_COTACAO), consultor_id)
+
+    resposta = login(app, 'teste_gerente').get('/api/v133/analytics/usuarios/relatorio?formato=csv')
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    assert resposta.mimetype == 'text/csv'
+    cabecalho, *linhas = csv.reader(io.StringIO(resposta.get_data(as_text=True)))
+    assert cabecalho == [nome for _, nome in COLUNAS_CSV]
+    linha = dict(zip(cabecalho, next(linha for linha in linhas if linha[0] == str(consultor_id))))
+    assert (linha['tipo'], linha['consultor_solicitadas'], linha['operador_aceitas']) == ('consultor', '1', '')
+
+    consultor = login(app, 'teste_consultor')
+    assert consultor.get('/api/v133/analytics/usuarios/relatorio?formato=csv').status_code == 403
+
+
+def _total_operadas(cliente, operador_id):
+    resposta = cliente.get('/api/v133/analytics/usuarios/ranking?criterio=volume&minimo=1&limite=500')
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    return next(
+        item['total_operadas'] for item in resposta.get_json()['ranking_operadores']
+        if item['usuario_id'] == operador_id
+    )
+
+
+def test_ranking_de_usuarios_reflete_transicao_apos_cache(app, usuarios):
+    with app.app_context():
+        consultor_id, operador_id = _usuario(TipoUsuario.CONSULTOR), _usuario(TipoUsuario.OPERADOR)
+        Cotacao.criar_cotacao(dict(DADOS_COTACAO), consultor_id).aceitar_por_operador(operador_id)
+        pendente_id = Cotacao.criar_cotacao(dict(DADOS_COTACAO), consultor_id).id
+
+    cliente = login(app, 'teste_gerente')
+    assert _total_operadas(cliente, operador_id) == 1
+    # A segunda leitura vem do cache; a transição tem de invalidá-lo
+    assert _total_operadas(cliente, operador_id) == 1
+    with app.app_context():
+        db.session.get(Cotacao, pendente_id).aceitar_por_operador(operador_id)
+    assert _total_operadas(cliente, operador_id) == 2
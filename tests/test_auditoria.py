@@ -0,0 +1,122 @@
+"""
+Gravação do log de auditoria: fila limitada, lotes da thread, encerramento e
+INSERT em lote que falha
+"""
+
+import threading
+import time
+from src.models import auditoria, db
+from src.models.auditoria import GravadorAuditoria
+from src.models.usuario import LogAuditoria
+
+
+def test_lote_com_registro_invalido_grava_os_demais(app, monkeypatch, caplog):
+    monkeypatch.setattr(auditoria, 'ESPERA_AUDITORIA', 0)
+    registros = [{'acao': 'TESTE_LOTE', 'recurso': 'TESTE', 'detalhes': str(i)} for i in range(5)]
+    # acao é NOT NULL: derruba o INSERT do lote inteiro
+    registros.insert(2, {'acao': None, 'recurso': 'TESTE', 'detalhes': 'invalido'})
+
+    with app.app_context():
+        GravadorAuditoria()._gravar(registros)
+        gravados = sorted(
+            detalhes for (detalhes,) in db.session.query(LogAuditoria.detalhes).filter_by(acao='TESTE_LOTE')
+        )
+
+    assert gravados == ['0', '1', '2', '3', '4']
+    tentativas = [r for r in caplog.records if r.name == 'brccsis.auditoria' and r.levelname == 'WARNING']
+    descartados = [r for r in caplog.records if r.name == 'brccsis.auditoria' and r.levelname == 'ERROR']
+    assert len(tentativas) == auditoria.TENTATIVAS_AUDITORIA
+    assert len(descartados) == 1 and 'invalido' in descartados[0].getMessage()
+
+
+def test_falha_temporaria_repete_o_lote(app, monkeypatch):
+    monkeypatch.setattr(auditoria, 'ESPERA_AUDITORIA', 0)
+    gravador = GravadorAuditoria()
+    inserir = gravador._inserir
+    chamadas = []
+
+    def _inserir_falhando_uma_vez(registros):
+        chamadas.append(len(registros))
+        if len(chamadas) == 1:
+            raise RuntimeError('database is locked')
+        inserir(registros)
+
+    monkeypatch.setattr(gravador, '_inserir', _inserir_falhando_uma_vez)
+    with app.app_context():
+        gravador._gravar([{'acao': 'TESTE_REPETICAO', 'recurso': 'TESTE'} for _ in range(3)])
+        assert LogAuditoria.query.filter_by(acao='TESTE_REPETICAO').count() == 3
+
+    # Repetiu o lote inteiro, sem cair no registro a registro
+    assert chamadas == [3, 3]
+
+
+def _registro(acao, i):
+    return {'acao': acao, 'recurso': 'TESTE', 'detalhes': str(i)}
+
+
+def _gravador_retido(monkeypatch, liberar, tamanho_fila=10):
+    """
+    Gravador assíncrono (ignora o modo síncrono dos testes) cuja thread fica
+    presa no primeiro INSERT até liberar(gravador) retornar.
+    Devolve (gravador, retido, gravacoes): retido sinaliza a thread presa e
+    gravacoes lista (thread, detalhes) de cada INSERT.
+    """
+    gravador = GravadorAuditoria(tamanho_fila=tamanho_fila, intervalo=0.05)
+    monkeypatch.setattr(gravador, 'sincrono', lambda: False)
+    inserir, retido, gravacoes = gravador._inserir, threading.Event(), []
+
+    def _inserir(registros):
+        if threading.current_thread() is gravador._thread and not retido.is_set():
+            retido.set()
+            liberar(gravador)
+        inserir(registros)
+        gravacoes.append((threading.current_thread().name, [r['detalhes'] for r in registros]))
+
+    monkeypatch.setattr(gravador, '_inserir', _inserir)
+    return gravador, retido, gravacoes
+
+
+def _aguardar(condicao, timeout=5):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        assert time.monotonic() < limite, 'tempo esgotado'
+        time.sleep(0.01)
+
+
+def test_fila_cheia_grava_na_hora_e_thread_grava_o_restante_em_lote(app, monkeypatch):
+    liberado = threading.Event()
+    gravador, retido, gravacoes = _gravador_retido(monkeypatch, lambda _: liberado.wait(5), tamanho_fila=2)
+    principal = threading.current_thread().name
+
+    with app.app_context():
+        gravador.registrar(_registro('TESTE_FILA', 0))
+        assert retido.wait(5)
+        for i in range(1, 4):
+            gravador.registrar(_registro('TESTE_FILA', i))
+        # 1 e 2 ocupam a fila; 3 não cabe e é gravado por quem registrou
+        assert gravacoes == [(principal, ['3'])]
+
+        liberado.set()
+        _aguardar(lambda: len(gravacoes) == 3)
+        gravador.descarregar()
+        assert LogAuditoria.query.filter_by(acao='TESTE_FILA').count() == 4
+
+    assert gravacoes[1:] == [('gravador-auditoria', ['0']), ('gravador-auditoria', ['1', '2'])]
+
+
+def test_descarregar_grava_o_que_restou_na_fila(app, monkeypatch):
+    # A thread só sai do primeiro INSERT quando descarregar() pede a parada
+    gravador, retido, gravacoes = _gravador_retido(monkeypatch, lambda gravador: gravador._parar.wait(5))
+    principal = threading.current_thread().name
+
+    with app.app_context():
+        gravador.registrar(_registro('TESTE_ENCERRAMENTO', 0))
+        assert retido.wait(5)
+        for i in range(1, 3):
+            gravador.registrar(_registro('TESTE_ENCERRAMENTO', i))
+
+        gravador.descarregar()
+        assert not gravador._thread.is_alive()
+        assert LogAuditoria.query.filter_by(acao='TESTE_ENCERRAMENTO').count() == 3
+
+    assert gravacoes == [('gravador-auditoria', ['0']), (principal, ['1', '2'])]
@@ -0,0 +1,137 @@
+"""
+Barramento de eventos: commits fora de ordem, destinatários das mudanças de status e limite de conexões
+"""
+
+import json
+import queue
+from decimal import Decimal
+from sqlalchemy import delete, func, insert
+from src.models import db, eventos
+from src.models.cotacao import Cotacao
+from src.models.eventos import BarramentoEventos, EventoTempoReal
+from src.models.usuario import Usuario, TipoUsuario, get_brasilia_time
+from conftest import login
+
+
+def _gravar_evento(evento_id, usuario_id):
+    db.session.execute(insert(EventoTempoReal), [{
+        'id': evento_id, 'usuario_id': usuario_id, 'tipo': 'teste',
+        'dados': json.dumps({'n': evento_id}), 'created_at': get_brasilia_time()
+    }])
+    db.session.commit()
+    BarramentoEventos._acordar.set()
+
+
+def _proximo_id():
+    return (db.session.query(func.max(EventoTempoReal.id)).scalar() or 0) + 1
+
+
+def test_evento_de_id_menor_com_commit_atrasado_e_entregue(app, usuarios):
+    usuario_id = usuarios['consultor']
+    fila = BarramentoEventos.assinar(app, usuario_id)
+    try:
+        with app.app_context():
+            _aguardar_leitura(fila, usuario_id)
+
+            base = _proximo_id() + 10
+            # O id base (da transação que ainda não fez commit) fica para depois
+            _gravar_evento(base + 1, usuario_id)
+            assert fila.get(timeout=5)['id'] == base + 1
+            _gravar_evento(base, usuario_id)
+            assert fila.get(timeout=5)['id'] == base
+
+            # Reconexão depois do maior id também recebe o atrasado
+            ids = [evento['id'] for evento in BarramentoEventos.eventos_desde(usuario_id, base + 1)]
+            assert base in ids
+
+        # Nenhum evento é entregue duas vezes
+        _esvaziar_sem_repeticao(fila, {base, base + 1})
+    finally:
+        BarramentoEventos.cancelar(usuario_id, fila)
+
+
+def test_evento_publicado_depois_da_limpeza_total_e_entregue(app, usuarios):
+    usuario_id = usuarios['operador']
+    fila = BarramentoEventos.assinar(app, usuario_id)
+    try:
+        with app.app_context():
+            _aguardar_leitura(fila, usuario_id)
+            # Limpeza por retenção depois de um período sem eventos
+            db.session.execute(delete(EventoTempoReal))
+            db.session.commit()
+
+            BarramentoEventos.publicar('teste', {'n': 'depois da limpeza'}, [usuario_id])
+            db.session.commit()
+            assert fila.get(timeout=5)['dados'] == {'n': 'depois da limpeza'}
+    finally:
+        BarramentoEventos.cancelar(usuario_id, fila)
+
+
+def _aguardar_leitura(fila, usuario_id):
+    """A thread de leitura parte do maior id existente: publica até ela entregar um evento"""
+    for _ in range(10):
+        evento_id = _proximo_id()
+        _gravar_evento(evento_id, usuario_id)
+        try:
+            while fila.get(timeout=1)['id'] != evento_id:
+                pass
+            return
+        except queue.Empty:
+            continue
+    raise AssertionError('Thread de leitura de eventos não iniciou')
+
+
+def _esvaziar_sem_repeticao(fila, ja_recebidos):
+    try:
+        while True:
+            evento = fila.get(timeout=1.5)
+            assert evento['id'] not in ja_recebidos
+            ja_recebidos.add(evento['id'])
+    except queue.Empty:
+        pass
+
+
+def test_status_publicado_so_para_envolvidos_e_gestores(app, usuarios):
+    with app.app_context():
+        ultimo = db.session.query(func.max(EventoTempoReal.id)).scalar() or 0
+        cotacao = Cotacao.criar_cotacao({
+            'cliente_nome': 'Cliente eventos', 'cliente_cnpj': '11.222.333/0001-81',
+            'origem_cep': '01001-000', 'origem_endereco': 'Rua A', 'origem_cidade': 'São Paulo', 'origem_estado': 'SP',
+            'destino_cep': '20040-002', 'destino_endereco': 'Rua B', 'destino_cidade': 'Rio de Janeiro',
+            'destino_estado': 'RJ', 'carga_descricao': 'Carga', 'carga_peso_kg': Decimal('1.00')
+        }, usuarios['consultor'])
+        cotacao.aceitar_por_operador(usuarios['operador'])
+
+        destinos = [
+            usuario_id for (usuario_id,) in db.session.query(EventoTempoReal.usuario_id).filter(
+                EventoTempoReal.id > ultimo, EventoTempoReal.tipo == 'cotacao_status'
+            )
+        ]
+        gestores = {
+            usuario_id for (usuario_id,) in db.session.query(Usuario.id).filter(
+                Usuario.tipo_usuario.in_((TipoUsuario.ADMINISTRADOR, TipoUsuario.GERENTE)), Usuario.ativo.is_(True)
+            )
+        }
+
+    assert None not in destinos
+    # Criação: consultor e gestores; aceite: também o operador
+    assert sorted(destinos) == sorted(
+        list(gestores | {usuarios['consultor']}) + list(gestores | {usuarios['consultor'], usuarios['operador']})
+    )
+
+
+def test_stream_acima_do_limite_de_conexoes_responde_503(app, usuarios, monkeypatch):
+    monkeypatch.setattr(eventos, 'MAXIMO_ASSINATURAS', 1)
+    ocupada = BarramentoEventos.assinar(app, usuarios['gerente'])
+    try:
+        assert BarramentoEventos.assinar(app, usuarios['gerente']) is None
+        resposta = login(app, 'teste_consultor').get('/api/v133/notificacoes/stream')
+        assert resposta.status_code == 503
+        assert resposta.headers['Retry-After'] == '30'
+        assert resposta.get_data(as_text=True).startswith('retry: ')
+    finally:
+        BarramentoEventos.cancelar(usuarios['gerente'], ocupada)
+    # Vaga liberada: a próxima conexão é aceita
+    fila = BarramentoEventos.assinar(app, usuarios['consultor'])
+    assert fila is not None
+    BarramentoEventos.cancelar(usuarios['consultor'], fila)
@@ -0,0 +1,36 @@
+"""
+Exportação incremental de empresas (?since=)
+"""
+
+from datetime import datetime, timedelta
+from urllib.parse import quote
+from src.models import db
+from src.models.empresa import Empresa
+
+
+def _cnpjs(cliente, since):
+    resposta = cliente.get(f'/api/empresas/export?formato=json&since={quote(since)}')
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    return {empresa['cnpj'] for empresa in resposta.get_json()['empresas']}
+
+
+def test_since_com_fuso_e_convertido_para_utc(app):
+    alterada_em = datetime.utcnow().replace(microsecond=0) - timedelta(days=2)
+    with app.app_context():
+        empresa = Empresa(razao_social='Exportada', cnpj='91.000.000/0001-01', endereco_completo='Rua D')
+        db.session.add(empresa)
+        db.session.commit()
+        empresa.updated_at = alterada_em
+        db.session.commit()
+
+    cliente = app.test_client()
+    um_minuto = timedelta(minutes=1)
+    # 1 minuto antes da alteração, escrito no horário de Brasília (UTC-3)
+    antes_brasilia = (alterada_em - um_minuto - timedelta(hours=3)).isoformat() + '-03:00'
+    depois_brasilia = (alterada_em + um_minuto - timedelta(hours=3)).isoformat() + '-03:00'
+    assert '91.000.000/0001-01' in _cnpjs(cliente, antes_brasilia)
+    assert '91.000.000/0001-01' not in _cnpjs(cliente, depois_brasilia)
+
+    # Sem fuso: UTC
+    assert '91.000.000/0001-01' in _cnpjs(cliente, (alterada_em - um_minuto).isoformat())
+    assert '91.000.000/0001-01' not in _cnpjs(cliente, (alterada_em + um_minuto).isoformat() + 'Z')
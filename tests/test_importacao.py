@@ -0,0 +1,97 @@
+"""
+Importação de empresas: consultas por bloco, registros inválidos e rollup do analytics
+"""
+
+import threading
+from sqlalchemy import event, select, text
+from sqlalchemy.engine import Engine
+from src.models import db
+from src.models.analytics import RollupAnalytics
+from src.models.empresa import Empresa
+from src.models.importacao import ImportadorEmpresas
+
+
+def _registro(cnpj, razao_social):
+    return {'cnpj': cnpj, 'razao_social': razao_social, 'endereco_completo': 'Rua C, Curitiba - PR'}
+
+
+def test_importacao_consulta_so_os_cnpjs_do_bloco(app):
+    thread = threading.get_ident()
+    consultas = []
+
+    def _guardar(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread and statement.lstrip().upper().startswith('SELECT'):
+            consultas.append(statement)
+
+    with app.app_context():
+        ImportadorEmpresas().importar([
+            _registro('90.000.000/0001-01', 'Importada 1'), _registro('90.000.000/0001-02', 'Importada 2')
+        ])
+        db.session.commit()
+
+        event.listen(Engine, 'before_cursor_execute', _guardar)
+        try:
+            stats = ImportadorEmpresas(tamanho_lote=2).importar([
+                _registro('90.000.000/0001-01', 'Importada 1'),
+                _registro('90.000.000/0001-02', 'Importada 2 alterada'),
+                _registro('90.000.000/0001-03', 'Importada 3'),
+            ])
+            db.session.commit()
+        finally:
+            event.remove(Engine, 'before_cursor_execute', _guardar)
+
+    assert (stats['criadas'], stats['atualizadas'], stats['inalteradas']) == (1, 1, 1)
+    busca_empresas = [sql for sql in consultas if 'empresas.cnpj' in sql and 'FROM empresas' in sql]
+    # Uma consulta por bloco, sempre filtrada pelos CNPJs
+    assert len(busca_empresas) == 2
+    assert all(' IN ' in sql for sql in busca_empresas)
+
+
+def test_registro_sem_campo_obrigatorio_nao_derruba_o_bloco(app):
+    with app.app_context():
+        ImportadorEmpresas().importar([_registro('91.000.000/0001-01', 'Existente')])
+        db.session.commit()
+
+        stats = ImportadorEmpresas().importar([
+            _registro('91.000.000/0001-02', 'Válida'),
+            {'cnpj': '91.000.000/0001-03', 'endereco_completo': 'Sem razão social'},
+            dict(_registro('91.000.000/0001-04', 'Regulamentação incompleta'),
+                 regulamentacoes=[{'numero_registro': 'RNTRC1'}]),
+            dict(_registro('91.000.000/0001-05', 'Razão vazia'), razao_social='  '),
+            # Existente: campo ausente mantém o valor atual
+            {'cnpj': '91.000.000/0001-01', 'telefone_comercial': '(41) 3333-0000'},
+        ])
+        db.session.commit()
+
+        razoes = dict(db.session.execute(
+            select(Empresa.cnpj, Empresa.razao_social).where(Empresa.cnpj.like('91.000.000/%'))
+        ).all())
+
+    assert (stats['criadas'], stats['atualizadas'], stats['erros']) == (1, 1, 3)
+    assert razoes == {'91.000.000/0001-01': 'Existente', '91.000.000/0001-02': 'Válida'}
+    for cnpj, campo in (('0001-03', 'razao_social'), ('0001-04', 'tipo_regulamentacao'), ('0001-05', 'razao_social')):
+        assert any(f'91.000.000/{cnpj}' in erro and campo in erro for erro in stats['detalhes_erros'])
+
+
+def test_importacao_em_lote_atualiza_rollup_do_analytics(app):
+    def _rollup():
+        return sorted(db.session.execute(text("SELECT chave, quantidade FROM analytics_rollup")))
+
+    with app.app_context():
+        with db.engine.begin() as conexao:
+            RollupAnalytics.reconstruir(conexao)
+        antes = dict(_rollup())
+
+        ImportadorEmpresas().importar([
+            dict(_registro('94.000.000/0001-01', 'Granel Sul'), tipos_carga=['Granel Importado']),
+            dict(_registro('94.000.000/0001-02', 'Granel Sul 2'), tipos_carga=['Granel Importado']),
+        ])
+        db.session.commit()
+        # Os INSERTs em lote não passam pelo after_flush: o importador marca as empresas
+        incremental = _rollup()
+        assert dict(incremental)['tipo_carga:Granel Importado'] == 2
+        assert dict(incremental)['metrica:total'] == antes.get('metrica:total', 0) + 2
+
+        with db.engine.begin() as conexao:
+            RollupAnalytics.reconstruir(conexao)
+        assert _rollup() == incremental
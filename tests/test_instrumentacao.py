@@ -0,0 +1,62 @@
+"""
+Server-Timing e medição por requisição, inclusive com o corpo em streaming
+"""
+
+import re
+import threading
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src import instrumentacao
+from src.models import db
+from src.models.importacao import ImportadorEmpresas
+
+PADRAO = re.compile(r'db;dur=[\d.]+;desc="(\d+) consultas( \(parcial\))?"')
+
+
+def _contar_consultas(cliente, url):
+    """(resposta fechada, consultas executadas de fato nesta thread)"""
+    thread = threading.get_ident()
+    consultas = []
+
+    def _guardar(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            consultas.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', _guardar)
+    try:
+        resposta = cliente.get(url)
+        resposta.get_data()
+        resposta.close()
+    finally:
+        event.remove(Engine, 'before_cursor_execute', _guardar)
+    return resposta, len(consultas)
+
+
+def test_exportacao_em_streaming_mede_as_consultas_do_corpo(app):
+    with app.app_context():
+        ImportadorEmpresas().importar([
+            {'cnpj': f'95.000.000/0001-{n:02d}', 'razao_social': f'Streaming {n}',
+             'tipos_carga': ['Carga Geral'], 'frota': [{'tipo_frota': 'Própria'}]}
+            for n in range(1, 6)
+        ])
+        db.session.commit()
+
+    rotulos = {'blueprint': 'empresa', 'endpoint': 'empresa.export_empresas'}
+    antes = REGISTRY.get_sample_value('brccsis_requisicao_consultas_sql_sum', rotulos) or 0
+    resposta, executadas = _contar_consultas(app.test_client(), '/api/empresas/export?formato=ndjson')
+    cabecalho = PADRAO.search(resposta.headers['Server-Timing'])
+
+    assert cabecalho.group(2) == ' (parcial)'
+    medicao = instrumentacao.ultima_medicao()
+    # O cabeçalho só viu o que rodou antes do corpo; a medição fechada vê tudo
+    assert int(cabecalho.group(1)) < medicao['consultas'] == executadas
+    assert REGISTRY.get_sample_value('brccsis_requisicao_consultas_sql_sum', rotulos) - antes == executadas
+
+
+def test_resposta_comum_mede_no_cabecalho(app):
+    resposta, executadas = _contar_consultas(app.test_client(), '/api/empresas?per_page=5')
+    cabecalho = PADRAO.search(resposta.headers['Server-Timing'])
+
+    assert cabecalho.group(2) is None
+    assert int(cabecalho.group(1)) == instrumentacao.ultima_medicao()['consultas'] == executadas
@@ -0,0 +1,97 @@
+"""
+Fila de jobs: registros recusados pelo banco, falhas retomáveis e limite de tentativas
+"""
+
+import io
+import json
+import os
+from datetime import timedelta
+import pytest
+from werkzeug.datastructures import FileStorage
+from src.models import db
+from src.models import jobs
+from src.models.empresa import Empresa
+from src.models.jobs import FilaJobs, Job, StatusJob, MAXIMO_TENTATIVAS_JOB, TIMEOUT_HEARTBEAT, TIPO_IMPORTACAO_JSON
+from src.models.usuario import get_brasilia_time
+
+
+@pytest.fixture
+def diretorio_jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'DIRETORIO_JOBS', str(tmp_path))
+    return tmp_path
+
+
+def _enfileirar(empresas):
+    conteudo = json.dumps({'empresas': empresas}).encode('utf-8')
+    job = FilaJobs.enfileirar(TIPO_IMPORTACAO_JSON, FileStorage(io.BytesIO(conteudo), filename='empresas.json'))
+    return job.id
+
+
+def _empresa(cnpj, **extra):
+    return dict({'cnpj': cnpj, 'razao_social': f'Job {cnpj}', 'endereco_completo': 'Rua D, Recife - PE'}, **extra)
+
+
+def test_registro_recusado_pelo_banco_nao_derruba_o_bloco(app, diretorio_jobs):
+    with app.app_context():
+        job_id = _enfileirar([
+            _empresa('92.000.000/0001-01'),
+            # Passa pela validação, mas o banco recusa o valor booleano
+            _empresa('92.000.000/0001-02', armazenagem=[{'possui_armazem': 'talvez'}]),
+            _empresa('92.000.000/0001-03'),
+        ])
+        job = FilaJobs.executar(FilaJobs.reservar_proximo())
+        assert job.id == job_id
+        estatisticas = json.loads(job.estatisticas)
+
+        assert job.status == StatusJob.CONCLUIDO
+        assert (estatisticas['criadas'], estatisticas['erros']) == (2, 1)
+        assert '92.000.000/0001-02' in estatisticas['detalhes_erros'][0]
+        assert db.session.query(Empresa).filter(Empresa.cnpj.like('92.000.000/%')).count() == 2
+        assert not os.path.exists(job.arquivo)
+
+
+def test_falha_fora_dos_blocos_mantem_o_arquivo_ate_esgotar_as_tentativas(app, diretorio_jobs, monkeypatch):
+    def _falhar(job, parametros):
+        raise RuntimeError('banco indisponível')
+
+    with app.app_context():
+        job_id = _enfileirar([_empresa('93.000.000/0001-01')])
+        monkeypatch.setattr(FilaJobs, '_ler_blocos', staticmethod(_falhar))
+        job = FilaJobs.executar(FilaJobs.reservar_proximo())
+
+        # Retomável: continua reservado, com o erro e o upload guardados
+        assert (job.status, job.erro, job.tentativas) == (StatusJob.PROCESSANDO, 'banco indisponível', 1)
+        assert os.path.exists(job.arquivo)
+        assert FilaJobs.reservar_proximo() is None
+
+        # Worker caiu nas outras tentativas: esgotado, o job vai para ERRO
+        job.tentativas = MAXIMO_TENTATIVAS_JOB
+        job.heartbeat_em = get_brasilia_time() - timedelta(seconds=TIMEOUT_HEARTBEAT + 1)
+        db.session.commit()
+        assert FilaJobs.reservar_proximo() is None
+
+        job = db.session.get(Job, job_id)
+        db.session.refresh(job)
+        assert job.status == StatusJob.ERRO
+        assert job.concluido_em is not None
+        assert not os.path.exists(job.arquivo)
+
+
+def test_job_retomado_depois_do_heartbeat(app, diretorio_jobs, monkeypatch):
+    ler_blocos = FilaJobs._ler_blocos
+
+    def _falhar(job, parametros):
+        raise RuntimeError('falha passageira')
+
+    with app.app_context():
+        job_id = _enfileirar([_empresa('94.000.000/0001-01')])
+        monkeypatch.setattr(FilaJobs, '_ler_blocos', staticmethod(_falhar))
+        job = FilaJobs.executar(FilaJobs.reservar_proximo())
+        job.heartbeat_em = get_brasilia_time() - timedelta(seconds=TIMEOUT_HEARTBEAT + 1)
+        db.session.commit()
+
+        monkeypatch.setattr(FilaJobs, '_ler_blocos', staticmethod(ler_blocos))
+        job = FilaJobs.reservar_proximo()
+        assert (job.id, job.tentativas) == (job_id, 2)
+        assert FilaJobs.executar(job).status == StatusJob.CONCLUIDO
+        assert not os.path.exists(job.arquivo)
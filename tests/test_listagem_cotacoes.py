@@ -0,0 +1,100 @@
+"""
+Listagens de cotações: o número de consultas não cresce com o tamanho da página
+"""
+
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.models import db
+from src.models.cotacao import Cotacao, StatusCotacao
+from src.models.usuario import Usuario, TipoUsuario
+from conftest import SENHA, login
+
+COTACOES = 120
+PARTICIPANTES = 10
+
+ROTAS = ['/api/cotacoes', '/api/v133/cotacoes']
+PAPEIS = ['consultor', 'operador', 'gerente', 'administrador']
+
+
+@contextmanager
+def contar_consultas():
+    """Conta as consultas executadas na thread atual (a do cliente de teste)"""
+    thread = threading.get_ident()
+    contagem = [0]
+
+    def _contar(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            contagem[0] += 1
+
+    event.listen(Engine, 'before_cursor_execute', _contar)
+    try:
+        yield contagem
+    finally:
+        event.remove(Engine, 'before_cursor_execute', _contar)
+
+
+def _usuario(username, tipo):
+    usuario = Usuario.query.filter_by(username=username).first()
+    if usuario is None:
+        usuario = Usuario(username=username, email=f'{username}@teste.com', nome_completo=username, tipo_usuario=tipo)
+        usuario.set_password(SENHA)
+        db.session.add(usuario)
+        db.session.flush()
+    return usuario
+
+
+@pytest.fixture(scope='module')
+def cotacoes(app, usuarios):
+    """
+    Metade das cotações é do consultor de teste, aceitas por operadores
+    diferentes; a outra metade segue solicitada, de outros consultores
+    """
+    with app.app_context():
+        outros_consultores = [_usuario(f'lista_consultor_{i}', TipoUsuario.CONSULTOR).id for i in range(PARTICIPANTES)]
+        operadores = [usuarios['operador']] + [
+            _usuario(f'lista_operador_{i}', TipoUsuario.OPERADOR).id for i in range(PARTICIPANTES - 1)
+        ]
+        # O número da cotação é reservado em outra conexão: nada pendente de escrita na sessão
+        db.session.commit()
+
+        novas = []
+        for i in range(COTACOES):
+            propria = i % 2 == 0
+            novas.append(Cotacao(
+                consultor_id=usuarios['consultor'] if propria else outros_consultores[i % PARTICIPANTES],
+                operador_id=operadores[(i // 2) % PARTICIPANTES] if propria else None,
+                status=StatusCotacao.ACEITA_OPERADOR if propria else StatusCotacao.SOLICITADA,
+                cliente_nome=f'Cliente {i}', cliente_cnpj='11.222.333/0001-81',
+                origem_cep='01001-000', origem_endereco='Rua A', origem_cidade='São Paulo', origem_estado='SP',
+                destino_cep='20040-002', destino_endereco='Rua B', destino_cidade='Rio de Janeiro', destino_estado='RJ',
+                carga_descricao='Carga', carga_peso_kg=Decimal('10.00')
+            ))
+        db.session.add_all(novas)
+        db.session.commit()
+
+
+def _consultas(cliente, url):
+    # Primeira chamada aquece caches (total estimado, versões); a contagem vale a partir da segunda
+    assert cliente.get(url).status_code == 200
+    with contar_consultas() as contagem:
+        resposta = cliente.get(url)
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    return contagem[0], resposta.get_json()
+
+
+@pytest.mark.parametrize('papel', PAPEIS)
+@pytest.mark.parametrize('rota', ROTAS)
+@pytest.mark.parametrize('modo', ['page=1', 'cursor='])
+def test_consultas_independem_do_tamanho_da_pagina(app, usuarios, cotacoes, rota, papel, modo):
+    cliente = login(app, f'teste_{papel}')
+
+    pequena, dados_pequena = _consultas(cliente, f'{rota}?{modo}&per_page=5')
+    grande, dados_grande = _consultas(cliente, f'{rota}?{modo}&per_page=50')
+
+    assert len(dados_pequena['cotacoes']) == 5
+    assert len(dados_grande['cotacoes']) == 50
+    assert pequena == grande
@@ -0,0 +1,79 @@
+"""
+Paginação por cursor com valores NULL na chave de ordenação e limite de per_page
+"""
+
+from datetime import datetime
+from sqlalchemy import insert
+import pytest
+from src.models import db
+from src.models.cotacao import Cotacao, StatusCotacao
+from src.models.empresa import Empresa
+from src.routes.paginacao import paginar_por_cursor, LIMITE_MAXIMO_PAGINA
+from conftest import login
+
+CLIENTE = 'Cliente paginação'
+
+
+def criar_cotacoes_com_nulos(consultor_id, quantidade=11):
+    """Cotações com data_solicitacao repetida e nula (gravadas direto, sem numeração)"""
+    datas = [None, datetime(2025, 1, 2, 10), datetime(2025, 1, 1, 10)]
+    with db.engine.begin() as conexao:
+        conexao.execute(insert(Cotacao.__table__), [{
+            'numero_cotacao': f'PAG-{consultor_id}-{n:04d}', 'consultor_id': consultor_id,
+            'status': StatusCotacao.SOLICITADA, 'cliente_nome': CLIENTE, 'cliente_cnpj': '11.222.333/0001-81',
+            'origem_cep': '01001-000', 'origem_endereco': 'Rua A', 'origem_cidade': 'São Paulo', 'origem_estado': 'SP',
+            'destino_cep': '20040-002', 'destino_endereco': 'Rua B', 'destino_cidade': 'Rio de Janeiro',
+            'destino_estado': 'RJ', 'carga_descricao': 'Carga', 'carga_peso_kg': 1,
+            'data_solicitacao': datas[n % 3],
+        } for n in range(quantidade)])
+
+
+def percorrer(descendente, limite=3):
+    """Ids de todas as páginas seguindo o next_cursor"""
+    query = Cotacao.query.filter(Cotacao.cliente_nome == CLIENTE)
+    ids, cursor = [], None
+    while True:
+        itens, cursor = paginar_por_cursor(
+            query, [Cotacao.data_solicitacao, Cotacao.id], cursor, limite, descendente
+        )
+        ids.extend(item.id for item in itens)
+        if cursor is None:
+            return ids
+
+
+@pytest.fixture(scope='module')
+def cotacoes_com_nulos(app, usuarios):
+    with app.app_context():
+        criar_cotacoes_com_nulos(usuarios['gerente'])
+
+
+@pytest.mark.parametrize('descendente', [True, False])
+def test_cursor_percorre_todas_as_linhas_com_nulos(app, cotacoes_com_nulos, descendente):
+    with app.app_context():
+        esperado = [cotacao.id for cotacao in Cotacao.query.filter(Cotacao.cliente_nome == CLIENTE).order_by(
+            Cotacao.data_solicitacao.desc() if descendente else Cotacao.data_solicitacao.asc(),
+            Cotacao.id.desc() if descendente else Cotacao.id.asc()
+        )]
+        assert percorrer(descendente) == esperado
+        assert len(esperado) == 11
+
+
+def test_per_page_da_resposta_e_o_valor_aplicado(app, usuarios, cotacoes_com_nulos):
+    cliente = login(app, 'teste_gerente')
+    dados = cliente.get(f'/api/v133/cotacoes?cursor=&per_page={LIMITE_MAXIMO_PAGINA * 10}').get_json()
+    assert dados['per_page'] == LIMITE_MAXIMO_PAGINA
+    dados = cliente.get('/api/v133/cotacoes?cursor=&per_page=0').get_json()
+    assert dados['per_page'] == 1 and len(dados['cotacoes']) == 1
+
+
+def test_facetas_limitam_per_page(app):
+    with app.app_context():
+        db.session.add(Empresa(razao_social='Facetada', cnpj='96.000.000/0001-01', endereco_completo='Rua F'))
+        db.session.commit()
+
+    cliente = app.test_client()
+    dados = cliente.get(f'/api/empresas/facetas?per_page={LIMITE_MAXIMO_PAGINA * 10}').get_json()
+    assert dados['per_page'] == LIMITE_MAXIMO_PAGINA
+    dados = cliente.get('/api/empresas/facetas?per_page=0').get_json()
+    assert dados['per_page'] == 1 and len(dados['empresas']) == 1
+    assert dados['pages'] == dados['total']
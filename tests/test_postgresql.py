@@ -0,0 +1,254 @@
+"""
+Migrações e escritas no PostgreSQL
+
+Usa o servidor de DATABASE_URL (postgresql://...) ou, sem ele, um cluster
+temporário criado com initdb/pg_ctl do PATH; sem nenhum dos dois, os testes
+são pulados. Cada teste cria (e remove) o seu próprio banco.
+"""
+
+import shutil
+import socket
+import subprocess
+import uuid
+from decimal import Decimal
+import pytest
+from flask import Flask
+from flask_migrate import Migrate, upgrade
+from sqlalchemy import create_engine, insert, inspect, select, text
+from sqlalchemy.engine import make_url
+from alembic import command
+from alembic.script import ScriptDirectory
+from src import banco
+from src.models import db
+from src.models.cotacao import Cotacao, StatusCotacao
+from src.models.eventos import EventoTempoReal
+from src.models.relatorio_cotacoes import (
+    ContribuicaoRollupCotacao, RollupCotacoes, RollupCotacoesMensal, ParticipanteCotacoesMensal
+)
+from src.models.usuario import Usuario, TipoUsuario, LogAuditoria
+from conftest import URL_ORIGINAL
+
+TABELAS_ROLLUP = ('rollup_cotacoes_contribuicoes', 'rollup_cotacoes_diario',
+                  'rollup_cotacoes_mensal', 'rollup_cotacoes_participantes')
+
+DADOS_COTACAO = {
+    'cliente_nome': 'Cliente PG', 'cliente_cnpj': '11.222.333/0001-81',
+    'origem_cep': '01001-000', 'origem_endereco': 'Rua A', 'origem_cidade': 'São Paulo', 'origem_estado': 'SP',
+    'destino_cep': '20040-002', 'destino_endereco': 'Rua B', 'destino_cidade': 'Rio de Janeiro',
+    'destino_estado': 'RJ', 'carga_descricao': 'Carga', 'carga_peso_kg': Decimal('10.00')
+}
+
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope='module')
+def servidor_pg(tmp_path_factory):
+    """URL de um banco do servidor usado para criar os bancos dos testes"""
+    url = URL_ORIGINAL or ''
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    if url.startswith('postgresql'):
+        yield url
+        return
+
+    initdb, pg_ctl = shutil.which('initdb'), shutil.which('pg_ctl')
+    if not (initdb and pg_ctl):
+        pytest.skip('PostgreSQL indisponível (defina DATABASE_URL ou coloque initdb/pg_ctl no PATH)')
+    dados = tmp_path_factory.mktemp('pgdata')
+    criado = subprocess.run(
+        [initdb, '-D', str(dados), '-U', 'postgres', '-A', 'trust', '-E', 'UTF8'], capture_output=True, text=True
+    )
+    if criado.returncode != 0:
+        pytest.skip(f'initdb falhou: {criado.stderr.strip()}')
+    porta = _porta_livre()
+    subprocess.run(
+        [pg_ctl, '-D', str(dados), '-l', str(dados / 'log'), '-w', 'start', '-o', f'-p {porta} -k {dados}'],
+        check=True, capture_output=True
+    )
+    try:
+        yield f'postgresql://postgres@127.0.0.1:{porta}/postgres'
+    finally:
+        subprocess.run([pg_ctl, '-D', str(dados), '-m', 'fast', '-w', 'stop'], capture_output=True)
+
+
+@pytest.fixture
+def app_pg(app, servidor_pg):
+    """App com um banco PostgreSQL vazio (o app do conftest garante todos os models importados)"""
+    nome = f'brccsis_teste_{uuid.uuid4().hex[:8]}'
+    administracao = create_engine(servidor_pg, isolation_level='AUTOCOMMIT')
+    with administracao.connect() as conexao:
+        conexao.execute(text(f"CREATE DATABASE {nome} ENCODING 'UTF8' TEMPLATE template0"))
+
+    url = make_url(servidor_pg).set(database=nome).render_as_string(hide_password=False)
+    app_pg = Flask('teste_postgresql')
+    app_pg.config.update(
+        SQLALCHEMY_DATABASE_URI=url, SQLALCHEMY_ENGINE_OPTIONS=banco.opcoes_engine(url),
+        SQLALCHEMY_TRACK_MODIFICATIONS=False, TESTING=True
+    )
+    db.init_app(app_pg)
+    Migrate(app_pg, db, directory=banco.DIRETORIO_MIGRACOES)
+    try:
+        yield app_pg
+    finally:
+        with app_pg.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        with administracao.connect() as conexao:
+            conexao.execute(text(f"DROP DATABASE IF EXISTS {nome}"))
+        administracao.dispose()
+
+
+def _revisao_head(app_pg):
+    with app_pg.app_context():
+        configuracao = app_pg.extensions['migrate'].migrate.get_config(banco.DIRETORIO_MIGRACOES)
+        return ScriptDirectory.from_config(configuracao).get_current_head()
+
+
+def _revisao_atual():
+    with db.engine.connect() as conexao:
+        return conexao.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def _usuario(username, tipo):
+    usuario = Usuario(username=username, email=f'{username}@teste.com', nome_completo=username, tipo_usuario=tipo)
+    usuario.set_password('teste123')
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario.id
+
+
+def _rollups():
+    """Conteúdo dos rollups de cotações (para comparar com uma reconstrução)"""
+    conteudo = {}
+    for modelo in (ContribuicaoRollupCotacao, RollupCotacoes, RollupCotacoesMensal, ParticipanteCotacoesMensal):
+        conteudo[modelo.__tablename__] = sorted(
+            tuple(linha) for linha in db.session.execute(select(modelo.__table__))
+        )
+    return conteudo
+
+
+def test_preparar_banco_vazio_e_sem_divergencia_dos_models(app_pg):
+    with app_pg.app_context():
+        banco.preparar_banco(db)
+        # Segunda inicialização (outro worker) não tem nada a aplicar
+        banco.preparar_banco(db)
+
+        assert _revisao_atual() == _revisao_head(app_pg)
+        tabelas = set(inspect(db.engine).get_table_names())
+        assert set(db.metadata.tables) <= tabelas
+
+        # Equivalente ao `flask db check`: os models não geram nenhuma operação nova
+        configuracao = app_pg.extensions['migrate'].migrate.get_config(banco.DIRETORIO_MIGRACOES)
+        command.check(configuracao)
+
+
+def test_upgrade_de_0001_ate_head_com_dados(app_pg):
+    with app_pg.app_context():
+        upgrade(banco.DIRETORIO_MIGRACOES, revision='0001')
+        # Escrita direta nas tabelas (os hooks da sessão usam tabelas de revisões posteriores)
+        with db.engine.begin() as conexao:
+            consultor_id = conexao.execute(insert(Usuario.__table__).values(
+                username='legado', email='legado@teste.com', password_hash='x',
+                nome_completo='Legado', tipo_usuario=TipoUsuario.CONSULTOR, ativo=True
+            ).returning(Usuario.id)).scalar_one()
+            conexao.execute(insert(Cotacao.__table__), [
+                {**DADOS_COTACAO, 'numero_cotacao': f'COT-20250101-{n:04d}', 'consultor_id': consultor_id,
+                 'status': StatusCotacao.SOLICITADA}
+                for n in range(1, 4)
+            ])
+
+        upgrade(banco.DIRETORIO_MIGRACOES, revision='0004')
+        # Rollup gravado antes da 0005 (sem as colunas de frete)
+        with db.engine.begin() as conexao:
+            conexao.execute(text(
+                "INSERT INTO rollup_cotacoes_participantes (mes, papel, participante_id, quantidade) "
+                "VALUES ('2025-01', 'consultor', :id, 99)"
+            ), {'id': consultor_id})
+
+        upgrade(banco.DIRETORIO_MIGRACOES)
+        assert _revisao_atual() == _revisao_head(app_pg)
+
+        with db.engine.connect() as conexao:
+            for tabela in TABELAS_ROLLUP:
+                assert conexao.execute(text(f"SELECT count(*) FROM {tabela}")).scalar() == 0
+            assert conexao.execute(text("SELECT count(*) FROM cotacoes")).scalar() == 3
+        colunas = {coluna['name'] for coluna in inspect(db.engine).get_columns('rollup_cotacoes_participantes')}
+        assert {'aceitas', 'soma_frete_centavos', 'qtd_frete'} <= colunas
+
+        # A inicialização reconstrói o rollup esvaziado pela 0005
+        RollupCotacoes.garantir_rollup()
+        participante = db.session.execute(select(ParticipanteCotacoesMensal).filter_by(
+            papel='consultor', participante_id=consultor_id
+        )).scalar_one()
+        assert participante.quantidade == 3
+
+
+def test_escritas_de_cotacao_e_auditoria(app_pg):
+    with app_pg.app_context():
+        banco.preparar_banco(db)
+        RollupCotacoes.garantir_rollup()
+        consultor_id = _usuario('pg_consultor', TipoUsuario.CONSULTOR)
+        operador_id = _usuario('pg_operador', TipoUsuario.OPERADOR)
+        admin_id = _usuario('pg_admin', TipoUsuario.ADMINISTRADOR)
+
+        numeros = []
+        for _ in range(3):
+            cotacao = Cotacao.criar_cotacao(dict(DADOS_COTACAO), consultor_id)
+            numeros.append(cotacao.numero_cotacao)
+        assert [int(numero.rsplit('-', 1)[1]) for numero in numeros] == [1, 2, 3]
+
+        cotacao.aceitar_por_operador(operador_id)
+        cotacao.enviar_cotacao(valor_frete=Decimal('150.50'), prazo_entrega=5)
+        cotacao.aceitar_por_consultor()
+        assert db.session.get(Cotacao, cotacao.id).status == StatusCotacao.ACEITA_CONSULTOR
+
+        # Rollups mantidos nas transições = reconstrução completa
+        incrementais = _rollups()
+        with db.engine.begin() as conexao:
+            RollupCotacoes.reconstruir(conexao)
+        db.session.expire_all()
+        assert _rollups() == incrementais
+        participante = db.session.execute(select(ParticipanteCotacoesMensal).filter_by(
+            papel='operador', participante_id=operador_id
+        )).scalar_one()
+        assert (participante.aceitas, participante.soma_frete_centavos, participante.qtd_frete) == (1, 15050, 1)
+
+        # Eventos só para os envolvidos e gestores
+        destinos = set(db.session.execute(
+            select(EventoTempoReal.usuario_id).where(EventoTempoReal.tipo == 'cotacao_status')
+        ).scalars())
+        assert destinos == {consultor_id, operador_id, admin_id}
+
+        # Auditoria (síncrona com TESTING) e lote com um registro inválido
+        LogAuditoria.registrar_acao(usuario_id=admin_id, acao='TESTE_PG', recurso='TESTE', detalhes='direto')
+        from src.models import auditoria
+        from src.models.auditoria import GravadorAuditoria
+        espera, auditoria.ESPERA_AUDITORIA = auditoria.ESPERA_AUDITORIA, 0
+        try:
+            GravadorAuditoria()._gravar([
+                {'acao': 'TESTE_PG', 'recurso': 'TESTE', 'detalhes': 'lote'},
+                {'acao': None, 'recurso': 'TESTE', 'detalhes': 'invalido'},
+            ])
+        finally:
+            auditoria.ESPERA_AUDITORIA = espera
+        detalhes = sorted(db.session.execute(
+            select(LogAuditoria.detalhes).where(LogAuditoria.acao == 'TESTE_PG')
+        ).scalars())
+        assert detalhes == ['direto', 'lote']
+
+
+def test_paginacao_por_cursor_com_nulos(app_pg):
+    from test_paginacao import criar_cotacoes_com_nulos, percorrer, CLIENTE
+    with app_pg.app_context():
+        banco.preparar_banco(db)
+        criar_cotacoes_com_nulos(_usuario('pg_paginacao', TipoUsuario.GERENTE))
+        for descendente in (True, False):
+            ordem = (Cotacao.data_solicitacao, Cotacao.id)
+            esperado = db.session.execute(select(Cotacao.id).where(Cotacao.cliente_nome == CLIENTE).order_by(
+                *[coluna.desc() if descendente else coluna.asc() for coluna in ordem]
+            )).scalars().all()
+            assert percorrer(descendente) == esperado
@@ -0,0 +1,88 @@
+"""
+Rollups de cotações: a manutenção incremental (hooks da sessão) tem de
+chegar às mesmas tabelas que RollupCotacoes.reconstruir()
+"""
+
+import uuid
+from decimal import Decimal
+from sqlalchemy import select
+from src.models import db
+from src.models.cotacao import Cotacao, HistoricoCotacao, StatusCotacao
+from src.models.empresa import Empresa
+from src.models.notificacao import Notificacao
+from src.models.relatorio_cotacoes import (
+    ContribuicaoRollupCotacao, RollupCotacoes, RollupCotacoesMensal, ParticipanteCotacoesMensal
+)
+from src.models.usuario import Usuario, TipoUsuario
+
+DADOS_COTACAO = {
+    'cliente_nome': 'Cliente Rollup', 'cliente_cnpj': '11.222.333/0001-81',
+    'origem_cep': '01001-000', 'origem_endereco': 'Rua A', 'origem_cidade': 'São Paulo', 'origem_estado': 'SP',
+    'destino_cep': '20040-002', 'destino_endereco': 'Rua B', 'destino_cidade': 'Rio de Janeiro',
+    'destino_estado': 'RJ', 'carga_descricao': 'Carga', 'carga_peso_kg': Decimal('10.00')
+}
+
+
+def _usuario(tipo):
+    username = f'rollup_{tipo.value}_{uuid.uuid4().hex[:8]}'
+    usuario = Usuario(username=username, email=f'{username}@teste.com', nome_completo=username, tipo_usuario=tipo)
+    usuario.set_password('teste123')
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario.id
+
+
+def _reconstruir():
+    with db.engine.begin() as conexao:
+        RollupCotacoes.reconstruir(conexao)
+    db.session.expire_all()
+
+
+def _rollups():
+    """Conteúdo dos rollups de cotações (para comparar com uma reconstrução)"""
+    conteudo = {}
+    for modelo in (ContribuicaoRollupCotacao, RollupCotacoes, RollupCotacoesMensal, ParticipanteCotacoesMensal):
+        conteudo[modelo.__tablename__] = sorted(
+            tuple(linha) for linha in db.session.execute(select(modelo.__table__))
+        )
+    return conteudo
+
+
+def test_transicoes_e_exclusao_mantem_rollups_iguais_a_reconstrucao(app):
+    with app.app_context():
+        # Outros testes inserem cotações direto no banco: parte de uma base reconstruída
+        _reconstruir()
+        consultor_id = _usuario(TipoUsuario.CONSULTOR)
+        operador_id = _usuario(TipoUsuario.OPERADOR)
+        empresa = Empresa(
+            razao_social='Prestadora Rollup', cnpj=f'92.{uuid.uuid4().int % 10**6:06d}/0001-01',
+            endereco_completo='Rua R'
+        )
+        db.session.add(empresa)
+        db.session.commit()
+        empresa_id = empresa.id
+
+        aceita, negada, excluida = (Cotacao.criar_cotacao(dict(DADOS_COTACAO), consultor_id) for _ in range(3))
+        for cotacao in (aceita, negada, excluida):
+            cotacao.aceitar_por_operador(operador_id)
+        aceita.enviar_cotacao(valor_frete=Decimal('150.50'), prazo_entrega=5, empresa_prestadora_id=empresa_id)
+        aceita.aceitar_por_consultor()
+        negada.enviar_cotacao(valor_frete=Decimal('99.90'), prazo_entrega=3)
+        negada.negar_por_consultor()
+        assert (aceita.status, negada.status) == (StatusCotacao.ACEITA_CONSULTOR, StatusCotacao.NEGADA_CONSULTOR)
+
+        # Exclusão pelo ORM (notificações e histórico referenciam a cotação)
+        for modelo in (Notificacao, HistoricoCotacao):
+            for linha in modelo.query.filter_by(cotacao_id=excluida.id):
+                db.session.delete(linha)
+        db.session.delete(excluida)
+        db.session.commit()
+
+        incrementais = _rollups()
+        participante = db.session.execute(select(ParticipanteCotacoesMensal).filter_by(
+            papel='operador', participante_id=operador_id
+        )).scalar_one()
+        assert (participante.quantidade, participante.aceitas) == (2, 1)
+
+        _reconstruir()
+        assert _rollups() == incrementais
@@ -0,0 +1,47 @@
+"""
+POST /api/seed: a exclusão em massa mantém o índice de busca e o rollup do analytics
+"""
+
+from sqlalchemy import text
+from src.models import db
+from src.models.analytics import RollupAnalytics
+from src.models.busca import IndiceBuscaEmpresa, TABELA_BUSCA
+from src.models.empresa import Empresa
+
+
+def _rollup():
+    return sorted(db.session.execute(text("SELECT chave, quantidade FROM analytics_rollup WHERE quantidade <> 0")))
+
+
+def test_seed_repetido_reconstroi_indice_e_rollup(app):
+    cliente = app.test_client()
+    assert cliente.post('/api/seed').status_code == 201
+    with app.app_context():
+        # Empresa fora do seed, removida pela exclusão em massa do próximo seed
+        avulsa = Empresa(
+            razao_social='Empresa Avulsa Ltda', cnpj='55.666.777/0001-88',
+            endereco_completo='Rua C, 1 - Manaus/AM'
+        )
+        db.session.add(avulsa)
+        # Commit sem flush explícito também passa pelos hooks
+        db.session.commit()
+        assert db.session.execute(text(
+            "SELECT quantidade FROM analytics_rollup WHERE chave = 'metrica:total'"
+        )).scalar() == 4
+        if IndiceBuscaEmpresa.disponivel():
+            assert avulsa.id in db.session.execute(text(f"SELECT rowid FROM {TABELA_BUSCA}")).scalars().all()
+
+    resposta = cliente.post('/api/seed')
+    assert resposta.status_code == 201, resposta.get_data(as_text=True)
+
+    with app.app_context():
+        empresas = db.session.execute(text("SELECT id FROM empresas ORDER BY id")).scalars().all()
+        assert len(empresas) == 3
+        if IndiceBuscaEmpresa.disponivel():
+            indexadas = db.session.execute(text(f"SELECT rowid FROM {TABELA_BUSCA} ORDER BY rowid")).scalars().all()
+            assert indexadas == empresas
+
+        incremental = _rollup()
+        with db.engine.begin() as conexao:
+            RollupAnalytics.reconstruir(conexao)
+        assert _rollup() == incremental
@@ -0,0 +1,88 @@
+"""
+Numeração das cotações (SequenciaCotacao) sob reservas concorrentes
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pytest
+from src.models import db
+from src.models.cotacao import SequenciaCotacao
+
+THREADS = 16
+RESERVAS_POR_THREAD = 25
+
+
+def _reservar_em_paralelo(app, dia, quantidade, threads=THREADS, por_thread=RESERVAS_POR_THREAD):
+    """Todas as threads começam juntas (a primeira rodada passa pelo INSERT ... ON CONFLICT)"""
+    largada = threading.Barrier(threads)
+
+    def _executar():
+        with app.app_context():
+            largada.wait()
+            return [SequenciaCotacao._reservar(dia, quantidade) for _ in range(por_thread)]
+
+    with ThreadPoolExecutor(threads) as executor:
+        resultados = [futuro.result() for futuro in [executor.submit(_executar) for _ in range(threads)]]
+    return [ultimo for lista in resultados for ultimo in lista]
+
+
+def _reservar_no_processo(dia, quantidade, largada):
+    """Executado em outro processo (cada worker do gunicorn tem o seu engine)"""
+    from src.main import app
+    with app.app_context():
+        largada.wait()
+        return [SequenciaCotacao._reservar(dia, quantidade) for _ in range(RESERVAS_POR_THREAD)]
+
+
+def _contador(app, dia):
+    with app.app_context():
+        return db.session.get(SequenciaCotacao, dia).ultimo
+
+
+def test_reservas_concorrentes_unicas_e_sem_buracos(app):
+    dia = '20990101'
+    numeros = _reservar_em_paralelo(app, dia, 1)
+
+    total = THREADS * RESERVAS_POR_THREAD
+    assert len(set(numeros)) == total
+    assert sorted(numeros) == list(range(1, total + 1))
+    assert _contador(app, dia) == total
+
+
+@pytest.mark.parametrize('bloco', [3, 10])
+def test_blocos_concorrentes_sem_sobreposicao(app, bloco):
+    dia = f'209902{bloco:02d}'
+    ultimos = _reservar_em_paralelo(app, dia, bloco)
+
+    # Cada reserva devolve o último número da faixa [ultimo - bloco + 1, ultimo]
+    numeros = [numero for ultimo in ultimos for numero in range(ultimo - bloco + 1, ultimo + 1)]
+    assert sorted(numeros) == list(range(1, len(ultimos) * bloco + 1))
+
+
+def test_proximo_concorrente(app):
+    dia = '20990301'
+    largada = threading.Barrier(THREADS)
+
+    def _executar():
+        with app.app_context():
+            largada.wait()
+            return [SequenciaCotacao.proximo(dia) for _ in range(RESERVAS_POR_THREAD)]
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        numeros = [n for futuro in [executor.submit(_executar) for _ in range(THREADS)] for n in futuro.result()]
+
+    assert sorted(numeros) == list(range(1, THREADS * RESERVAS_POR_THREAD + 1))
+
+
+def test_reservas_concorrentes_entre_processos(app):
+    dia = '20990401'
+    processos = 4
+    contexto = multiprocessing.get_context('spawn')
+    with contexto.Manager() as gerenciador:
+        largada = gerenciador.Barrier(processos)
+        with ProcessPoolExecutor(processos, mp_context=contexto) as executor:
+            futuros = [executor.submit(_reservar_no_processo, dia, 1, largada) for _ in range(processos)]
+            numeros = [n for futuro in futuros for n in futuro.result(timeout=120)]
+
+    assert sorted(numeros) == list(range(1, processos * RESERVAS_POR_THREAD + 1))
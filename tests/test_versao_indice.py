@@ -0,0 +1,28 @@
+"""
+VersaoIndice.incrementar sob transações concorrentes
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.models import db
+from src.models.busca import VersaoIndice
+
+
+def test_incrementos_concorrentes_criam_a_linha_uma_vez(app):
+    nome = 'teste_concorrencia'
+    threads, por_thread = 8, 20
+    largada = threading.Barrier(threads)
+
+    def _executar():
+        with app.app_context():
+            largada.wait()
+            for _ in range(por_thread):
+                with db.engine.begin() as conexao:
+                    VersaoIndice.incrementar(conexao, nome)
+
+    with ThreadPoolExecutor(threads) as executor:
+        for futuro in [executor.submit(_executar) for _ in range(threads)]:
+            futuro.result()
+
+    with app.app_context():
+        assert VersaoIndice.obter(nome) == threads * por_thread